@@ -10,6 +10,10 @@ from displays.OLED1306Manager import OLED1306Display
 from utils.device_id import get_device_id
 from utils.led_indicator import LEDIndicator
 from utils.logger import Logger
+from utils.aggregator import Aggregator
+from utils.loop_stats import LoopStats
+from utils.payload_encoder import PayloadEncoder
+from utils.offline_queue import OfflineQueue, KIND_MQTT, KIND_API
 from utils.uptime_tracker import UptimeTracker
 from runtime import run_loop  # your existing runtime.py
 
@@ -44,24 +48,31 @@ def bootstrap():
     led = LEDIndicator()
     led.start(500)
 
+    # Config: the last-known-good copy on flash lets sensing start without
+    # waiting on the network; it is revalidated by the runtime once online
+    cfg_loader = ConfigLoader(device_id)
+    config = cfg_loader.load_cached()
+    cached = config is not None
+
     # Wi-Fi
     logger.log("Connecting WiFi...")
+    wifi = WiFiManager()
     try:
-        wifi = WiFiManager()
         if not wifi.connect():
             raise RuntimeError("returned False")
         logger.log("WiFi connected")
     except Exception as e:
-        raise RuntimeError(f"WiFi init failed: {e}")
-
-    # Config
-    cfg_loader = ConfigLoader(device_id)
-    try:
-        config = cfg_loader.load_config()
-        if config is None:
-            raise RuntimeError("returned None")
-    except Exception as e:
-        raise RuntimeError(f"Config loading failed: {e}")
+        if not cached:
+            raise RuntimeError(f"WiFi init failed: {e}")
+        logger.log(f"WiFi init failed, running on cached config: {e}")
+
+    if not cached:
+        try:
+            config = cfg_loader.load_config()
+            if config is None:
+                raise RuntimeError("returned None")
+        except Exception as e:
+            raise RuntimeError(f"Config loading failed: {e}")
 
     # Remote logging
     logger.set_device_info(device_id, config.get("name", device_id))
@@ -75,10 +86,43 @@ def bootstrap():
         config["motion_sensor_pin"],
         config["switch_sensor_pin"],
         config["onewire_ds18b20_pin"],
+        config.get("sensor_options", {}),
     )
     if not sensors.initialize_sensors():
         raise RuntimeError("Sensor initialization failed")
 
+    # Offline store-and-forward queues, one per transport so a backlog for
+    # an unreachable API never holds up MQTT records (and vice versa). Each
+    # holds max_records, unless mqtt_max_records/api_max_records set its own
+    queue_cfg = config.get("offline_queue", {})
+    queues = {}
+    if queue_cfg.get("enabled", False):
+        path = queue_cfg.get("path", "/queue")
+        max_records = queue_cfg.get("max_records", 256)
+        try:
+            for kind, name in ((KIND_MQTT, "mqtt"), (KIND_API, "api")):
+                queues[kind] = OfflineQueue(
+                    f"{path}/{name}",
+                    queue_cfg.get(f"{name}_max_records", max_records),
+                    queue_cfg.get("record_size", 512),
+                    queue_cfg.get("segments", 8),
+                )
+        except Exception as e:
+            logger.log(f"Offline queue disabled: {e}")
+            queues = {}
+
+    # Per-publish statistics of sensor samples
+    agg_cfg = config.get("aggregation", {})
+    aggregator = None
+    if agg_cfg.get("enabled", False):
+        aggregator = Aggregator()
+
+    # Per-stage timing of the main loop
+    stats_cfg = config.get("loop_stats", {})
+    loop_stats = None
+    if stats_cfg.get("enabled", False):
+        loop_stats = LoopStats(stats_cfg.get("publish_period", 300000))
+
     # Build shared state
     state = {
         "oled": oled,
@@ -92,6 +136,11 @@ def bootstrap():
         "sensors": sensors,
         "mqtt": None,
         "api": None,
+        "queues": queues,
+        "aggregator": aggregator,
+        "loop_stats": loop_stats,
+        "encoder": PayloadEncoder(),
+        "queue_drain_batch": queue_cfg.get("drain_batch", 20),
         "fan_pwm": None,
         "fan_step": None,
         "last_publish": 0,
@@ -99,8 +148,11 @@ def bootstrap():
         "last_motion_check": 0,
         "last_switch_check": 0,
         "last_temp_check": 0,
-        "last_cfg_check": time.ticks_ms() - (24 * 60 * 60 * 1000),
+        "last_cfg_check": time.ticks_ms(),
+        "config_applied": False,
+        "config_from_cache": cached,
         "device_enabled": config.get("enabled", False),
+        "runtime_mode": config.get("runtime_mode", "polling"),
         "mqtt_cfg": config.get("mqtt_config", {}),
         "mqtt_enabled": config.get("mqtt_config", {}).get("enabled", False),
         "api_cfg": config.get("api_config", {}),
@@ -122,6 +174,7 @@ def bootstrap():
             "fan_pwm_duty": 0,
             "fan_step_fans": 0,
             "version": version,
+            "sensors": {},  # Per-sensor values, keyed by lower-case driver name
         },
     }
 
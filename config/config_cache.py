@@ -0,0 +1,71 @@
+# config/config_cache.py
+
+import os
+import ujson as json
+import ubinascii
+from utils.logger import Logger
+
+# Bump when the file layout changes; older caches are ignored
+CACHE_FORMAT = 1
+
+
+class ConfigCache:
+    """
+    Last-known-good merged config on flash. The file holds a JSON header line
+    (format, crc, change-detection hash, HTTP validators, config_version)
+    followed by the config JSON line. The crc covers the config line's exact
+    bytes, so a corrupted or half-written file is rejected instead of booting
+    on garbage. Writes go to a temp file that is renamed over the old one.
+    """
+
+    def __init__(self, path="/config_cache.json"):
+        self.path = path
+        self.logger = Logger.get_instance()
+
+    def load(self):
+        """Return the header dict with the config under "config", or None."""
+        try:
+            with open(self.path, "rb") as f:
+                header = json.loads(f.readline())
+                body = f.readline().rstrip(b"\n")
+        except (OSError, ValueError) as e:
+            self.logger.log(f"No cached config: {e}")
+            return None
+
+        if header.get("format") != CACHE_FORMAT:
+            self.logger.log("Cached config has an old format; ignoring")
+            return None
+        if ubinascii.crc32(body) != header.get("crc"):
+            self.logger.log("Cached config failed its CRC check; ignoring")
+            return None
+
+        try:
+            header["config"] = json.loads(body)
+        except ValueError:
+            return None
+        self.logger.log(f"Cached config loaded (version {header.get('version')})")
+        return header
+
+    def save(self, config, config_hash, etag=None, last_modified=None):
+        body = json.dumps(config).encode()
+        header = {
+            "format": CACHE_FORMAT,
+            "crc": ubinascii.crc32(body),
+            "hash": config_hash,
+            "etag": etag,
+            "last_modified": last_modified,
+            "version": config.get("config_version"),
+        }
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(json.dumps(header).encode())
+                f.write(b"\n")
+                f.write(body)
+                f.write(b"\n")
+            os.rename(tmp, self.path)
+            self.logger.log("Config cached to flash")
+            return True
+        except OSError as e:
+            self.logger.log(f"Config cache write failed: {e}")
+            return False
@@ -1,10 +1,15 @@
 # config/config_loader.py
 
 import ujson as json
-import urequests
 import time
+from config.config_cache import ConfigCache
+from connections.http_pool import HTTPPool
+from utils.json_stream import JSONStream
 from utils.logger import Logger
 
+# Top-level sections kept whole; every other key is skipped unparsed
+_GLOBAL_SECTIONS = ("device_global_config", "system_global_config")
+
 
 class ConfigLoader:
 
@@ -12,39 +17,110 @@ class ConfigLoader:
         self,
         device_id,
         config_url="http://192.168.6.132:5000/pico_iot_config.json",
+        cache=None,
     ):
         self.device_id = device_id
         self.config_url = config_url
         self.last_hash = None
+        # Validators from the last 200 response, sent back on each poll
+        self.etag = None
+        self.last_modified = None
+        self.http = HTTPPool.get_instance()
+        self.cache = cache or ConfigCache()
 
         self.logger = Logger.get_instance()
         self.logger.log("ConfigLoader initialized")
 
+    def _fetch(self, timeout, conditional=False):
+        """
+        GET the config file and stream it through _process_stream. Returns the
+        merged config, or None when the server answers 304 Not Modified to a
+        conditional request.
+        """
+        headers = {}
+        if conditional:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+        current_response = None
+        try:
+            current_response = self.http.request(
+                "GET", self.config_url, headers=headers, timeout=timeout
+            )
+            status = current_response.status_code
+            if status == 304:
+                return None
+            if status != 200:
+                raise RuntimeError(f"HTTP error: {status}")
+            config = self._process_stream(current_response)
+            self.etag = current_response.headers.get("etag")
+            self.last_modified = current_response.headers.get("last-modified")
+            return config
+        finally:
+            if current_response:
+                current_response.close()
+
+    def _process_stream(self, stream):
+        """
+        Scan the config document chunk by chunk and build dicts only for the
+        global sections and this device's device_list entry. Other entries are
+        captured one at a time and dropped unless they mention our device_id,
+        so peak memory is one entry rather than the whole fleet's config.
+        """
+        scanner = JSONStream(stream)
+        needle = json.dumps(self.device_id).encode()
+        all_config = {"device_list": []}
+
+        for key in scanner.iter_object():
+            if key in _GLOBAL_SECTIONS:
+                all_config[key] = json.loads(scanner.capture_value())
+            elif key == "device_list" and scanner.peek() == ord("["):
+                for _ in scanner.iter_array():
+                    raw = scanner.capture_value()
+                    if all_config["device_list"] or raw.find(needle) < 0:
+                        continue
+                    dev = json.loads(raw)
+                    if dev.get("device_id") == self.device_id:
+                        all_config["device_list"].append(dev)
+            else:
+                scanner.skip_value()
+        self.logger.log("JSON parsed successfully")
+        return self._process_config(all_config)
+
+    @staticmethod
+    def _config_hash(config):
+        # Hash this device's merged config, not the whole file, so edits to
+        # other devices' entries don't trigger a reload here
+        return hash(json.dumps(config))
+
+    def load_cached(self):
+        """
+        Return the last-known-good config from flash, or None. Seeds the hash
+        and HTTP validators so the first poll can be answered with a 304.
+        """
+        cached = self.cache.load()
+        if cached is None:
+            return None
+        self.last_hash = cached.get("hash")
+        self.etag = cached.get("etag")
+        self.last_modified = cached.get("last_modified")
+        return cached["config"]
+
+    def _store(self, config, config_hash):
+        self.last_hash = config_hash
+        self.cache.save(config, config_hash, self.etag, self.last_modified)
+
     def load_config(self):
         """Fetch, parse, and process JSON configuration with retries."""
         self.logger.log(f"Fetching configuration from {self.config_url}")
 
         for attempt in range(3):
             try:
-                current_response = None
-                all_config_data = None
-                try:
-                    current_response = urequests.get(self.config_url, timeout=5)
-                    if current_response.status_code == 200:
-                        body = current_response.text
-                        if not body:
-                            raise RuntimeError("Empty response body")
-                        all_config_data = json.loads(body)
-                    else:
-                        raise RuntimeError(
-                            f"HTTP error: {current_response.status_code}"
-                        )
-                finally:
-                    if current_response:
-                        current_response.close()
-
-                self.logger.log("JSON parsed successfully")
-                return self._process_config(all_config_data)
+                config = self._fetch(timeout=5)
+                self._store(config, self._config_hash(config))
+                return config
 
             except Exception as e:
                 self.logger.log(
@@ -56,29 +132,29 @@ class ConfigLoader:
                     raise  # On the last attempt, re-raise the caught exception
 
     def check_config(self):
-        """Check for config changes via content hash and reload if necessary."""
+        """
+        Poll for config changes with a conditional GET. A 304 costs no body;
+        a changed file is parsed as it streams in instead of being fetched
+        twice, and only counts as changed if this device's config differs.
+        """
         self.logger.log(f"Checking for configuration changes at {self.config_url}")
         try:
-            current_response = None
-            calculated_hash = None
-            try:
-                current_response = urequests.get(self.config_url, timeout=10)
-                if current_response.status_code == 200:
-                    config_bytes = current_response.content
-                    calculated_hash = hash(config_bytes)
-                else:
-                    raise RuntimeError(f"HTTP error: {current_response.status_code}")
-            finally:
-                if current_response:
-                    current_response.close()
-
-            if calculated_hash != self.last_hash:
-                self.logger.log("Configuration changed; reloading")
-                self.last_hash = calculated_hash
-                return self.load_config()
-            else:
+            etag = self.etag
+            config = self._fetch(timeout=10, conditional=True)
+            if config is None:
                 self.logger.log("Configuration unchanged")
                 return None
+            config_hash = self._config_hash(config)
+            if config_hash == self.last_hash:
+                self.logger.log("Configuration unchanged")
+                if self.etag != etag:
+                    # Same content under new validators; keep 304s working
+                    self._store(config, config_hash)
+                return None
+
+            self.logger.log("Configuration changed; reloading")
+            self._store(config, config_hash)
+            return config
 
         except Exception as e:
             self.logger.log(
@@ -3,7 +3,7 @@
 import time
 import json
 import gc
-import urequests
+from connections.http_pool import HTTPPool
 from utils.logger import Logger
 
 
@@ -24,6 +24,7 @@ class APIManager:
         self.api_key = api_config["api_key"]
         self.timeout_ms = api_config["timeout_ms"]
         self.retry_delay = api_config.get("retry_delay_ms", 5000)
+        self.http = HTTPPool.get_instance()
         self.logger = Logger.get_instance()
         self.logger.log(f"API Manager initialized for '{self.client_id}' → {self.url}")
 
@@ -34,10 +35,11 @@ class APIManager:
 
         try:
             self.logger.log(f"API Publish attempt {attempt} to {self.url}")
-            resp = urequests.post(
+            resp = self.http.request(
+                "POST",
                 self.url,
-                headers=headers,
                 data=json_payload,
+                headers=headers,
                 timeout=min(5, self.timeout_ms / 1000),
             )
             status = resp.status_code
@@ -0,0 +1,273 @@
+# connections/http_pool.py
+
+import errno
+import time
+import usocket as socket
+
+# Methods that are safe to resend when a reused connection fails mid-request
+_IDEMPOTENT = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS")
+
+
+class _ClosedByPeer(OSError):
+    """The server closed the connection without sending any of a response."""
+
+
+class HTTPResponse:
+    """
+    Response whose body is read from the pooled socket on demand. close()
+    drains any unread body and hands the socket back to the pool.
+    """
+
+    def __init__(self, pool, key, sock, status_code, headers):
+        self.pool = pool
+        self.key = key
+        self.sock = sock
+        self.status_code = status_code
+        self.headers = headers  # Lower-cased names
+
+        self.chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+        length = headers.get("content-length")
+        self.remaining = int(length) if length is not None else None
+        self.chunk_left = 0
+        if status_code in (204, 304) or status_code < 200:
+            self.remaining = 0  # Never carry a body
+        self.done = self.remaining == 0
+        self._content = None
+
+        connection = headers.get("connection", "").lower()
+        self.keep_alive = connection != "close" and (
+            self.chunked or self.remaining is not None
+        )
+
+    def _read_chunk_size(self):
+        line = self.sock.readline()
+        if not line:
+            raise OSError("Connection closed in chunked body")
+        size = int(line.split(b";")[0].strip(), 16)
+        if size == 0:
+            # Skip trailers up to the blank line
+            while self.sock.readline() not in (b"\r\n", b"\n", b""):
+                pass
+        return size
+
+    def read(self, size=-1):
+        """Read up to `size` body bytes (all remaining if -1). b"" at the end."""
+        if self.done:
+            return b""
+
+        if self.chunked:
+            if self.chunk_left == 0:
+                self.chunk_left = self._read_chunk_size()
+                if self.chunk_left == 0:
+                    self.done = True
+                    return b""
+            n = self.chunk_left if size < 0 else min(size, self.chunk_left)
+            data = self.sock.read(n)
+            self.chunk_left -= len(data)
+            if self.chunk_left == 0:
+                self.sock.readline()  # CRLF after the chunk
+            if size < 0:
+                parts = [data]
+                while True:
+                    more = self.read(-1)
+                    if not more:
+                        break
+                    parts.append(more)
+                return b"".join(parts)
+            return data
+
+        if self.remaining is None:
+            # No length: body runs until the server closes the connection
+            data = self.sock.read() if size < 0 else self.sock.read(size)
+            if not data:
+                self.done = True
+            return data or b""
+
+        n = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.sock.read(n)
+        if not data:
+            raise OSError("Connection closed in body")
+        self.remaining -= len(data)
+        if self.remaining == 0:
+            self.done = True
+        return data
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = self.read()
+        return self._content
+
+    @property
+    def text(self):
+        return str(self.content, "utf-8")
+
+    def close(self):
+        if self.sock is None:
+            return
+        try:
+            if self.keep_alive:
+                while self.read(512):
+                    pass
+        except Exception:
+            self.keep_alive = False
+        if self.keep_alive:
+            self.pool._release(self.key, self.sock)
+        else:
+            self.pool._discard(self.sock)
+        self.sock = None
+
+
+class HTTPPool:
+    """
+    Minimal HTTP/1.1 client that keeps one idle keep-alive connection per
+    host and caches DNS lookups, shared by every component that talks HTTP.
+    Idle connections are closed after idle_timeout_ms; runtime sets it above
+    the longest request period so periodic requests find one open.
+    """
+
+    _instance = None
+
+    def __init__(self, idle_timeout_ms=90000):
+        HTTPPool._instance = self
+        self.idle_timeout_ms = idle_timeout_ms
+        self.idle = {}  # (host, port) -> (socket, ticks_ms released)
+        self.addresses = {}  # (host, port) -> resolved address
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = HTTPPool()
+        return cls._instance
+
+    @staticmethod
+    def _split_url(url):
+        scheme, _, rest = url.partition("://")
+        host, slash, path = rest.partition("/")
+        path = slash + path if slash else "/"
+        default_port = 443 if scheme == "https" else 80
+        if ":" in host:
+            host, port = host.split(":", 1)
+            port = int(port)
+        else:
+            port = default_port
+        return scheme, host, port, path
+
+    def _connect(self, scheme, host, port, timeout):
+        key = (host, port)
+        addr = self.addresses.get(key)
+        if addr is None:
+            addr = socket.getaddrinfo(host, port)[0][-1]
+            self.addresses[key] = addr
+        sock = socket.socket()
+        try:
+            sock.settimeout(timeout)
+            sock.connect(addr)
+            if scheme == "https":
+                import ussl
+
+                sock = ussl.wrap_socket(sock, server_hostname=host)
+        except Exception:
+            sock.close()
+            self.addresses.pop(key, None)  # Host may have moved
+            raise
+        return sock
+
+    def _acquire(self, key):
+        entry = self.idle.pop(key, None)
+        if entry is None:
+            return None
+        sock, released = entry
+        if time.ticks_diff(time.ticks_ms(), released) > self.idle_timeout_ms:
+            self._discard(sock)
+            return None
+        return sock
+
+    def _release(self, key, sock):
+        old = self.idle.get(key)
+        if old is not None:
+            self._discard(old[0])
+        self.idle[key] = (sock, time.ticks_ms())
+
+    def _discard(self, sock):
+        try:
+            sock.close()
+        except Exception:
+            pass
+
+    def _write_request(self, sock, method, host, path, headers, data):
+        lines = [f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"]
+        for name, value in headers.items():
+            lines.append(f"{name}: {value}\r\n")
+        lines.append(f"Content-Length: {len(data)}\r\n\r\n")
+        sock.write("".join(lines).encode())
+        if data:
+            sock.write(data)
+
+    def _read_head(self, sock):
+        try:
+            status_line = sock.readline()
+        except OSError as e:
+            if e.args and e.args[0] == errno.ECONNRESET:
+                raise _ClosedByPeer("Connection reset before response")
+            raise
+        if not status_line:
+            raise _ClosedByPeer("Connection closed before response")
+        status_code = int(status_line.split(None, 2)[1])
+
+        response_headers = {}
+        while True:
+            line = sock.readline()
+            if not line or line == b"\r\n":
+                break
+            name, _, value = line.decode().partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        if status_line.startswith(b"HTTP/1.0"):
+            response_headers.setdefault("connection", "close")
+        return status_code, response_headers
+
+    def request(self, method, url, data=None, headers=None, timeout=5):
+        """Send a request and return an HTTPResponse; the caller must close() it."""
+        scheme, host, port, path = self._split_url(url)
+        key = (host, port)
+        if data is None:
+            data = b""
+        elif isinstance(data, str):
+            data = data.encode()
+        headers = headers or {}
+
+        sock = self._acquire(key)
+        if sock is not None:
+            sock.settimeout(timeout)
+            written = False
+            try:
+                self._write_request(sock, method, host, path, headers, data)
+                written = True
+                status_code, response_headers = self._read_head(sock)
+                return HTTPResponse(self, key, sock, status_code, response_headers)
+            except Exception as e:
+                self._discard(sock)
+                # A stale idle connection fails on write or is closed without
+                # an answer; retry those on a new one. Once the request is out
+                # any other failure (a timeout) may follow the server acting
+                # on it, so only idempotent requests are sent again.
+                if (
+                    written
+                    and method not in _IDEMPOTENT
+                    and not isinstance(e, _ClosedByPeer)
+                ):
+                    raise
+
+        sock = self._connect(scheme, host, port, timeout)
+        try:
+            self._write_request(sock, method, host, path, headers, data)
+            status_code, response_headers = self._read_head(sock)
+        except Exception:
+            self._discard(sock)
+            raise
+        return HTTPResponse(self, key, sock, status_code, response_headers)
+
+    def close_all(self):
+        for sock, _ in self.idle.values():
+            self._discard(sock)
+        self.idle = {}
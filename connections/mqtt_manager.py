@@ -14,24 +14,66 @@ class MQTTManager:
         self.client_id = client_id
         self.config = mqtt_config
         self.client = None
-        self.last_attempt = 0
+        self.unacked = {}  # In-flight QoS 1 messages of a dropped connection
+        self.last_attempt = None
         self.reconnect_delay = mqtt_config["reconnect_delay"]
         self.topic = f"{mqtt_config['base_topic']}/{client_id}"
+
+        # Keepalive: ping after half the keepalive interval without traffic,
+        # and treat a ping without PINGRESP as a half-open connection
+        self.keepalive = mqtt_config.get("keepalive", 60)
+        self.ping_interval = self.keepalive * 1000 // 2
+        self.ping_timeout = mqtt_config.get("ping_timeout_ms", 5000)
+        self.ping_sent = None
+
+        # QoS 1 publishes are pipelined: up to inflight_window messages may
+        # await PUBACK, and unacknowledged ones are resent after retry_ms
+        self.qos = mqtt_config.get("qos", 0)
+        self.inflight_window = mqtt_config.get("inflight_window", 8)
+        self.retry_ms = mqtt_config.get("retry_ms", 5000)
+
+        # Batching: readings are collected and sent as one message per flush
+        batch = mqtt_config.get("batch", {})
+        self.batch_enabled = batch.get("enabled", False)
+        self.batch_max_items = batch.get("max_items", 10)
+        self.batch_window = batch.get("window_ms", 10000)
+        self.batch_ndjson = batch.get("format", "array") == "ndjson"
+        self.batch_topic = batch.get("topic", f"{self.topic}/batch")
+        self.batch = []
+        self.batch_started = None
+        # Called with each batched reading when a flush fails, so readings
+        # move to durable storage (the offline queue) instead of waiting in RAM
+        self.spill = None
+
+        # Loop timing statistics go to their own topic, never batched
+        self.stats_topic = mqtt_config.get("stats_topic", f"{self.topic}/stats")
+
         self.logger = Logger.get_instance()
         self.logger.log(f"MQTT Manager init: topic={self.topic}")
+        if self.batch_enabled:
+            self.logger.log(
+                f"MQTT batching: {self.batch_max_items} items / {self.batch_window}ms"
+            )
 
     def connect(self):
-        now = time.time()
-        if now - self.last_attempt < self.reconnect_delay:
+        now = time.ticks_ms()
+        if (
+            self.last_attempt is not None
+            and time.ticks_diff(now, self.last_attempt) < self.reconnect_delay
+        ):
             return False
         self.last_attempt = now
 
+        inflight = {}
         if self.client:
+            inflight = self.client.inflight
             try:
                 self.client.disconnect()
             except:
                 pass
             self.client = None
+        elif self.unacked:
+            inflight, self.unacked = self.unacked, {}
 
         self.logger.log("MQTT connecting...")
         try:
@@ -41,33 +83,170 @@ class MQTTManager:
                 port=self.config["port"],
                 user=self.config.get("user"),
                 password=self.config.get("password"),
-                keepalive=60,
+                keepalive=self.keepalive,
                 ssl=self.config.get("ssl", False),
                 ssl_params=self.config.get("ssl_params", {}),
+                max_inflight=self.inflight_window,
+                retry_ms=self.retry_ms,
             )
         except Exception as e:
             self.logger.log(f"MQTT connect error: {e}")
             self.client = None
             return False
 
+        if self.client is None:
+            self.logger.log("MQTT connect failed")
+            self.unacked = inflight
+            return False
+
+        if inflight:
+            # Carry unacknowledged QoS 1 messages over; they are resent with
+            # DUP on the next maintain() pass
+            self.logger.log(f"MQTT resending {len(inflight)} unacknowledged")
+            self.client.inflight = inflight
+            for entry in inflight.values():
+                entry[0] = time.ticks_add(time.ticks_ms(), -self.retry_ms)
+
+        self.ping_sent = None
         self.logger.log("MQTT connected")
         return True
 
-    def publish(self, json_payload):
-        """Publish a pre-formatted JSON payload string"""
+    def maintain(self):
+        """
+        Keep the broker connection warm between publishes: consume incoming
+        packets, send PINGREQ when the link has been idle for half the
+        keepalive, and reconnect if a ping goes unanswered or the socket has
+        failed, so the next publish finds an open connection. Also flushes a
+        pending batch once its window has elapsed.
+        """
+        now = time.ticks_ms()
+        if (
+            self.batch
+            and time.ticks_diff(now, self.batch_started) >= self.batch_window
+        ):
+            self.flush()
+
+        if not self.client:
+            return self.connect()
+
+        try:
+            while self.client.check_msg() is not None:
+                pass
+            if not self.client.ping_pending:
+                self.ping_sent = None
+            self.client.resend_pending()
+
+            if self.ping_sent is not None:
+                if time.ticks_diff(now, self.ping_sent) > self.ping_timeout:
+                    self.logger.log("MQTT ping timeout, reconnecting")
+                    self._drop()
+                    return self.connect()
+            elif time.ticks_diff(now, self.client.last_tx) >= self.ping_interval:
+                self.client.ping()
+                self.ping_sent = now
+            return True
+
+        except (OSError, MQTTException) as e:
+            self.logger.log(f"MQTT connection lost: {e}")
+            self._drop()
+            return self.connect()
+
+    def _drop(self):
+        if self.client:
+            self.unacked = self.client.inflight
+            try:
+                self.client.sock.close()
+            except Exception:
+                pass
+        self.client = None
+        self.ping_sent = None
+
+    def publish(self, json_payload, spill=None):
+        """
+        Publish a pre-formatted JSON payload string. Returns False if the
+        reading was not accepted and should be kept by the caller. With
+        batching, a reading is only accepted while the broker is connected;
+        `spill` replaces self.spill if this reading fills the batch and the
+        flush fails.
+        """
+        if self.batch_enabled:
+            return self._add_to_batch(json_payload, spill)
+        return self._send(self.topic, json_payload)
+
+    def publish_stats(self, json_payload):
+        """Publish a loop statistics message to the stats topic"""
+        return self._send(self.stats_topic, json_payload)
+
+    def _add_to_batch(self, json_payload, spill=None):
+        if not self.client and not self.connect():
+            # Nothing would flush it; let the caller store it durably
+            return False
+        if not self.batch:
+            self.batch_started = time.ticks_ms()
+        if isinstance(json_payload, str):
+            json_payload = json_payload.encode()
+        elif not isinstance(json_payload, bytes):
+            # A view of the encoder's buffer, reused by the next publish
+            json_payload = bytes(json_payload)
+        self.batch.append(json_payload)
+        if len(self.batch) < self.batch_max_items or self._send_batch():
+            return True
+        # Hand this reading back to the caller and spill the earlier ones
+        self.batch.pop()
+        self._spill_batch(spill)
+        return False
+
+    def flush(self, spill=None):
+        """
+        Send all batched readings as one message. On failure they are handed
+        to `spill` or the spill callback if one is set, otherwise kept for a
+        later flush.
+        """
+        if not self.batch or self._send_batch():
+            return True
+        self._spill_batch(spill)
+        return False
+
+    def _send_batch(self):
+        if self.batch_ndjson:
+            body = b"\n".join(self.batch)
+        else:
+            body = b"[" + b",".join(self.batch) + b"]"
+        count = len(self.batch)
+        if not self._send(self.batch_topic, body):
+            return False
+        self.logger.log(f"MQTT batch of {count} flushed")
+        self.batch = []
+        return True
+
+    def _spill_batch(self, spill=None):
+        spill = spill or self.spill
+        if not spill or not self.batch:
+            return
+        for payload in self.batch:
+            spill(payload)
+        self.logger.log(f"MQTT batch of {len(self.batch)} spilled")
+        self.batch = []
+
+    def _send(self, topic, json_payload):
         if not self.client and not self.connect():
             self.logger.log("MQTT publish aborted: not connected")
             return False
         try:
-            self.client.publish(self.topic, json_payload)
+            if self.client.publish(topic, json_payload, qos=self.qos) is False:
+                # Broker is behind on PUBACKs; the caller keeps the message
+                self.logger.log("MQTT publish deferred: in-flight window full")
+                return False
             self.logger.log("MQTT publish successful")
             return True
         except (OSError, MQTTException) as e:
             self.logger.log(f"MQTT publish error: {e}")
-            self.client = None
+            self._drop()
             return False
 
     def disconnect(self):
+        if self.batch:
+            self.flush()
         if self.client:
             try:
                 self.client.disconnect()
@@ -1,8 +1,8 @@
 # OLED1306Manager.py
-from machine import Pin, SoftI2C
 import time
 import gc
 from lib.oled1306.ssd1306 import SSD1306_I2C
+from utils.i2c_bus import I2CBusManager
 
 
 class OLED1306Display:
@@ -36,42 +36,17 @@ class OLED1306Display:
 
     def _init_display(self):
         """
-        Initialize the OLED display using SoftI2C directly.
+        Initialize the OLED display on a SoftI2C bus from I2CBusManager,
+        clocking out a stuck slave first.
         Returns an SSD1306_I2C instance or None on failure.
         """
-        import time
-        from machine import Pin, SoftI2C
-
-        # --- 1) Deinit any leftover I2C (in case it exists) ---
-        print("    Deinitializing I2C")
-        try:
-            self.i2c.deinit()
-        except Exception:
-            pass
-
-        # --- 2) Bus recovery via open-drain bit-bang ---
-        print("    Recovering I2C bus")
-        sda = Pin(self.sda_pin, Pin.OPEN_DRAIN, value=1)
-        scl = Pin(self.scl_pin, Pin.OPEN_DRAIN, value=1)
-        for _ in range(9):
-            scl.value(0)
-            time.sleep_us(10)
-            scl.value(1)
-            time.sleep_us(10)
-        # STOP condition
-        sda.value(0)
-        time.sleep_us(10)
-        scl.value(1)
-        time.sleep_us(10)
-        sda.value(1)
-        time.sleep_us(10)
-        time.sleep_ms(50)
-
-        # --- 3) Use SoftI2C directly ---
         try:
             print("    Using SoftI2C for OLED")
-            self.i2c = SoftI2C(scl=scl, sda=sda, freq=200_000)
-            devs = self.i2c.scan()
+            buses = I2CBusManager.get_instance()
+            self.i2c = buses.get(
+                self.scl_pin, self.sda_pin, freq=200_000, soft=True, recover=True
+            )
+            devs = buses.scan(self.scl_pin, self.sda_pin)
             print("    SoftI2C devices:", [hex(d) for d in devs])
             if self.addr in devs:
                 print(f"    OLED found at 0x{self.addr:02X} (SoftI2C)")
@@ -443,13 +418,10 @@ class OLED1306Display:
             # Power off the display
             self.oled.poweroff()
 
-            # Deinitialize the I2C bus if it exists
+            # Release the I2C bus if it exists
             if hasattr(self, "i2c") and self.i2c:
-                try:
-                    self.i2c.deinit()
-                except AttributeError:
-                    # SoftI2C might not have deinit in some MicroPython versions
-                    pass
+                I2CBusManager.get_instance().release(self.scl_pin, self.sda_pin)
+                self.i2c = None
 
             # Set display object to None to indicate it's deinitialized
             self.oled = None
@@ -14,11 +14,25 @@ BME280_OSAMPLE_16 = 5
  
 BME280_REGISTER_CONTROL_HUM = 0xF2
 BME280_REGISTER_CONTROL = 0xF4
+BME280_REGISTER_CONFIG = 0xF5
+
+# Register codes for normal-mode settings, keyed by their natural values
+# (oversampling factor, standby time in ms, IIR filter coefficient)
+BME280_OVERSAMPLING = {0: 0, 1: 1, 2: 2, 4: 3, 8: 4, 16: 5}
+BME280_STANDBY_MS = {0.5: 0, 62.5: 1, 125: 2, 250: 3, 500: 4, 1000: 5, 10: 6, 20: 7}
+BME280_IIR = {0: 0, 2: 1, 4: 2, 8: 3, 16: 4}
+
+# Compensated fixed-point units to imperial: temperature is in 0.01 degC,
+# pressure in Pa as Q24.8, humidity in %RH as Q22.10
+_TEMP_F_SCALE = 9 / 500
+_PRESS_INHG_SCALE = 0.0002952998307 / 256
+_HUM_SCALE = 1 / 1024
  
 class BME280:
  
     def __init__(self, mode=BME280_OSAMPLE_1, address=BME280_I2CADDR, i2c=None, **kwargs):
         self._mode = 1
+        self._normal = False
         self.address = address
         self.i2c = i2c
  
@@ -40,8 +54,33 @@ class BME280:
         self._l1_barray = bytearray(1)
         self._l8_barray = bytearray(8)
         self._l3_resultarray = array("i", [0, 0, 0])
- 
+        self._l3_compensated = array("i", [0, 0, 0])
+ 
+    def configure_normal(self, osrs_t=2, osrs_p=16, osrs_h=1, standby_ms=62.5, iir=16):
+        """
+        Switch to normal mode: the sensor measures continuously every
+        standby_ms with its IIR filter applied, and read_raw_data only
+        burst-reads the latest result. Arguments are oversampling factors,
+        the standby time in ms and the filter coefficient.
+        """
+        buf = self._l1_barray
+        # config is only guaranteed to be written while in sleep mode
+        buf[0] = 0
+        self.i2c.writeto_mem(self.address, BME280_REGISTER_CONTROL, buf)
+        buf[0] = BME280_OVERSAMPLING[osrs_h]
+        self.i2c.writeto_mem(self.address, BME280_REGISTER_CONTROL_HUM, buf)
+        buf[0] = BME280_STANDBY_MS[standby_ms] << 5 | BME280_IIR[iir] << 2
+        self.i2c.writeto_mem(self.address, BME280_REGISTER_CONFIG, buf)
+        # ctrl_hum only takes effect after ctrl_meas is written
+        buf[0] = BME280_OVERSAMPLING[osrs_t] << 5 | BME280_OVERSAMPLING[osrs_p] << 2 | 3
+        self.i2c.writeto_mem(self.address, BME280_REGISTER_CONTROL, buf)
+        self._normal = True
+
     def read_raw_data(self, result):
+        if self._normal:
+            self._read_burst(result)
+            return
+
         self._l1_barray[0] = self._mode
         self.i2c.writeto_mem(self.address, BME280_REGISTER_CONTROL_HUM, self._l1_barray)
         self._l1_barray[0] = self._mode << 5 | self._mode << 2 | 1
@@ -51,7 +90,11 @@ class BME280:
         sleep_time = sleep_time + 2300 * (1 << self._mode) + 575
         sleep_time = sleep_time + 2300 * (1 << self._mode) + 575
         time.sleep_us(sleep_time)
- 
+        self._read_burst(result)
+
+    def _read_burst(self, result):
+        # press, temp and hum registers in one transaction, so all three
+        # come from the same measurement cycle
         self.i2c.readfrom_mem_into(self.address, 0xF7, self._l8_barray)
         readout = self._l8_barray
         raw_press = ((readout[0] << 16) | (readout[1] << 8) | readout[2]) >> 4
@@ -103,6 +146,14 @@ class BME280:
  
         return array("i", (temp, pressure, humidity))
  
+    def read_imperial(self):
+        """
+        Return (temperature_f, humidity, pressure_inhg), converting each
+        fixed-point result to float with a single multiply.
+        """
+        t, p, h = self.read_compensated_data(self._l3_compensated)
+        return (t * _TEMP_F_SCALE + 32, h * _HUM_SCALE, p * _PRESS_INHG_SCALE)
+
     @property
     def values(self):
         t, p, h = self.read_compensated_data()
@@ -0,0 +1,74 @@
+# Dallas/Maxim 1-Wire CRC-8 (polynomial x^8 + x^5 + x^4 + 1, reflected 0x8C)
+#
+# Table-driven: one lookup per byte instead of eight shift/xor steps. On
+# MicroPython ports with the native emitter the @micropython.viper version
+# in crc8_viper.py is used; elsewhere (ports without it, and CPython for
+# host tests and benchmarks) the plain Python loop over the same table is.
+
+
+def _make_table():
+    table = bytearray(256)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x8C if crc & 0x01 else crc >> 1
+        table[i] = crc
+    return bytes(table)
+
+
+_TABLE = _make_table()
+
+
+def crc8_table(data):
+    """CRC-8 of `data` using the lookup table."""
+    table = _TABLE
+    crc = 0
+    for byte in data:
+        crc = table[crc ^ byte]
+    return crc
+
+
+try:
+    # Ports without the native emitter raise SyntaxError compiling it;
+    # CPython has no micropython module (or the simulator's, without viper)
+    from lib.sensors.crc8_viper import crc8_viper as _crc8_viper
+
+    def crc8(data):
+        return _crc8_viper(_TABLE, data, 0, len(data))
+
+    HAVE_VIPER = True
+
+except (ImportError, SyntaxError, AttributeError):
+    crc8 = crc8_table
+    HAVE_VIPER = False
+
+
+def check_blocks(buf, size, count=None):
+    """
+    Validate `count` consecutive `size`-byte blocks of `buf` (e.g. 9-byte
+    scratchpads read back to back) in one pass. A block whose trailing CRC
+    byte matches has a CRC of 0 over the whole block. Returns a list of
+    booleans, one per block.
+    """
+    if count is None:
+        count = len(buf) // size
+    results = []
+    if HAVE_VIPER:
+        for i in range(count):
+            start = i * size
+            results.append(_crc8_viper(_TABLE, buf, start, start + size) == 0)
+        return results
+
+    # Single pass over the buffer without slicing, so nothing is allocated
+    # per block
+    table = _TABLE
+    crc = 0
+    n = 0
+    for i in range(count * size):
+        crc = table[crc ^ buf[i]]
+        n += 1
+        if n == size:
+            results.append(crc == 0)
+            crc = 0
+            n = 0
+    return results
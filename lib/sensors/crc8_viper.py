@@ -0,0 +1,20 @@
+# Viper kernel for lib/sensors/crc8.py
+#
+# Kept in its own module: on ports without the native emitter the compiler
+# rejects @micropython.viper with a SyntaxError when the module is loaded,
+# so crc8.py imports this inside try/except and keeps its Python fallback.
+
+import micropython
+
+
+@micropython.viper
+def crc8_viper(table, data, start: int, end: int) -> int:
+    """CRC-8 of data[start:end] using the 256-byte lookup `table`."""
+    tbl = ptr8(table)
+    buf = ptr8(data)
+    crc = 0
+    i = start
+    while i < end:
+        crc = tbl[crc ^ buf[i]]
+        i += 1
+    return crc
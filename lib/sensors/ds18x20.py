@@ -2,6 +2,7 @@
 # MIT license; Copyright (c) 2016 Damien P. George
 
 from micropython import const
+from lib.sensors.crc8 import check_blocks
 
 _CONVERT = const(0x44)
 _RD_SCRATCHPAD = const(0xbe)
@@ -10,10 +11,14 @@ _COPY_SCRATCHPAD = const(0x48)
 _RD_POWER_SUPPLY = const(0xb4)
 _SKIP_ROM = const(0xcc)
 
+# Maximum conversion time (ms) for each DS18B20/DS1822 resolution in bits
+CONVERSION_MS = {9: 94, 10: 188, 11: 375, 12: 750}
+
 class DS18X20:
     def __init__(self, onewire):
         self.ow = onewire
         self.buf = bytearray(9)
+        self.bulk = bytearray(0)
         self.config = bytearray(3)
 
     def scan(self):
@@ -26,13 +31,36 @@ class DS18X20:
 
     def read_temp(self, rom):
         buf = self.buf
+        self._read_scratchpad(rom, buf)
+        if self.ow.crc8(buf):
+            raise Exception("CRC error")
+        return self._decode(rom, buf)
+
+    def read_temps(self, roms):
+        """
+        Read the scratchpads of several devices back to back and validate
+        their CRCs in one pass. Returns one temperature per ROM, with None
+        for a device whose scratchpad failed the CRC check.
+        """
+        n = len(roms)
+        if len(self.bulk) != 9 * n:
+            self.bulk = bytearray(9 * n)
+        mv = memoryview(self.bulk)
+        for i in range(n):
+            self._read_scratchpad(roms[i], mv[i * 9 : i * 9 + 9])
+        valid = check_blocks(self.bulk, 9, n)
+        return [
+            self._decode(roms[i], mv[i * 9 : i * 9 + 9]) if valid[i] else None
+            for i in range(n)
+        ]
+
+    def _read_scratchpad(self, rom, buf):
         self.ow.reset()
         self.ow.select_rom(rom)
         self.ow.write_byte(_RD_SCRATCHPAD)
         self.ow.readinto(buf)
-        if self.ow.crc8(buf):
-            raise Exception("CRC error")
-        
+
+    def _decode(self, rom, buf):
         # The DS18S20 (0x10) has a different calculation than DS18B20 (0x28)
         # and DS1822 (0x22)
         if rom[0] == 0x10:
@@ -49,7 +77,7 @@ class DS18X20:
             if t & 0x8000:  # sign bit set
                 t = -((t ^ 0xffff) + 1)
             return t / 16
-            
+
     def write_config(self, rom, config):
         self.config[0] = 0  # Th register
         self.config[1] = 0  # Tl register
@@ -59,6 +87,17 @@ class DS18X20:
         self.ow.write_byte(_WR_SCRATCHPAD)
         self.ow.write(self.config)
         
+    def set_resolution(self, rom, bits):
+        """
+        Set the DS18B20/DS1822 resolution (9-12 bits) and return the matching
+        conversion time in ms. The DS18S20 is fixed at 9 bits + extended
+        counts and always needs 750 ms.
+        """
+        if rom[0] == 0x10:
+            return 750
+        self.write_config(rom, (bits - 9) << 5 | 0x1F)
+        return CONVERSION_MS[bits]
+
     def read_power_supply(self, rom):
         """
         Returns True if device has external power supply,
@@ -4,6 +4,7 @@
 import machine
 import time
 from micropython import const
+from lib.sensors.crc8 import crc8
 
 _SEARCH_ROM = const(0xf0)
 _MATCH_ROM = const(0x55)
@@ -132,74 +133,57 @@ class OneWire:
     def scan(self):
         """Scan the 1-Wire bus and return a list of ROM codes for devices found"""
         devices = []
-        self._search_rom(devices, 0)
+        rom = None
+        diff = 65
+        for _ in range(0xff):
+            rom, diff = self._search_rom(rom, diff)
+            if rom:
+                devices.append(bytes(rom))
+            if diff == 0:
+                break
         return devices
 
-    def _search_rom(self, devices, l_bit):
-        """Perform the ROM search algorithm to discover all devices on the bus"""
+    def _search_rom(self, l_rom, diff):
+        """
+        One pass of the ROM search. At each conflict the 1 branch is walked
+        first; `l_rom` is the ROM found by the previous pass and `diff` the
+        bit position (64 down to 1) of its last conflict that still has the
+        0 branch to walk. Returns the ROM found and the position for the next
+        pass, 0 once every branch has been walked.
+        """
         if self.reset() == 0:
-            return
-        
-        rom = bytearray(8)
-        bit_index = 1
-        conflict_index = 0
-        
+            return None, 0
+
         self.write_byte(_SEARCH_ROM)
-        
+        if not l_rom:
+            l_rom = bytearray(8)
+        rom = bytearray(8)
+        next_diff = 0
+        i = 64
         for byte_index in range(8):
             rom_byte = 0
             for bit_index in range(8):
                 # Read the bit and its complement
                 id_bit = self.read_bit()
-                cmp_id_bit = self.read_bit()
-                
-                # Check for no devices on the bus
-                if id_bit == 1 and cmp_id_bit == 1:
-                    return
-                
-                # Path decision based on the bit read
-                if id_bit != cmp_id_bit:
-                    # No conflict, follow the detected bit
-                    dir_bit = id_bit
-                else:
-                    # We have a conflict, use path selector
-                    bit_number = byte_index * 8 + bit_index
-                    if bit_number < l_bit:
-                        # Use the same bit as before
-                        dir_bit = (rom[byte_index] >> bit_index) & 1
-                    elif bit_number == l_bit:
-                        # We're at the decision point, take the 1 branch
-                        dir_bit = 1
-                        conflict_index = bit_number
-                    else:
-                        # Take the 0 branch if not yet at the decision point
-                        dir_bit = 0
-                        conflict_index = bit_number
-                
-                # Set the bit in the ROM byte
-                if dir_bit:
-                    rom_byte |= 1 << bit_index
-                
+                if self.read_bit():
+                    if id_bit:
+                        # No device answered, or an error on the bus
+                        return None, 0
+                elif not id_bit:
+                    # Conflict: devices differ at this bit
+                    prev_bit = (l_rom[byte_index] >> bit_index) & 1
+                    if diff > i or (prev_bit and diff != i):
+                        id_bit = 1
+                        next_diff = i
+
                 # Write the chosen direction
-                self.write_bit(dir_bit)
-            
+                self.write_bit(id_bit)
+                if id_bit:
+                    rom_byte |= 1 << bit_index
+                i -= 1
             rom[byte_index] = rom_byte
-        
-        # We've found a device
-        devices.append(bytes(rom))
-        
-        # Search for more devices down the 0 path if we had conflicts
-        if conflict_index:
-            self._search_rom(devices, conflict_index)
+        return rom, next_diff
 
     def crc8(self, data):
         """Compute CRC-8 of the provided data using the 1-Wire polynomial"""
-        crc = 0
-        for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x01:
-                    crc = (crc >> 1) ^ 0x8C
-                else:
-                    crc >>= 1
-        return crc
\ No newline at end of file
+        return crc8(data)
\ No newline at end of file
@@ -0,0 +1,141 @@
+# RP2040 PIO backend for the 1-Wire driver
+#
+# Reset and bit slots are timed by a PIO state machine instead of Python
+# sleep_us calls with IRQs masked. The CPU only moves one FIFO word per
+# reset or per byte (up to 8 bits), so a 9-byte scratchpad read is 9
+# put/get pairs rather than 72 interpreted bit operations.
+
+from lib.sensors import onewire_timing as timing
+from lib.sensors.onewire import OneWire
+
+_program = None
+
+
+def _build_program():
+    # rp2 only exists on the RP2040 port; import it when a bus is created.
+    # asm_pio swaps out the module globals while assembling, so the delays
+    # are passed in through closure variables.
+    import rp2
+
+    reset_loops = timing.RESET_LOOPS - 1
+    reset_delay = timing.RESET_LOOP_DELAY
+    release_1, release_2, release_3 = timing.RELEASE_DELAYS
+    wait_loops = timing.RESET_WAIT_LOOPS - 1
+    wait_delay = timing.RESET_WAIT_DELAY
+    low_delay = timing.LOW_DELAY
+    sample_delay = timing.SAMPLE_DELAY
+    hold_1, hold_2 = timing.HOLD_DELAYS
+    recovery_delay = timing.RECOVERY_DELAY
+
+    # Command word, shifted out LSB first:
+    #   bit 0     1 = reset, 0 = transfer bits
+    #   bits 1-3  number of bits to transfer minus one
+    #   bits 4-11 data bits, inverted (a 0 keeps the line driven low)
+    # The pin's output latch is 0; the line is driven low by setting its
+    # direction to output and released (pulled up) by setting it to input.
+    @rp2.asm_pio(
+        set_init=rp2.PIO.IN_LOW,
+        out_init=rp2.PIO.IN_LOW,
+        in_shiftdir=rp2.PIO.SHIFT_RIGHT,
+        out_shiftdir=rp2.PIO.SHIFT_RIGHT,
+    )
+    def onewire_prog():
+        wrap_target()
+        label("start")
+        pull(block)
+        out(x, 1)
+        jmp(not_x, "transfer")
+
+        # Reset pulse, then sample the presence pulse
+        set(pindirs, 1)
+        set(y, reset_loops)
+        label("reset_low")
+        jmp(y_dec, "reset_low")[reset_delay]
+        set(pindirs, 0)[release_1]
+        nop()[release_2]
+        nop()[release_3]
+        in_(pins, 1)
+        push(block)
+        set(y, wait_loops)
+        label("reset_wait")
+        jmp(y_dec, "reset_wait")[wait_delay]
+        jmp("start")
+
+        # Bit slots; a read is a write of 1 whose sampled level is kept
+        label("transfer")
+        out(y, 3)
+        label("bit")
+        set(pindirs, 1)[low_delay]
+        out(pindirs, 1)[sample_delay]
+        in_(pins, 1)[hold_1]
+        nop()[hold_2]
+        set(pindirs, 0)[recovery_delay]
+        jmp(y_dec, "bit")
+        push(block)
+        wrap()
+
+    return onewire_prog
+
+
+class OneWirePIO(OneWire):
+    """
+    Drop-in OneWire whose reset and bit/byte transfers run on a PIO state
+    machine. Search, ROM selection and CRC are inherited unchanged.
+    """
+
+    def __init__(self, pin, sm_id=0):
+        global _program
+        import rp2
+
+        if _program is None:
+            _program = _build_program()
+
+        self.pin = pin
+        pin.init(pin.IN, pull=None)
+        self.sm = rp2.StateMachine(
+            sm_id,
+            _program,
+            freq=timing.FREQ,
+            set_base=pin,
+            out_base=pin,
+            in_base=pin,
+        )
+        self.sm.active(1)
+        self.reset()
+
+    def _transfer(self, value, bits=8):
+        self.sm.put(((~value & 0xFF) << 4) | ((bits - 1) << 1))
+        return self.sm.get() >> (32 - bits)
+
+    def reset(self):
+        """
+        Reset the 1-Wire bus
+        Returns True if at least one device responds with a presence pulse
+        """
+        self.sm.put(1)
+        return self.sm.get() >> 31 == 0
+
+    def read_bit(self):
+        return self._transfer(1, 1)
+
+    def write_bit(self, value):
+        self._transfer(value & 1, 1)
+
+    def read_byte(self):
+        return self._transfer(0xFF)
+
+    def write_byte(self, value):
+        self._transfer(value)
+
+    def readinto(self, buf):
+        transfer = self._transfer
+        for i in range(len(buf)):
+            buf[i] = transfer(0xFF)
+
+    def write(self, buf):
+        transfer = self._transfer
+        for b in buf:
+            transfer(b)
+
+    def deinit(self):
+        self.sm.active(0)
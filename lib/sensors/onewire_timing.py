@@ -0,0 +1,73 @@
+# 1-Wire PIO program timing, shared by the PIO driver and host-side tests
+#
+# The PIO program in onewire_pio.py is built from these delays, and
+# timing_model() derives the resulting bus timings from the same numbers,
+# so the slot timing can be checked against the standard-speed limits
+# without hardware.
+
+# State machine clock: one cycle per microsecond
+FREQ = 1_000_000
+
+# Reset: the line is held low for RESET_LOOPS iterations of a jmp with
+# RESET_LOOP_DELAY extra cycles, released, sampled for presence after
+# RELEASE_DELAYS, then left idle for RESET_WAIT_LOOPS more iterations.
+RESET_LOOPS = 16
+RESET_LOOP_DELAY = 29
+RELEASE_DELAYS = (31, 31, 5)
+RESET_WAIT_LOOPS = 16
+RESET_WAIT_DELAY = 25
+
+# Bit slot: drive low, apply the bit, sample, hold, release, recover
+LOW_DELAY = 1
+SAMPLE_DELAY = 6
+HOLD_DELAYS = (31, 19)
+RECOVERY_DELAY = 1
+
+# Standard-speed limits in microseconds (min, max); None means unbounded
+SPEC_US = {
+    "reset_low": (480, None),
+    "presence_sample": (60, 75),
+    "reset_high": (480, None),
+    "low_1": (1, 15),
+    "sample": (None, 15),
+    "low_0": (60, 120),
+    "recovery": (1, None),
+    "slot": (61, None),
+}
+
+
+def timing_model(freq=FREQ):
+    """Return the bus timings (µs) produced by the PIO program at `freq` Hz."""
+    us = 1_000_000 / freq
+
+    # set pindirs low, set y, then the loop; release happens on the next cycle
+    reset_low = 2 + RESET_LOOPS * (1 + RESET_LOOP_DELAY)
+    presence = sum(1 + d for d in RELEASE_DELAYS)
+    # in, push, set y, wait loop, jmp back to pull
+    reset_high = presence + 3 + RESET_WAIT_LOOPS * (1 + RESET_WAIT_DELAY) + 1
+
+    low_1 = 1 + LOW_DELAY
+    sample = low_1 + 1 + SAMPLE_DELAY
+    low_0 = sample + sum(1 + d for d in HOLD_DELAYS)
+    slot = low_0 + 1 + RECOVERY_DELAY + 1  # release, recover, jmp
+
+    return {
+        "reset_low": reset_low * us,
+        "presence_sample": presence * us,
+        "reset_high": reset_high * us,
+        "low_1": low_1 * us,
+        "sample": sample * us,
+        "low_0": low_0 * us,
+        "recovery": (slot - low_0) * us,
+        "slot": slot * us,
+    }
+
+
+def check_timing(model):
+    """Return the names of timings in `model` outside SPEC_US."""
+    violations = []
+    for name, (lo, hi) in SPEC_US.items():
+        value = model[name]
+        if (lo is not None and value < lo) or (hi is not None and value > hi):
+            violations.append(name)
+    return violations
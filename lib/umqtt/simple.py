@@ -12,7 +12,7 @@ class MQTTException(Exception):
 
 class MQTTClient:
     def __init__(self, client_id, server, port=0, user=None, password=None, keepalive=0,
-                 ssl=False, ssl_params={}):
+                 ssl=False, ssl_params={}, max_inflight=8, retry_ms=5000):
         if port == 0:
             port = 8883 if ssl else 1883
         self.client_id = client_id
@@ -30,6 +30,13 @@ class MQTTClient:
         self.lw_msg = None
         self.lw_qos = 0
         self.lw_retain = False
+        self.last_tx = 0  # ticks_ms of the last control packet sent
+        self.ping_pending = False  # PINGREQ sent, PINGRESP not yet seen
+        self._pkt = bytearray(256)  # Reused PUBLISH packet buffer
+        # QoS 1 messages awaiting PUBACK: pid -> [ticks_ms sent, packet]
+        self.inflight = {}
+        self.max_inflight = max_inflight
+        self.retry_ms = retry_ms
 
     def _send_str(self, s):
         self.sock.write(struct.pack("!H", len(s)))
@@ -99,6 +106,7 @@ class MQTTClient:
         assert resp[0] == 0x20 and resp[1] == 0x02
         if resp[3] != 0:
             raise MQTTException(resp[3])
+        self.last_tx = time.ticks_ms()
         return resp[2] & 1
 
     def disconnect(self):
@@ -107,50 +115,91 @@ class MQTTClient:
 
     def ping(self):
         self.sock.write(b"\xc0\0")
+        self.last_tx = time.ticks_ms()
+        self.ping_pending = True
+
+    def _next_pid(self):
+        pid = self.pid
+        while True:
+            pid = pid % 65535 + 1
+            if pid not in self.inflight:
+                self.pid = pid
+                return pid
+
+    def _window_full(self):
+        # Retire any PUBACKs that have already arrived, without waiting
+        while len(self.inflight) >= self.max_inflight:
+            if self.check_msg() is None:
+                return True
+        return False
+
+    def resend_pending(self):
+        """Retransmit QoS 1 messages whose PUBACK is overdue, with DUP set."""
+        now = time.ticks_ms()
+        for entry in self.inflight.values():
+            if time.ticks_diff(now, entry[0]) >= self.retry_ms:
+                entry[1][0] |= 0x08
+                self.sock.write(entry[1])
+                entry[0] = now
+                self.last_tx = now
 
     def publish(self, topic, msg, retain=False, qos=0):
-        pkt = bytearray(b"\x30\0\0\0")
-        pkt[0] |= qos << 1 | retain
-        sz = 2 + len(topic) + len(msg)
+        """
+        Send a PUBLISH and return its packet id (None for QoS 0). A QoS 1
+        message returns False without being sent while max_inflight
+        messages still await their PUBACK; the caller keeps it for later.
+        """
+        if qos == 2:
+            raise MQTTException("QoS 2 not supported")
+        if qos == 1 and len(self.inflight) >= self.max_inflight:
+            if self._window_full():
+                return False
+        if isinstance(topic, str):
+            topic = topic.encode()
+        if isinstance(msg, str):
+            msg = msg.encode()
+        tlen = len(topic)
+        mlen = len(msg)
+        sz = 2 + tlen + mlen
         if qos > 0:
             sz += 2
         assert sz < 2097152
+
+        # Preassemble fixed header, topic, packet id and body so the whole
+        # packet leaves in a single socket write
+        n = sz + 5
+        if len(self._pkt) < n:
+            self._pkt = bytearray(n)
+        pkt = self._pkt
+        pkt[0] = 0x30 | qos << 1 | retain
         i = 1
         while sz > 0x7f:
             pkt[i] = (sz & 0x7f) | 0x80
             sz >>= 7
             i += 1
         pkt[i] = sz
-        self.sock.write(pkt, i + 1)
-        self._send_str(topic)
+        i += 1
+        struct.pack_into("!H", pkt, i, tlen)
+        i += 2
+        pkt[i : i + tlen] = topic
+        i += tlen
         if qos > 0:
-            self.pid += 1
-            pid = self.pid
-            struct.pack_into("!H", pkt, 0, pid)
-            self.sock.write(pkt, 2)
-        self.sock.write(msg)
+            pid = self._next_pid()
+            struct.pack_into("!H", pkt, i, pid)
+            i += 2
+        pkt[i : i + mlen] = msg
+        i += mlen
+        self.sock.write(memoryview(pkt)[:i])
+        self.last_tx = time.ticks_ms()
         if qos == 1:
-            counter = 0
-            while counter < RESPONSE_TIMEOUT:
-                op = self.check_msg()
-                if op == 0x40:
-                    sz = self.sock.read(1)
-                    assert sz == b"\x02"
-                    rcv_pid = self.sock.read(2)
-                    rcv_pid = rcv_pid[0] << 8 | rcv_pid[1]
-                    if pid == rcv_pid:
-                        return
-                counter += 1
-                time.sleep(0.5)
-            raise MQTTException(-1)
-        elif qos == 2:
-            assert 0
+            # Don't wait for the PUBACK; check_msg() retires it later
+            self.inflight[pid] = [self.last_tx, bytearray(memoryview(pkt)[:i])]
+        return pid if qos else None
 
     def subscribe(self, topic, qos=0):
         assert self.cb is not None, "Subscribe callback is not set"
         pkt = bytearray(b"\x82\0\0\0")
-        self.pid += 1
-        struct.pack_into("!BH", pkt, 1, 2 + 2 + len(topic) + 1, self.pid)
+        struct.pack_into("!BH", pkt, 1, 2 + 2 + len(topic) + 1, self._next_pid())
         self.sock.write(pkt)
         self._send_str(topic)
         self.sock.write(qos.to_bytes(1, "little"))
@@ -177,8 +226,15 @@ class MQTTClient:
         if res == b"\xd0":
             sz = self.sock.read(1)[0]
             assert sz == 0
+            self.ping_pending = False
             return b"PINGRESP"
         op = res[0]
+        if op == 0x40:
+            sz = self.sock.read(1)
+            assert sz == b"\x02"
+            rcv_pid = self.sock.read(2)
+            self.inflight.pop(rcv_pid[0] << 8 | rcv_pid[1], None)
+            return op
         if op & 0xf0 != 0x30:
             return op
         sz = self._recv_len()
@@ -205,7 +261,8 @@ class MQTTClient:
 
 
 # New helper function moved into the MQTT library
-def connect_mqtt(client_id, broker, port=1883, user=None, password=None, keepalive=0, ssl=False, ssl_params={}):
+def connect_mqtt(client_id, broker, port=1883, user=None, password=None, keepalive=0, ssl=False, ssl_params={},
+                 max_inflight=8, retry_ms=5000):
     """
     Create and connect an MQTTClient instance.
     
@@ -217,9 +274,12 @@ def connect_mqtt(client_id, broker, port=1883, user=None, password=None, keepali
     :param keepalive: (Optional) Keepalive time.
     :param ssl: (Optional) Whether to use SSL.
     :param ssl_params: (Optional) Dictionary of SSL parameters.
+    :param max_inflight: (Optional) QoS 1 messages allowed to await PUBACK at once.
+    :param retry_ms: (Optional) Time before an unacknowledged QoS 1 message is resent.
     :return: A connected MQTTClient instance or None on failure.
     """
-    client = MQTTClient(client_id, broker, port=port, user=user, password=password, keepalive=keepalive, ssl=ssl, ssl_params=ssl_params)
+    client = MQTTClient(client_id, broker, port=port, user=user, password=password, keepalive=keepalive, ssl=ssl, ssl_params=ssl_params,
+                        max_inflight=max_inflight, retry_ms=retry_ms)
     try:
         client.connect()
         return client
@@ -3,48 +3,40 @@
 import time
 import gc
 
-from utils.payload_formatter import PayloadFormatter
 from connections.mqtt_manager import MQTTManager
 from connections.api_manager import APIManager
+from connections.http_pool import HTTPPool
 from utils.logger import Logger
+from utils.aggregator import Aggregator
+from utils.i2c_bus import I2CBusManager
+from utils.loop_stats import LoopStats
+from utils.offline_queue import KIND_MQTT, KIND_API
 from utils.fan_pwm_controller import FanPWMController
 from utils.fan_step_controller import FanStepController
 
+# Slack added to the longest request period for the HTTP idle timeout
+HTTP_IDLE_MARGIN_MS = 15000
+
 
 def run_loop(state):
     """
     Main application loop: handles sensor reads, config reloads, publishing, and cleanup.
     """
+    if state.get("runtime_mode") == "async":
+        from runtime_async import run_tasks
+
+        return run_tasks(state)
+
     logger: Logger = state["logger"]
     logger.log("Starting main loop...")
     time.sleep_ms(1000)
 
     while True:
         try:
-            gc.collect()
-            now = time.ticks_ms()
-
-            # Update uptime tracker and LED indicator
-            state["uptime"].update()
-            state["led"].update()
-
-            # Possibly reload configuration
-            _maybe_reload_config(state, now)
-
-            # Read all sensors and update state['readings']
-            _read_sensors(state, now)
-
-            # Publish to MQTT and/or API if needed
-            _publish(state, now)
+            _loop_pass(state)
 
             # Pace the loop based on shortest period
-            min_period = min(
-                state["motion_period"],
-                state["switch_period"],
-                state["temp_period"],
-                500,
-            )
-            time.sleep_ms(max(100, min_period // 4))
+            time.sleep_ms(_loop_sleep_ms(state))
 
         except KeyboardInterrupt:
             logger.log("Ctrl+C detected, exiting main loop...")
@@ -57,17 +49,112 @@ def run_loop(state):
     _cleanup(state)
 
 
+def _loop_pass(state):
+    """One pass of the main loop, up to but not including its pacing sleep."""
+    stats = state.get("loop_stats")
+    if stats:
+        stats.begin()
+
+    gc.collect()
+    if stats:
+        stats.mark("gc")
+    now = time.ticks_ms()
+
+    # Update uptime tracker and LED indicator
+    state["uptime"].update()
+    state["led"].update()
+    if stats:
+        stats.mark("status")
+
+    # Possibly reload configuration
+    _maybe_reload_config(state, now)
+    if stats:
+        stats.mark("config")
+
+    # Read all sensors and update state['readings']
+    _read_sensors(state, now)
+    if stats:
+        stats.mark("sensors")
+
+    # Keep the MQTT connection alive between publishes
+    _maintain_connections(state, now)
+    if stats:
+        stats.mark("mqtt")
+
+    # Publish to MQTT and/or API if needed
+    _publish(state, now)
+    if stats:
+        stats.mark("publish")
+        stats.end(_shortest_period_ms(state))
+        _publish_loop_stats(state, now)
+
+
+def _shortest_period_ms(state):
+    period = min(state["motion_period"], state["switch_period"], state["temp_period"])
+    for entry in state["sensors"].schedule:
+        if entry["period"] and entry["period"] < period:
+            period = entry["period"]
+    return period
+
+
+def _loop_sleep_ms(state):
+    sensors = state["sensors"]
+    env_period = state["temp_period"]
+    for entry in sensors.schedule:
+        if entry["period"]:
+            env_period = min(env_period, entry["period"])
+
+    if sensors.edge_capture_enabled:
+        # Edges are latched by IRQ, so motion/switch only need draining
+        # once per pass and the loop no longer has to oversample them.
+        drain = sensors.edge_capture.get("drain_period", 500)
+        return max(100, min(env_period, drain, 500))
+
+    min_period = min(
+        state["motion_period"],
+        state["switch_period"],
+        env_period,
+        500,
+    )
+    return max(100, min_period // 4)
+
+
 def _maybe_reload_config(state, now):
     logger = state["logger"]
+    if not state["config_applied"]:
+        # First pass: bring up MQTT/API/fans from the boot-time config
+        logger.log("Applying configuration…")
+        _apply_config(state, state["config"], now)
+        if state.get("config_from_cache"):
+            # Booted from the flash copy: revalidate it on the next pass
+            state["last_cfg_check"] = time.ticks_add(now, -state["cfg_period"])
+        return
+
     if time.ticks_diff(now, state["last_cfg_check"]) < state["cfg_period"]:
         return
 
+    # Stamp before checking so an unreachable server is retried once per
+    # period rather than on every pass
+    state["last_cfg_check"] = now
+    wifi = state["wifi"]
+    if not wifi.is_connected():
+        try:
+            wifi.ensure_connected()
+        except Exception as e:
+            logger.log(f"WiFi reconnect failed: {e}")
+            return
+
     new_cfg = state["config_loader"].check_config()
     if not new_cfg or new_cfg is state["config"]:
-        state["last_cfg_check"] = now
         return
 
     logger.log("New config detected, reinitializing…")
+    _apply_config(state, new_cfg, now)
+
+
+def _apply_config(state, new_cfg, now):
+    logger = state["logger"]
+    old_cfg = state["config"]
     state["config"] = new_cfg
 
     if state.get("mqtt"):
@@ -103,7 +190,29 @@ def _maybe_reload_config(state, now):
         }
     )
 
+    # Keep pooled HTTP connections open across the longest gap between
+    # requests (heartbeat posts, config polls) so each one reuses a socket
+    HTTPPool.get_instance().idle_timeout_ms = new_cfg.get(
+        "http_idle_timeout_ms",
+        max(state["heartbeat_period"], state["cfg_period"]) + HTTP_IDLE_MARGIN_MS,
+    )
+
+    # A changed aggregation or loop_stats section starts a new interval with
+    # the new settings; an unchanged one keeps the interval in progress
+    agg_cfg = new_cfg.get("aggregation", {})
+    if agg_cfg != old_cfg.get("aggregation", {}):
+        state["aggregator"] = Aggregator() if agg_cfg.get("enabled", False) else None
+    stats_cfg = new_cfg.get("loop_stats", {})
+    if stats_cfg != old_cfg.get("loop_stats", {}):
+        state["loop_stats"] = None
+        if stats_cfg.get("enabled", False):
+            state["loop_stats"] = LoopStats(stats_cfg.get("publish_period", 300000))
+
     state["mqtt"] = MQTTManager(state["device_id"], state["mqtt_cfg"])
+    queue = (state.get("queues") or {}).get(KIND_MQTT)
+    if queue:
+        # Batched readings whose flush fails move to flash, not just RAM
+        state["mqtt"].spill = lambda payload: queue.put(KIND_MQTT, payload)
     if state["api_enabled"]:
         try:
             state["api"] = APIManager(state["device_id"], state["api_cfg"])
@@ -131,68 +240,141 @@ def _maybe_reload_config(state, now):
 
     state["last_publish"] = now - state["heartbeat_period"] + 2000
     state["last_cfg_check"] = now
+    state["config_applied"] = True
 
 
 def _read_sensors(state, now):
-    readings = state["readings"]
-
-    # Motion sensor
-    if time.ticks_diff(now, state["last_motion_check"]) >= state["motion_period"]:
-        if state["device_enabled"]:
-            m = state["sensors"].read_motion()
-            if m:
-                readings["motion"] = m["motion"]
-                state["motion_event"] = m["motion_detected"]
+    edge_capture = state["sensors"].edge_capture_enabled
+
+    # Motion sensor (drained every pass when edges are captured by IRQ)
+    if (
+        edge_capture
+        or time.ticks_diff(now, state["last_motion_check"]) >= state["motion_period"]
+    ):
+        _read_motion(state)
         state["last_motion_check"] = now
 
     # Switch sensor
-    if time.ticks_diff(now, state["last_switch_check"]) >= state["switch_period"]:
-        if state["device_enabled"]:
-            s = state["sensors"].read_switch()
-            if s:
-                readings["switch"] = s["switch"]
-                state["switch_event"] = s["switch_changed"]
+    if (
+        edge_capture
+        or time.ticks_diff(now, state["last_switch_check"]) >= state["switch_period"]
+    ):
+        _read_switch(state)
         state["last_switch_check"] = now
 
-    # Temperature sensor (and fan + OLED updates)
-    if time.ticks_diff(now, state["last_temp_check"]) >= state["temp_period"]:
-        if state["device_enabled"]:
-            t = state["sensors"].read_temperature()
-            if t:
-                readings.update(t)
-                # PWM fan
-                if state.get("fan_pwm") and t.get("temperature_c") is not None:
-                    readings["fan_pwm_duty"] = state["fan_pwm"].update(
-                        t["temperature_c"]
-                    )
-                # Step fan
-                if state.get("fan_step") and t.get("temperature_c") is not None:
-                    readings["fan_step_active_fans"] = state["fan_step"].update(
-                        t["temperature_c"]
-                    )
-                # OLED display
-                if state["oled"].is_initialized():
-                    tf = t["temperature_f"]
-                    info = ""
-                    if state["fan_pwm"] and state["fan_pwm"].enabled:
-                        info = f" Fan:{readings['fan_pwm_duty']}%"
-                    elif state["fan_step"] and state["fan_step"].enabled:
-                        info = f" Fans:{readings['fan_step_active_fans']}"
-                    state["oled"].bigline1(f"T:{tf:.1f}F{info}")
-                    state["oled"].bigline2(f"T:{(tf-32)*5/9:.1f}C")
-        state["last_temp_check"] = now
+    # Environmental sensors, each on its own period
+    for entry in state["sensors"].schedule:
+        _poll_environment(state, entry, now)
+
+
+def _poll_environment(state, entry, now):
+    # Sensors with a slow conversion (DS18B20) are started here and collected
+    # on a later pass once their deadline has passed, so the loop never
+    # sleeps on them.
+    ready_at = entry["ready_at"]
+    if ready_at is not None:
+        if time.ticks_diff(now, ready_at) >= 0:
+            entry["ready_at"] = None
+            _read_temperature(state, entry)
+        return
+
+    period = entry["period"] or state["temp_period"]
+    if entry["last_check"] is None or time.ticks_diff(now, entry["last_check"]) >= period:
+        entry["last_check"] = now
+        wait = _start_temperature(state, entry)
+        if wait:
+            entry["ready_at"] = time.ticks_add(now, wait)
+        else:
+            _read_temperature(state, entry)
+
+
+def _read_motion(state):
+    if not state["device_enabled"]:
+        return
+    m = state["sensors"].read_motion()
+    if m:
+        state["readings"]["motion"] = m["motion"]
+        state["motion_event"] = m["motion_detected"]
+
+
+def _read_switch(state):
+    if not state["device_enabled"]:
+        return
+    s = state["sensors"].read_switch()
+    if s:
+        state["readings"]["switch"] = s["switch"]
+        state["switch_event"] = s["switch_changed"]
+
+
+def _start_temperature(state, entry):
+    if not state["device_enabled"]:
+        return 0
+    return state["sensors"].start_temperature(entry["sensor"])
+
+
+def _read_temperature(state, entry):
+    if not state["device_enabled"]:
+        return
+    readings = state["readings"]
+    sensor = entry["sensor"]
+    t = state["sensors"].read_temperature(sensor)
+    if not t:
+        return
+
+    # Every sensor is reported under its own name
+    values = {}
+    for field in ("temperature_f", "humidity", "pressure_inhg"):
+        if t[field] is not None:
+            values[field] = t[field]
+    if "probes" in t:
+        values["probes"] = t["probes"]
+        readings["probes"] = t["probes"]
+    readings["sensors"][entry["key"]] = values
+    aggregator = state.get("aggregator")
+    if aggregator:
+        aggregator.add_values(entry["key"], values)
+
+    # The primary sensor also drives the flat readings, fans and OLED
+    if sensor is not state["sensors"].temp_sensor:
+        return
+    state["last_temp_check"] = entry["last_check"]
+    readings.update(t)
+    # PWM fan
+    if state.get("fan_pwm") and t.get("temperature_c") is not None:
+        readings["fan_pwm_duty"] = state["fan_pwm"].update(t["temperature_c"])
+        if aggregator:
+            aggregator.add("fan", "pwm_duty", readings["fan_pwm_duty"])
+    # Step fan
+    if state.get("fan_step") and t.get("temperature_c") is not None:
+        readings["fan_step_active_fans"] = state["fan_step"].update(
+            t["temperature_c"]
+        )
+    # OLED display
+    if state["oled"].is_initialized() and t["temperature_f"] is not None:
+        tf = t["temperature_f"]
+        info = ""
+        if state["fan_pwm"] and state["fan_pwm"].enabled:
+            info = f" Fan:{readings['fan_pwm_duty']}%"
+        elif state["fan_step"] and state["fan_step"].enabled:
+            info = f" Fans:{readings['fan_step_active_fans']}"
+        state["oled"].bigline1(f"T:{tf:.1f}F{info}")
+        state["oled"].bigline2(f"T:{(tf-32)*5/9:.1f}C")
+
+
+def _maintain_connections(state, now):
+    if state["mqtt_enabled"] and state.get("mqtt"):
+        mqtt = state["mqtt"]
+        was_connected = mqtt.client is not None
+        if mqtt.maintain() and not was_connected:
+            # Broker is back: forward queued records without waiting for
+            # the next live publish
+            _drain_queue(state, KIND_MQTT)
 
 
 def _publish(state, now):
     logger = state["logger"]
     readings = state["readings"]
 
-    # Inject new data elements
-    readings["wifi_rssi"] = state["wifi"].get_rssi()
-    readings["uptime_seconds"] = state["uptime"].get_uptime_seconds()
-    readings["fan_pwm"] = readings.get("fan_pwm_duty", 0)
-    readings["fans_active_level"] = readings.get("fan_step_active_fans", 0)
-
     # Determine triggers
     since_pub = time.ticks_diff(now, state["last_publish"])
     since_motion = time.ticks_diff(now, state["last_motion_pub"])
@@ -205,6 +387,12 @@ def _publish(state, now):
     if not state["device_enabled"] or not (trig_motion or trig_switch or trig_heart):
         return
 
+    # Inject new data elements
+    readings["wifi_rssi"] = state["wifi"].get_rssi()
+    readings["uptime_seconds"] = state["uptime"].get_uptime_seconds()
+    readings["fan_pwm"] = readings.get("fan_pwm_duty", 0)
+    readings["fans_active_level"] = readings.get("fan_step_active_fans", 0)
+
     # Choose event type
     event_type = "heartbeat"
     if trig_motion:
@@ -215,25 +403,98 @@ def _publish(state, now):
     # Add formatted uptime string
     readings["uptime"] = state["uptime"].get_uptime_string()
 
-    # Format and log payload
-    payload = PayloadFormatter.mqtt_payload(state["device_id"], readings, event_type)
-    logger.log(f"Payload: {payload}")
+    # Summary of every sample taken since the previous publish
+    aggregator = state.get("aggregator")
+    if aggregator:
+        readings["stats"] = aggregator.snapshot()
 
-    # MQTT publish
+    # Both bodies in one pass, into the encoder's reusable buffers
+    payload, api_payload = state["encoder"].encode(
+        state["device_id"], readings, event_type
+    )
+    logger.log(f"Payload: {event_type}, {len(payload)} bytes")
+
+    # MQTT publish (queued on flash if it fails; a delivery means the broker
+    # is reachable again, so forward its backlog)
+    queues = state.get("queues") or {}
+    delivered = False
     if state["mqtt_enabled"] and state.get("mqtt"):
-        state["mqtt"].publish(payload)
+        if state["mqtt"].publish(payload):
+            delivered = True
+            _drain_queue(state, KIND_MQTT)
+        elif KIND_MQTT in queues:
+            queues[KIND_MQTT].put(KIND_MQTT, payload)
 
     # API publish
     if state["api_enabled"] and state.get("api"):
-        api_payload = PayloadFormatter.api_payload(
-            state["device_id"], readings, event_type
-        )
-        state["api"].publish(api_payload)
+        if state["api"].publish(api_payload):
+            delivered = True
+            _drain_queue(state, KIND_API)
+        elif KIND_API in queues:
+            queues[KIND_API].put(KIND_API, api_payload)
 
-    # Update timestamps
+    # Update timestamps and consume the events that triggered this publish
     state["last_publish"] = now
+    if aggregator and trig_heart and delivered:
+        # Stats span one heartbeat interval: event publishes in between carry
+        # the interval so far, and an undelivered heartbeat keeps its samples
+        aggregator.reset()
+    state["switch_event"] = False
     if trig_motion:
         state["last_motion_pub"] = now
+        state["motion_event"] = False
+
+
+def _publish_loop_stats(state, now):
+    stats = state["loop_stats"]
+    if not stats.due(now):
+        return
+    state["logger"].log(
+        f"Loop: {stats.loop.count} passes, worst {stats.loop.max}us, "
+        f"{stats.overruns} overruns"
+    )
+    if state["mqtt_enabled"] and state.get("mqtt"):
+        state["mqtt"].publish_stats(
+            stats.payload(
+                state["device_id"], now, I2CBusManager.get_instance().stats()
+            )
+        )
+    stats.reset(now)
+
+
+def _drain_queue(state, kind):
+    queue = (state.get("queues") or {}).get(kind)
+    if not queue or not len(queue):
+        return
+
+    mqtt = state.get("mqtt") if state["mqtt_enabled"] else None
+    batching = kind == KIND_MQTT and mqtt and mqtt.batch_enabled
+    # Drained records that sit in a batch whose flush fails were already
+    # taken from the head; they go back there rather than behind newer ones
+    requeued = []
+    if batching and not mqtt.flush():
+        return  # Live readings spilled behind the backlog; broker is down
+
+    def send(kind, payload):
+        if kind == KIND_MQTT:
+            if not mqtt:
+                return True  # Transport disabled since queued; drop it
+            return mqtt.publish(payload, spill=requeued.append)
+        if kind == KIND_API:
+            if not (state["api_enabled"] and state.get("api")):
+                return True
+            return state["api"].publish(payload)
+        return True
+
+    # Stops at the first failed send
+    sent = queue.drain(send, state["queue_drain_batch"])
+    if batching:
+        # Nothing drained waits in RAM for the batch window
+        mqtt.flush(spill=requeued.append)
+    if requeued:
+        queue.requeue(len(requeued))
+        sent -= len(requeued)
+    state["logger"].log(f"Offline queue: forwarded {sent}, {len(queue)} left")
 
 
 def _cleanup(state):
@@ -0,0 +1,155 @@
+# runtime_async.py
+
+import time
+import gc
+import uasyncio as asyncio
+
+from runtime import (
+    _maybe_reload_config,
+    _read_motion,
+    _read_switch,
+    _start_temperature,
+    _read_temperature,
+    _maintain_connections,
+    _publish,
+    _cleanup,
+)
+from utils.logger import Logger
+
+# Fixed periods for housekeeping tasks that have no config setting
+CONFIG_POLL_MS = 1000
+PUBLISH_POLL_MS = 100
+MQTT_MAINTAIN_MS = 1000
+UPTIME_PERIOD_MS = 1000
+GC_PERIOD_MS = 1000
+
+
+def run_tasks(state):
+    """
+    Task-based application runtime: every job runs as its own uasyncio task
+    with its own period, so a slow publish or sensor read only delays itself.
+    """
+    logger: Logger = state["logger"]
+    logger.log("Starting task scheduler...")
+    time.sleep_ms(1000)
+
+    try:
+        asyncio.run(_main(state))
+    except KeyboardInterrupt:
+        logger.log("Ctrl+C detected, stopping tasks...")
+    finally:
+        asyncio.new_event_loop()
+
+    _cleanup(state)
+
+
+async def _main(state):
+    sensors = state["sensors"]
+    if sensors.edge_capture_enabled:
+        # Motion/switch are drained as soon as an IRQ latches an edge
+        flag = asyncio.ThreadSafeFlag()
+        sensors.set_edge_flag(flag)
+        edge_tasks = [asyncio.create_task(_edge_task(state, flag))]
+    else:
+        edge_tasks = [
+            asyncio.create_task(_every(state, "motion", _motion_job, "motion_period")),
+            asyncio.create_task(_every(state, "switch", _switch_job, "switch_period")),
+        ]
+
+    # One task per environmental sensor, each on its own period
+    env_tasks = [
+        asyncio.create_task(_temp_task(state, entry)) for entry in sensors.schedule
+    ]
+
+    tasks = edge_tasks + env_tasks + [
+        asyncio.create_task(_every(state, "config", _reload_job, CONFIG_POLL_MS)),
+        asyncio.create_task(_every(state, "publish", _publish, PUBLISH_POLL_MS)),
+        asyncio.create_task(
+            _every(state, "mqtt", _maintain_connections, MQTT_MAINTAIN_MS)
+        ),
+        asyncio.create_task(_every(state, "uptime", _uptime_job, UPTIME_PERIOD_MS)),
+        asyncio.create_task(_every(state, "gc", _gc_job, GC_PERIOD_MS)),
+        asyncio.create_task(_led_task(state)),
+    ]
+    # The tasks never finish on their own; this keeps the scheduler running
+    await tasks[0]
+
+
+async def _every(state, name, job, period):
+    """
+    Run job(state, now) forever, sleeping so that each run starts one period
+    after the previous one. `period` is either milliseconds or a state key,
+    which is looked up every cycle so config reloads take effect immediately.
+    """
+    logger = state["logger"]
+    while True:
+        start = time.ticks_ms()
+        try:
+            job(state, start)
+        except Exception as e:
+            logger.log(f"Error in {name} task: {e}")
+
+        wait = state[period] if isinstance(period, str) else period
+        elapsed = time.ticks_diff(time.ticks_ms(), start)
+        await asyncio.sleep_ms(max(0, wait - elapsed))
+
+
+async def _edge_task(state, flag):
+    logger = state["logger"]
+    while True:
+        await flag.wait()
+        now = time.ticks_ms()
+        try:
+            _motion_job(state, now)
+            _switch_job(state, now)
+        except Exception as e:
+            logger.log(f"Error in edge task: {e}")
+
+
+async def _led_task(state):
+    led = state["led"]
+    while True:
+        led.update()
+        await asyncio.sleep_ms(led.interval_ms)
+
+
+async def _temp_task(state, entry):
+    # Like _every, but awaits the sensor's conversion time between starting
+    # a measurement and collecting it instead of blocking the scheduler
+    logger = state["logger"]
+    while True:
+        start = time.ticks_ms()
+        entry["last_check"] = start
+        try:
+            wait = _start_temperature(state, entry)
+            if wait:
+                await asyncio.sleep_ms(wait)
+            _read_temperature(state, entry)
+        except Exception as e:
+            logger.log(f"Error in {entry['key']} task: {e}")
+
+        period = entry["period"] or state["temp_period"]
+        elapsed = time.ticks_diff(time.ticks_ms(), start)
+        await asyncio.sleep_ms(max(0, period - elapsed))
+
+
+def _reload_job(state, now):
+    _maybe_reload_config(state, now)
+
+
+def _motion_job(state, now):
+    _read_motion(state)
+    state["last_motion_check"] = now
+
+
+def _switch_job(state, now):
+    _read_switch(state)
+    state["last_switch_check"] = now
+
+
+def _uptime_job(state, now):
+    state["uptime"].update()
+
+
+def _gc_job(state, now):
+    gc.collect()
@@ -2,12 +2,17 @@
 
 import machine
 import time
-import onewire
-import ds18x20
+import ubinascii
+from lib.sensors import onewire
+from lib.sensors import ds18x20
+from sensors.sensor_driver import SensorDriver
 
 
-class DS18B20Sensor:
-    def __init__(self, config):
+class DS18B20Sensor(SensorDriver):
+    NAME = "DS18B20"
+    BUS = "onewire"
+
+    def __init__(self, config, options=None):
         # Get the pin number directly from the configuration structure
         # This matches the pattern used in MotionSensor class
         pin_num = config.get("pin")
@@ -15,37 +20,122 @@ class DS18B20Sensor:
         if pin_num is None:
             raise ValueError("Missing onewire data pin configuration")
 
-        # Initialize the 1-Wire bus on the specified pin
+        options = options or {}
+        resolution = options.get("resolution", 12)
+        if resolution not in ds18x20.CONVERSION_MS:
+            raise ValueError(f"Invalid DS18B20 resolution: {resolution}")
+
+        # Initialize the 1-Wire bus on the specified pin; the "pio" backend
+        # times the bus with an RP2040 state machine instead of bit-banging
         self.data_pin = machine.Pin(pin_num)
-        self.onewire_bus = onewire.OneWire(self.data_pin)
+        if options.get("backend", "bitbang") == "pio":
+            from lib.sensors.onewire_pio import OneWirePIO
+
+            self.onewire_bus = OneWirePIO(self.data_pin, options.get("pio_sm", 0))
+        else:
+            self.onewire_bus = onewire.OneWire(self.data_pin)
 
         # Initialize the DS18X20 temperature sensor
         self.sensor = ds18x20.DS18X20(self.onewire_bus)
 
-        # Scan for devices on the bus
-        self.roms = self.sensor.scan()
+        # The ROM list is cached and refreshed every rescan_ms so probes can be
+        # hot-plugged without paying for a bus search on every read
+        self.resolution = resolution
+        self.rescan_ms = options.get("rescan_ms", 300000)
+        self.roms = []
+        self.rom_ids = []
+        self.conversion_ms = ds18x20.CONVERSION_MS[resolution]
+        self.ready_at = None
+        self._scan()
         if not self.roms:
             raise RuntimeError("No DS18B20 sensors found on 1-Wire bus")
 
-        print(f"Found {len(self.roms)} DS18B20 sensors")
+        print(
+            f"Found {len(self.roms)} DS18B20 sensors ({resolution}-bit, {self.conversion_ms}ms)"
+        )
 
-    def read_values(self):
-        try:
-            # Start temperature conversion on all sensors
-            self.sensor.convert_temp()
+    def _scan(self):
+        roms = self.sensor.scan()
+        if roms != self.roms:
+            # Lower resolutions convert faster (94/188/375/750 ms for 9-12
+            # bits); one bus-wide conversion takes as long as the slowest probe
+            conversion_ms = ds18x20.CONVERSION_MS[self.resolution]
+            for rom in roms:
+                conversion_ms = max(
+                    conversion_ms, self.sensor.set_resolution(rom, self.resolution)
+                )
+            if self.roms:
+                print(f"DS18B20 probes changed: {len(self.roms)} -> {len(roms)}")
+            self.roms = roms
+            self.rom_ids = [ubinascii.hexlify(rom).decode() for rom in roms]
+            self.conversion_ms = conversion_ms
+        self.last_scan = time.ticks_ms()
+
+    def start(self):
+        return self.start_conversion()
 
-            # DS18B20 requires at least 750ms for conversion
-            time.sleep_ms(750)
+    def start_conversion(self):
+        """
+        Start a conversion on every probe at once (one SKIP_ROM broadcast) and
+        return immediately. Returns the number of ms to wait before collect()
+        has fresh results.
+        """
+        if time.ticks_diff(time.ticks_ms(), self.last_scan) >= self.rescan_ms:
+            self._scan()
+        self.sensor.convert_temp()
+        self.ready_at = time.ticks_add(time.ticks_ms(), self.conversion_ms)
+        return self.conversion_ms
 
-            # Read temperature from the first sensor found (in Celsius)
-            # For multiple sensors, you could return a list of temperatures
-            temperature_c = self.sensor.read_temp(self.roms[0])
+    def is_ready(self):
+        return (
+            self.ready_at is not None
+            and time.ticks_diff(time.ticks_ms(), self.ready_at) >= 0
+        )
 
-            # Convert to Fahrenheit
-            temperature_f = temperature_c * 9 / 5 + 32
+    def collect(self):
+        """
+        Read every probe's result of the last start_conversion(). Returns a
+        list of {"rom": hex id, "temperature_f": value or None} in ROM order.
+        """
+        self.ready_at = None
+        try:
+            temps = self.sensor.read_temps(self.roms)
+        except Exception as e:
+            print(f"Error reading DS18B20 sensors: {e}")
+            temps = [None] * len(self.roms)
+
+        probes = []
+        for rom_id, temperature_c in zip(self.rom_ids, temps):
+            if temperature_c is None:
+                print(f"DS18B20 {rom_id}: CRC error")
+                temperature_f = None
+            else:
+                temperature_f = temperature_c * 9 / 5 + 32
+            probes.append({"rom": rom_id, "temperature_f": temperature_f})
+        return probes
 
-            return temperature_f
+    @staticmethod
+    def first_temperature(probes):
+        for probe in probes:
+            if probe["temperature_f"] is not None:
+                return probe["temperature_f"]
+        return None
 
+    def read_values(self):
+        """Blocking read for callers that don't schedule the two phases."""
+        try:
+            time.sleep_ms(self.start_conversion())
         except Exception as e:
             print(f"Error reading DS18B20 sensor: {e}")
             return None
+        return self.first_temperature(self.collect())
+
+    def read_into(self, readings):
+        if self.ready_at is None:
+            # start() failed or was skipped: start now and let the next
+            # scheduled pass collect, rather than sleep through the conversion
+            self.start_conversion()
+            return False
+        probes = self.collect()
+        readings["temperature_f"] = self.first_temperature(probes)
+        readings["probes"] = probes
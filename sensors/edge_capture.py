@@ -0,0 +1,73 @@
+# edge_capture.py
+
+import machine
+import micropython
+import time
+
+# Lets the IRQ handler report an exception instead of failing silently
+micropython.alloc_emergency_exception_buf(100)
+
+
+class EdgeCapture:
+    """
+    Captures debounced edges on a pin from a hard IRQ into a preallocated
+    ring buffer. The handler only stores the new level into a bytearray, so
+    it never allocates; drain() hands the captured edges to the main loop.
+    """
+
+    def __init__(self, pin, size=16, debounce_ms=50, flag=None):
+        self.pin = pin
+        self.size = size
+        self.debounce_ms = debounce_ms
+        self.flag = flag  # Optional uasyncio.ThreadSafeFlag set on each edge
+
+        self.levels = bytearray(size)
+        self.head = 0  # Next slot to write
+        self.count = 0  # Edges waiting to be drained
+        self.overflows = 0  # Oldest edges dropped because the ring was full
+
+        # The raw level follows every transition, including ones the
+        # debounce window drops, so a pulse shorter than the window does not
+        # hide the next real edge.
+        self.raw_level = pin.value()
+        self.last_edge = time.ticks_ms()
+
+        pin.irq(
+            handler=self._irq,
+            trigger=machine.Pin.IRQ_RISING | machine.Pin.IRQ_FALLING,
+            hard=True,
+        )
+
+    def _irq(self, pin):
+        now = time.ticks_ms()
+        level = pin.value()
+        if level == self.raw_level:
+            return
+        self.raw_level = level
+        if time.ticks_diff(now, self.last_edge) < self.debounce_ms:
+            return
+        self.last_edge = now
+
+        i = self.head
+        self.levels[i] = level
+        self.head = (i + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+        else:
+            self.overflows += 1
+
+        if self.flag is not None:
+            self.flag.set()
+
+    def drain(self):
+        """Return the levels of the captured edges, oldest first."""
+        irq_state = machine.disable_irq()
+        count = self.count
+        start = (self.head - count) % self.size
+        edges = [self.levels[(start + i) % self.size] for i in range(count)]
+        self.count = 0
+        machine.enable_irq(irq_state)
+        return edges
+
+    def deinit(self):
+        self.pin.irq(handler=None)
@@ -1,8 +1,12 @@
 import machine
 import time
+from sensors.sensor_driver import SensorDriver
 
-class InternalTempSensor:
-    def __init__(self, config=None):
+class InternalTempSensor(SensorDriver):
+    NAME = "INTERNAL"
+    BUS = "internal"
+
+    def __init__(self, config=None, options=None):
         self.sensor = machine.ADC(4)
         self.calibration_offset = -12.0  # Adjust based on actual comparison
 
@@ -17,3 +21,6 @@ class InternalTempSensor:
         temperature_c = 27 - (voltage - 0.706) / 0.001721
         temperature_f = temperature_c * 9 / 5 + 32 + self.calibration_offset
         return temperature_f
+
+    def read_into(self, readings):
+        readings["temperature_f"] = self.read_values()
@@ -0,0 +1,76 @@
+# registry.py
+
+from utils.i2c_bus import I2CBusManager
+from sensors.bme280_sensor import BME280Sensor
+from sensors.sht31d_sensor import SHT31DSensor
+from sensors.tmp117_sensor import TMP117Sensor
+from sensors.ds18b20_sensor import DS18B20Sensor
+from sensors.internal_temp_sensor import InternalTempSensor
+
+# Environmental sensor drivers in detection priority order. A new driver
+# only needs NAME/BUS/I2C_ADDRESSES and read_into(); I2C drivers whose
+# addresses are absent from the shared scan are skipped without being
+# constructed, so the list can grow without lengthening boot.
+DRIVERS = [
+    BME280Sensor,
+    SHT31DSensor,
+    TMP117Sensor,
+    DS18B20Sensor,
+    InternalTempSensor,
+]
+
+
+def _create(driver, i2c, devices, i2c_pins, onewire_pin, sensor_options):
+    options = sensor_options.get(driver.NAME.lower(), {})
+    if driver.BUS == "i2c":
+        if i2c is None:
+            return None
+        error = None
+        for address in driver.I2C_ADDRESSES:
+            if address in devices:
+                try:
+                    return driver(i2c_pins, options, i2c=i2c, address=address)
+                except Exception as e:
+                    error = e  # Another part at this address; try the next
+        if error is not None:
+            raise error
+        return None
+    if driver.BUS == "onewire":
+        return driver(onewire_pin, options)
+    return driver(None, options)
+
+
+def detect(i2c_pins, onewire_pin, sensor_options=None):
+    """
+    Return every sensor whose driver finds its hardware, in DRIVERS order
+    (so the first one is the preferred primary sensor). The I2C bus comes
+    from I2CBusManager and is scanned once; every I2C driver shares it.
+    The internal sensor is only used when nothing else is found.
+    """
+    sensor_options = sensor_options or {}
+    i2c = None
+    devices = ()
+    try:
+        buses = I2CBusManager.get_instance()
+        scl, sda = i2c_pins.get("i2c_scl"), i2c_pins.get("i2c_sda")
+        i2c = buses.get(scl, sda)
+        devices = buses.scan(scl, sda)
+        print(f"I2C devices: {[hex(addr) for addr in devices]}")
+    except Exception as e:
+        print(f"I2C bus unavailable: {e}")
+
+    found = []
+    for driver in DRIVERS:
+        if driver.BUS == "internal" and found:
+            continue
+        try:
+            sensor = _create(
+                driver, i2c, devices, i2c_pins, onewire_pin, sensor_options
+            )
+        except Exception as e:
+            print(f"{driver.NAME} not found: {e}")
+            continue
+        if sensor is not None:
+            print(f"Using {driver.NAME} sensor.")
+            found.append(sensor)
+    return found
@@ -0,0 +1,25 @@
+# sensor_driver.py
+
+
+class SensorDriver:
+    """
+    Base for the environmental sensor drivers listed in sensors.registry.
+
+    NAME is reported as temp_sensor_type (and, lower-cased, is the key of
+    the driver's sensor_options section). BUS is "i2c", "onewire" or
+    "internal"; I2C drivers list the addresses they answer on so detection
+    can work from a single shared bus scan.
+
+    Every driver also implements read_into(readings), storing its values
+    (temperature_f, and humidity/pressure_inhg where it has them) in the
+    `readings` dict; start() is optional. read_into() returns False when it
+    has no new values yet, and the previous readings are kept.
+    """
+
+    NAME = "UNKNOWN"
+    BUS = "internal"
+    I2C_ADDRESSES = ()
+
+    def start(self):
+        """Begin a slow measurement; return ms to wait before read_into (0 = none)."""
+        return 0
@@ -1,12 +1,10 @@
 # sensor_manager.py
 
-from sensors.bme280_sensor import BME280Sensor
-from sensors.sht31d_sensor import SHT31DSensor
-from sensors.tmp117_sensor import TMP117Sensor
-from sensors.ds18b20_sensor import DS18B20Sensor
+from sensors import registry
 from sensors.internal_temp_sensor import InternalTempSensor
 from sensors.motion_sensor import MotionSensor
 from sensors.switch_sensor import SwitchSensor
+from utils.i2c_bus import I2CBusManager
 
 
 class SensorManager:
@@ -16,14 +14,21 @@ class SensorManager:
         motion_sensor_pin,
         switch_sensor_pin,
         onewire_ds18b20_pin,
+        sensor_options=None,
     ):
         self.i2c_temp_sensor_pins = i2c_temp_sensor_pins
         self.motion_sensor_pin = motion_sensor_pin
         self.switch_sensor_pin = switch_sensor_pin
         # The missing line - store onewire_ds18b20_pin as an instance attribute
         self.onewire_ds18b20_pin = onewire_ds18b20_pin
+        self.sensor_options = sensor_options or {}
+
+        # IRQ edge capture for motion/switch pins instead of level polling
+        self.edge_capture = self.sensor_options.get("edge_capture", {})
+        self.edge_capture_enabled = self.edge_capture.get("enabled", False)
 
         self.temp_sensor = None
+        self.schedule = []
         self.motion_sensor = None
         self.switch_sensor = None
 
@@ -39,6 +44,13 @@ class SensorManager:
             self.motion_sensor = MotionSensor(self.motion_sensor_pin)
             self.switch_sensor = SwitchSensor(self.switch_sensor_pin)
 
+            if self.edge_capture_enabled:
+                size = self.edge_capture.get("buffer_size", 16)
+                debounce_ms = self.edge_capture.get("debounce_ms", 50)
+                self.motion_sensor.enable_edge_capture(size, debounce_ms)
+                self.switch_sensor.enable_edge_capture(size, debounce_ms)
+                print(f"Edge capture enabled (debounce {debounce_ms}ms)")
+
             # Get initial states
             self.previous_motion_state = self.motion_sensor.read()
             self.previous_switch_state = self.switch_sensor.read()
@@ -53,39 +65,47 @@ class SensorManager:
             return False
 
     def _initialize_temp_sensor(self):
-        try:
-            self.temp_sensor = BME280Sensor(self.i2c_temp_sensor_pins)
-            print("Using BME280 sensor.")
-            return
-        except Exception as e1:
-            print(f"BME280 not found: {e1}")
-
-        try:
-            self.temp_sensor = SHT31DSensor(self.i2c_temp_sensor_pins)
-            print("Using SHT31D sensor.")
-            return
-        except Exception as e2:
-            print(f"SHT31D not found: {e2}")
-
-        try:
-            self.temp_sensor = TMP117Sensor(self.i2c_temp_sensor_pins)
-            print("Using TMP117 sensor.")
-            return
-        except Exception as e3:
-            print(f"TMP117 not found: {e3}")
+        sensors = registry.detect(
+            self.i2c_temp_sensor_pins, self.onewire_ds18b20_pin, self.sensor_options
+        )
+        if not sensors:
+            # Fallback to internal sensor
+            sensors = [InternalTempSensor()]
+            print("Using internal temperature sensor.")
+
+        # The first detected sensor (by registry priority) feeds the flat
+        # temperature/humidity/pressure readings; all of them are reported
+        # per sensor. Each runs on its own period (sensor_options.<name>.
+        # period_ms), falling back to temperature_check_period when unset.
+        self.temp_sensor = sensors[0]
+        self.schedule = []
+        for sensor in sensors:
+            options = self.sensor_options.get(sensor.NAME.lower(), {})
+            self.schedule.append(
+                {
+                    "sensor": sensor,
+                    "key": sensor.NAME.lower(),
+                    "period": options.get("period_ms"),
+                    "last_check": None,
+                    "ready_at": None,
+                }
+            )
 
+    def start_temperature(self, sensor=None):
+        """
+        Start a measurement that needs time to complete on `sensor` (default:
+        the primary sensor). Returns the ms to wait before read_temperature(),
+        or 0 if the sensor is read synchronously.
+        """
+        sensor = sensor or self.temp_sensor
         try:
-            self.temp_sensor = DS18B20Sensor(self.onewire_ds18b20_pin)
-            print("Using DS18B20 sensor.")
-            return
-        except Exception as e4:
-            print(f"DS18B20 not found: {e4}")
-
-        # Fallback to internal sensor
-        self.temp_sensor = InternalTempSensor()
-        print("Using internal temperature sensor.")
+            return sensor.start()
+        except Exception as e:
+            print(f"Error starting {sensor.NAME} measurement: {e}")
+        return 0
 
-    def read_temperature(self):
+    def read_temperature(self, sensor=None):
+        sensor = sensor or self.temp_sensor
         result = {
             "temperature_f": None,
             "humidity": None,
@@ -94,31 +114,9 @@ class SensorManager:
         }
 
         try:
-            if isinstance(self.temp_sensor, BME280Sensor):
-                temperature_f, humidity, pressure_inhg = self.temp_sensor.read_values()
-                result["temperature_f"] = temperature_f
-                result["humidity"] = humidity
-                result["pressure_inhg"] = pressure_inhg
-                result["temp_sensor_type"] = "BME280"
-            elif isinstance(self.temp_sensor, SHT31DSensor):
-                temperature_f, humidity = self.temp_sensor.read_values()
-                result["temperature_f"] = temperature_f
-                result["humidity"] = humidity
-                result["temp_sensor_type"] = "SHT31D"
-            elif isinstance(self.temp_sensor, TMP117Sensor):
-                temperature_f = self.temp_sensor.read_values()
-                result["temperature_f"] = temperature_f
-                result["temp_sensor_type"] = "TMP117"
-            elif isinstance(self.temp_sensor, DS18B20Sensor):
-                temperature_f = self.temp_sensor.read_values()
-                result["temperature_f"] = temperature_f
-                result["temp_sensor_type"] = "DS18B20"
-            elif isinstance(self.temp_sensor, InternalTempSensor):
-                temperature_f = self.temp_sensor.read_values()
-                result["temperature_f"] = temperature_f
-                result["temp_sensor_type"] = "INTERNAL"
-            else:
-                print("Unknown temperature sensor type")
+            if sensor.read_into(result) is False:
+                return None
+            result["temp_sensor_type"] = sensor.NAME
 
             # Add Celsius temperature for fan controller
             if result["temperature_f"] is not None:
@@ -127,15 +125,28 @@ class SensorManager:
 
             return result
         except Exception as e:
-            print(f"Error reading temperature sensor: {e}")
+            print(f"Error reading {sensor.NAME} sensor: {e}")
+            if sensor.BUS == "i2c":
+                I2CBusManager.get_instance().record_error(sensor.i2c)
             return result
 
+    def set_edge_flag(self, flag):
+        """Have edge capture IRQs set `flag` (a uasyncio.ThreadSafeFlag)."""
+        for sensor in (self.motion_sensor, self.switch_sensor):
+            if sensor.edges:
+                sensor.edges.flag = flag
+
     def read_motion(self):
         try:
             current_motion_state = self.motion_sensor.read()
-            motion_detected = (
-                current_motion_state == "HIGH" and self.previous_motion_state == "LOW"
-            )
+            if self.motion_sensor.edges:
+                # Any captured rising edge counts, even if the pulse has ended
+                motion_detected = any(self.motion_sensor.edges.drain())
+            else:
+                motion_detected = (
+                    current_motion_state == "HIGH"
+                    and self.previous_motion_state == "LOW"
+                )
             self.previous_motion_state = current_motion_state
 
             return {"motion": current_motion_state, "motion_detected": motion_detected}
@@ -147,6 +158,9 @@ class SensorManager:
         try:
             current_switch_state = self.switch_sensor.read()
             switch_changed = current_switch_state != self.previous_switch_state
+            if self.switch_sensor.edges and self.switch_sensor.edges.drain():
+                # A toggle and back between drains is still a change
+                switch_changed = True
             self.previous_switch_state = current_switch_state
 
             return {"switch": current_switch_state, "switch_changed": switch_changed}
@@ -1,16 +1,26 @@
 # sht31d_sensor.py
-import machine
 import time
+from sensors.sensor_driver import SensorDriver
+from utils.i2c_bus import I2CBusManager
 
 
-class SHT31DSensor:
-    def __init__(self, config):
+class SHT31DSensor(SensorDriver):
+    NAME = "SHT31D"
+    BUS = "i2c"
+    I2C_ADDRESSES = (0x44, 0x45)
+
+    def __init__(self, config, options=None, i2c=None, address=None):
         scl_pin = config.get("i2c_scl")
         sda_pin = config.get("i2c_sda")
-        self.i2c = machine.I2C(0, scl=machine.Pin(scl_pin), sda=machine.Pin(sda_pin))
-        self.addr = 0x44
-        if self.addr not in self.i2c.scan():
-            raise RuntimeError("SHT31D sensor not found")
+        buses = I2CBusManager.get_instance()
+        if i2c is None:
+            i2c = buses.get(scl_pin, sda_pin)
+        self.i2c = i2c
+        if address is None:
+            address = 0x44
+            if address not in buses.scan(scl_pin, sda_pin):
+                raise RuntimeError("SHT31D sensor not found")
+        self.addr = address
 
     def read_values(self):
         # High repeatability measurement command
@@ -28,3 +38,8 @@ class SHT31DSensor:
         humidity = 100 * raw_hum / 65535
 
         return temperature_f, humidity
+
+    def read_into(self, readings):
+        temperature_f, humidity = self.read_values()
+        readings["temperature_f"] = temperature_f
+        readings["humidity"] = humidity
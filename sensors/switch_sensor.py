@@ -1,6 +1,7 @@
 # switch_sensor.py
 
 import machine
+from sensors.edge_capture import EdgeCapture
 
 
 class SwitchSensor:
@@ -8,6 +9,10 @@ class SwitchSensor:
     def __init__(self, config):
         pin_num = config.get("pin")
         self.pin = machine.Pin(pin_num, machine.Pin.IN, machine.Pin.PULL_DOWN)
+        self.edges = None
+
+    def enable_edge_capture(self, size=16, debounce_ms=50, flag=None):
+        self.edges = EdgeCapture(self.pin, size, debounce_ms, flag)
 
     def read(self):
         state = "HIGH" if self.pin.value() == 1 else "LOW"
@@ -1,20 +1,38 @@
 # tmp117_sensor.py
-import machine
 import time
+from sensors.sensor_driver import SensorDriver
+from utils.i2c_bus import I2CBusManager
 
 
-class TMP117Sensor:
-    def __init__(self, config):
+class TMP117Sensor(SensorDriver):
+    NAME = "TMP117"
+    BUS = "i2c"
+    I2C_ADDRESSES = (0x48, 0x49, 0x4A, 0x4B)
+
+    def __init__(self, config, options=None, i2c=None, address=None):
         scl_pin = config.get("i2c_scl")
         sda_pin = config.get("i2c_sda")
-        self.i2c = machine.I2C(0, scl=machine.Pin(scl_pin), sda=machine.Pin(sda_pin))
-        self.addr = 0x48  # Default I2C address for TMP117
-        if self.addr not in self.i2c.scan():
-            raise RuntimeError("TMP117 sensor not found")
+        buses = I2CBusManager.get_instance()
+        if i2c is None:
+            i2c = buses.get(scl_pin, sda_pin)
+        self.i2c = i2c
+        if address is None:
+            address = 0x48  # Default I2C address for TMP117
+            if address not in buses.scan(scl_pin, sda_pin):
+                raise RuntimeError("TMP117 sensor not found")
+        self.addr = address
 
         # Register addresses
         self.TEMP_REG = 0x00  # Temperature register
         self.CONFIG_REG = 0x01  # Configuration register
+        self.DEVICE_ID_REG = 0x0F  # Device ID register
+
+        # 0x48-0x4B are shared with ADCs such as the ADS1115 and PCF8591;
+        # only claim the address if the part identifies as a TMP117
+        # (DID[11:0] = 0x117; the top nibble is the revision)
+        data = self.i2c.readfrom_mem(self.addr, self.DEVICE_ID_REG, 2)
+        if ((data[0] << 8) | data[1]) & 0x0FFF != 0x0117:
+            raise RuntimeError(f"No TMP117 at {hex(self.addr)}")
 
         # Configure for continuous conversion mode
         self.i2c.writeto_mem(self.addr, self.CONFIG_REG, b"\x02\x00")
@@ -34,3 +52,6 @@ class TMP117Sensor:
         temperature_f = temperature_c * 9 / 5 + 32
 
         return temperature_f
+
+    def read_into(self, readings):
+        readings["temperature_f"] = self.read_values()
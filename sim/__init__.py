@@ -0,0 +1,131 @@
+# sim/__init__.py
+"""
+Host-side simulator: runs the firmware unmodified on CPython.
+
+install() puts stand-ins for the MicroPython modules the firmware imports
+(machine, network, framebuf, ntptime, usocket, ussl, uasyncio, micropython,
+uctypes, ustruct and the u-prefixed stdlib aliases) into sys.modules,
+drives the time module from the board's virtual clock, and maps the flash
+filesystem onto a host directory. Everything the firmware touches is modelled on a
+sim.board.Board: GPIO with scripted waveforms, the I2C devices, a 1-Wire
+bus with DS18B20 probes at bit-slot level, the Wi-Fi access point and a
+TCP network with an MQTT broker and HTTP servers (sim.servers).
+
+rp2 (PIO) is not simulated; DS18B20 sensors must use the default bitbang
+backend. Run `python -m sim.run --help` for the command-line runner.
+"""
+
+import binascii
+import gc
+import json
+import os
+import secrets as _host_secrets
+import sys
+import time
+import tracemalloc
+import types
+
+from sim import board as _board
+from sim import flash as _flash
+
+# MicroPython heap available to Python code on a Pico W after the network
+# stack is up
+HEAP_BYTES = 166_000
+
+_STAND_INS = (
+    "machine",
+    "network",
+    "framebuf",
+    "ntptime",
+    "usocket",
+    "ussl",
+    "micropython",
+    "uasyncio",
+    "uctypes",
+    "ustruct",
+)
+_ALIASES = {
+    "ujson": json,
+    "ubinascii": binascii,
+    "utime": time,
+    "uos": os,
+}
+
+
+def _mem_alloc():
+    # Only meaningful while tracemalloc is tracing
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    return 0
+
+
+def _mem_free():
+    return max(0, HEAP_BYTES - _mem_alloc())
+
+
+class _Collect:
+    """
+    gc.collect() for the firmware. A full CPython collection costs far more
+    than MicroPython's on a small heap and would dominate every loop pass,
+    so calls are only counted.
+    """
+
+    def __init__(self, host_collect):
+        self.host_collect = host_collect
+        self.calls = 0
+
+    def __call__(self, generation=2):
+        self.calls += 1
+        return 0
+
+
+def _secrets_module(ssid, password):
+    # wifi_manager imports WIFI_SSID/WIFI_PASSWORD from the device's
+    # secrets.py; keep the stdlib module's contents for host code
+    module = types.ModuleType("secrets")
+    module.__dict__.update(
+        {k: v for k, v in vars(_host_secrets).items() if not k.startswith("__")}
+    )
+    module.WIFI_SSID = ssid
+    module.WIFI_PASSWORD = password
+    return module
+
+
+def install(board=None):
+    """Make `board` (a new Board by default) the hardware the firmware runs on."""
+    board = board or _board.Board()
+    _board.set_current(board)
+
+    import importlib
+
+    for name in _STAND_INS:
+        sys.modules[name] = importlib.import_module(f"sim.modules.{name}")
+    sys.modules.update(_ALIASES)
+    sys.modules["secrets"] = _secrets_module(board.wlan.ssid, board.wlan.password)
+
+    board.clock.install(time)
+    if not isinstance(gc.collect, _Collect):
+        gc.collect = _Collect(gc.collect)
+    gc.mem_alloc = _mem_alloc
+    gc.mem_free = _mem_free
+    gc.threshold = lambda amount=None: -1 if amount is None else None
+
+    _flash.install(_flash.Flash(board.flash_dir))
+    return board
+
+
+def uninstall():
+    """Undo install(): restore the host time, gc, os and builtins."""
+    board = _board._current
+    if board is not None:
+        board.clock.uninstall(time)
+    _flash.uninstall()
+    if isinstance(gc.collect, _Collect):
+        gc.collect = gc.collect.host_collect
+    for name in ("mem_alloc", "mem_free", "threshold"):
+        if hasattr(gc, name):
+            delattr(gc, name)
+    for name in _STAND_INS + tuple(_ALIASES) + ("secrets",):
+        sys.modules.pop(name, None)
+    sys.modules["secrets"] = _host_secrets
+    _board.set_current(None)
@@ -0,0 +1,292 @@
+# sim/board.py
+
+import errno
+import tempfile
+
+from sim.clock import VirtualClock
+from sim.net import VirtualNetwork
+
+_current = None
+
+# Pin modes and pulls, numbered as on the rp2 port
+MODE_IN = 0
+MODE_OUT = 1
+MODE_OPEN_DRAIN = 2
+PULL_UP = 1
+PULL_DOWN = 2
+IRQ_FALLING = 4
+IRQ_RISING = 8
+
+
+class MachineReset(SystemExit):
+    """Raised by machine.reset(); the device would reboot at this point."""
+
+
+def current():
+    if _current is None:
+        raise RuntimeError("No simulated board installed; call sim.install()")
+    return _current
+
+
+def set_current(board):
+    global _current
+    _current = board
+
+
+def value_at(source, clock):
+    """A device input: a constant, or a callable of virtual seconds."""
+    return source(clock.seconds()) if callable(source) else source
+
+
+class PinState:
+    """
+    Electrical state of one GPIO, shared by every machine.Pin made for it.
+    The level seen by an input is the external drive (a scripted waveform
+    or a set level), else the pull resistor; a 1-Wire bus attached to the
+    pin replaces both with the wired-AND of master and devices.
+    """
+
+    def __init__(self, board, pin_id):
+        self.board = board
+        self.id = pin_id
+        self.mode = None
+        self.pull = None
+        self.out = 0  # Output register
+        self.external = None  # Level driven from outside, None when floating
+        self.bus = None  # OneWireBus attached to this pin
+        self.handler = None
+        self.trigger = 0
+        self.irq_count = 0
+
+    def driving_low(self):
+        return self.mode in (MODE_OUT, MODE_OPEN_DRAIN) and not self.out
+
+    def level(self):
+        if self.bus is not None:
+            return self.bus.line_level()
+        if self.mode == MODE_OUT:
+            return self.out
+        if self.mode == MODE_OPEN_DRAIN and not self.out:
+            return 0
+        if self.external is not None:
+            return self.external
+        return 1 if self.pull == PULL_UP else 0
+
+    def configure(self, mode=None, pull=-1, value=None):
+        before = self.level()
+        if value is not None:
+            self.out = 1 if value else 0
+        if mode is not None:
+            self.mode = mode
+        if pull != -1:
+            self.pull = pull
+        self._changed(before)
+
+    def write(self, value):
+        before = self.level()
+        self.out = 1 if value else 0
+        self._changed(before)
+
+    def set_external(self, level):
+        before = self.level()
+        self.external = None if level is None else (1 if level else 0)
+        self._changed(before)
+
+    def _changed(self, before):
+        if self.bus is not None:
+            self.bus.master_changed(self.driving_low())
+        after = self.level()
+        if after == before or self.handler is None:
+            return
+        if (after and self.trigger & IRQ_RISING) or (
+            not after and self.trigger & IRQ_FALLING
+        ):
+            self.irq_count += 1
+            self.board.clock.irq(self.handler, self.board.pin_handle(self.id))
+
+
+class I2CBus:
+    """The devices wired to one SCL/SDA pair, keyed by 7-bit address."""
+
+    def __init__(self, board, pins):
+        self.board = board
+        self.pins = pins
+        self.devices = {}
+        self.transfers = 0
+        self.bytes = 0
+
+    def add(self, device):
+        device.attach(self.board)
+        self.devices[device.address] = device
+        return device
+
+    def device(self, address):
+        device = self.devices.get(address)
+        if device is None or not device.present:
+            raise OSError(errno.ENODEV)
+        if device.fail_next:
+            device.fail_next -= 1
+            raise OSError(errno.EIO)
+        return device
+
+    def clock_bytes(self, n, freq):
+        # Address byte plus data, nine clocks each including the ACK
+        self.transfers += 1
+        self.bytes += n
+        self.board.clock.advance((n + 1) * 9 * 1_000_000 // freq)
+
+
+class WLANState:
+    """
+    The access point the Pico's radio sees. `available` can be toggled (or
+    be a callable of virtual seconds) to model the network going away.
+    """
+
+    def __init__(self, clock, ssid="sim-ssid", password="sim-password"):
+        self.clock = clock
+        self.ssid = ssid
+        self.password = password
+        self.available = True
+        self.rssi = -58
+        self.connect_ms = 1200
+        self.ip = "192.168.6.50"
+        self.active = False
+        self.requested = None  # (ssid, password) of the last connect()
+        self.connected_at = None  # Virtual us when the join completes
+        self.connects = 0
+
+    def up(self):
+        return bool(value_at(self.available, self.clock))
+
+    def status(self):
+        if not self.active or self.requested is None:
+            return 0  # STAT_IDLE
+        if self.clock.us() < self.connected_at:
+            return 1  # STAT_CONNECTING
+        ssid, password = self.requested
+        if ssid != self.ssid or not self.up():
+            return -2  # STAT_NO_AP_FOUND
+        if password != self.password:
+            return -3  # STAT_WRONG_PASSWORD
+        return 3  # STAT_GOT_IP
+
+    def connected(self):
+        return self.status() == 3
+
+
+class Waveform:
+    """Drives a pin through scripted (offset_ms, level) steps, optionally repeating."""
+
+    def __init__(self, board, pin_id, steps, repeat_ms=None):
+        self.board = board
+        self.pin = board.pin(pin_id)
+        self.steps = sorted(steps)
+        self.repeat_ms = repeat_ms
+        self.start_us = board.clock.us()
+        self.cancelled = False
+        self._schedule(0)
+
+    def _schedule(self, cycle):
+        base = self.start_us + (cycle * self.repeat_ms * 1000 if self.repeat_ms else 0)
+        for offset_ms, level in self.steps:
+            self.board.clock.call_at(
+                base + int(offset_ms * 1000), lambda level=level: self._step(level)
+            )
+        if self.repeat_ms:
+            self.board.clock.call_at(
+                base + self.repeat_ms * 1000, lambda: self._schedule(cycle + 1)
+            )
+
+    def _step(self, level):
+        if not self.cancelled:
+            self.pin.set_external(level)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Board:
+    """
+    Everything outside the RP2040 the firmware talks to: GPIO levels, the
+    I2C and 1-Wire devices on each bus, ADC inputs, PWM outputs, the Wi-Fi
+    access point and the virtual network behind it, all on one clock. The
+    stand-in modules installed by sim.install() act on the current board.
+    """
+
+    def __init__(
+        self,
+        clock=None,
+        flash_dir=None,
+        unique_id=b"\xe6\x61\x41\x04\x03\x5a\x2b\x21",
+    ):
+        self.clock = clock or VirtualClock()
+        self.flash_dir = flash_dir or tempfile.mkdtemp(prefix="sim-flash-")
+        self.unique_id = unique_id
+        self.pins = {}
+        self.handles = {}
+        self.i2c_buses = {}
+        self.onewire_buses = {}
+        # ADC channel -> volts (constant or callable); channel 4 is the die
+        # temperature sensor and is derived from die_temperature_c instead
+        self.adc = {}
+        self.die_temperature_c = 30.0
+        self.pwm = {}  # pin id -> {"freq": Hz, "duty_u16": duty}
+        self.wlan = WLANState(self.clock)
+        self.network = VirtualNetwork(self.clock, self.wlan)
+        self.ntp_synced = False
+
+    # -- GPIO ---------------------------------------------------------------------
+
+    def pin(self, pin_id):
+        state = self.pins.get(pin_id)
+        if state is None:
+            state = self.pins[pin_id] = PinState(self, pin_id)
+        return state
+
+    def pin_handle(self, pin_id):
+        """The machine.Pin passed to IRQ handlers for this GPIO."""
+        return self.handles.get(pin_id)
+
+    def set_level(self, pin_id, level):
+        """Hold an input at a fixed level (None lets it float to its pull)."""
+        self.pin(pin_id).set_external(level)
+
+    def script(self, pin_id, steps, repeat_ms=None):
+        """Drive a pin through [(offset_ms, level), ...] from now on."""
+        return Waveform(self, pin_id, steps, repeat_ms)
+
+    def pulse(self, pin_id, at_ms, width_ms, level=1):
+        """One pulse of `width_ms` starting `at_ms` from now."""
+        return Waveform(self, pin_id, [(at_ms, level), (at_ms + width_ms, 1 - level)])
+
+    # -- buses --------------------------------------------------------------------
+
+    def i2c_bus(self, scl, sda):
+        bus = self.i2c_buses.get((scl, sda))
+        if bus is None:
+            bus = self.i2c_buses[(scl, sda)] = I2CBus(self, (scl, sda))
+        return bus
+
+    def add_i2c(self, scl, sda, device):
+        return self.i2c_bus(scl, sda).add(device)
+
+    def onewire_bus(self, pin_id):
+        from sim.onewire_bus import OneWireBus
+
+        bus = self.onewire_buses.get(pin_id)
+        if bus is None:
+            bus = self.onewire_buses[pin_id] = OneWireBus(self.clock)
+            self.pin(pin_id).bus = bus
+        return bus
+
+    def add_onewire(self, pin_id, device):
+        return self.onewire_bus(pin_id).add(device)
+
+    # -- analog -------------------------------------------------------------------
+
+    def adc_volts(self, channel):
+        if channel == 4:
+            # RP2040 datasheet: 0.706 V at 27 C, falling 1.721 mV per degree
+            t = value_at(self.die_temperature_c, self.clock)
+            return 0.706 - (t - 27) * 0.001721
+        return value_at(self.adc.get(channel, 0.0), self.clock)
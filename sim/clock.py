@@ -0,0 +1,194 @@
+# sim/clock.py
+
+import heapq
+import time as _host_time
+
+# MicroPython's ticks_* counters wrap at 2**30 on every port we run on
+TICKS_PERIOD = 1 << 30
+_TICKS_MAX = TICKS_PERIOD - 1
+_TICKS_HALF = TICKS_PERIOD // 2
+
+
+class VirtualClock:
+    """
+    Virtual microsecond clock behind time.ticks_*/sleep_* in the simulator.
+    Sleeping advances the clock instantly (or paced to `speed` times real
+    time) and runs the events that fall due on the way, such as scripted
+    pin edges or sensor conversions finishing, at their exact virtual time.
+
+    Running code costs no virtual time unless `cpu_scale` is set, in which
+    case host CPU time multiplied by `cpu_scale` is added on every read, so
+    slow Python shows up in loop timings roughly as it would on the device.
+    """
+
+    def __init__(self, start_ms=0, speed=0.0, cpu_scale=0.0, epoch=None):
+        self.now_us = start_ms * 1000
+        self.speed = speed
+        self.cpu_scale = cpu_scale
+        # Wall-clock seconds at virtual time zero, for time.time()/localtime()
+        self.epoch = _host_time.time() if epoch is None else epoch
+        self.events = []  # heap of (due_us, seq, fn)
+        self.seq = 0
+        self.stop_at_us = None
+        self.stopped = False
+        self.irq_enabled = True
+        self.pending_irqs = []
+        self.woken = False
+        self._perf = _host_time.perf_counter()
+        self._patched = {}
+
+    # -- reading the clock ---------------------------------------------------
+
+    def us(self):
+        """Virtual microseconds since start, unwrapped."""
+        if self.cpu_scale:
+            perf = _host_time.perf_counter()
+            self.now_us += int((perf - self._perf) * 1_000_000 * self.cpu_scale)
+            self._perf = perf
+        return self.now_us
+
+    def seconds(self):
+        return self.us() / 1_000_000
+
+    def ticks_ms(self):
+        return (self.us() // 1000) & _TICKS_MAX
+
+    def ticks_us(self):
+        return self.us() & _TICKS_MAX
+
+    @staticmethod
+    def ticks_add(ticks, delta):
+        return (ticks + delta) & _TICKS_MAX
+
+    @staticmethod
+    def ticks_diff(end, start):
+        return ((end - start + _TICKS_HALF) & _TICKS_MAX) - _TICKS_HALF
+
+    def time(self):
+        return self.epoch + self.seconds()
+
+    # -- events and interrupts -------------------------------------------------
+
+    def call_at(self, due_us, fn):
+        """Run fn() when the clock reaches due_us (absolute virtual us)."""
+        self.seq += 1
+        heapq.heappush(self.events, (due_us, self.seq, fn))
+
+    def call_later(self, delay_us, fn):
+        self.call_at(self.us() + delay_us, fn)
+
+    def irq(self, handler, arg):
+        """
+        Deliver an interrupt: runs the handler now, or once interrupts are
+        enabled again if the firmware is inside disable_irq().
+        """
+        if self.irq_enabled:
+            handler(arg)
+        else:
+            self.pending_irqs.append((handler, arg))
+        self.woken = True
+
+    def disable_irq(self):
+        state = self.irq_enabled
+        self.irq_enabled = False
+        return state
+
+    def enable_irq(self, state=True):
+        self.irq_enabled = bool(state)
+        while self.irq_enabled and self.pending_irqs:
+            handler, arg = self.pending_irqs.pop(0)
+            handler(arg)
+
+    # -- advancing -------------------------------------------------------------
+
+    def stop_after(self, seconds):
+        """Raise KeyboardInterrupt from the first sleep that reaches `seconds`."""
+        self.stop_at_us = self.us() + int(seconds * 1_000_000)
+        self.stopped = False
+
+    def advance(self, delay_us, interruptible=False):
+        """
+        Move the clock forward by delay_us, running due events in order.
+        With `interruptible`, stop early at the first event that raised an
+        interrupt (for the uasyncio selector). Returns True if stopped early.
+        """
+        target = self.us() + max(0, int(delay_us))
+        stop = self.stop_at_us
+        if stop is not None and not self.stopped and target >= stop:
+            target = stop
+        self.woken = False
+        start = self.now_us
+        early = False
+        events = self.events
+        while events and events[0][0] <= target:
+            due, _, fn = heapq.heappop(events)
+            if due > self.now_us:
+                self.now_us = due
+            fn()
+            if interruptible and self.woken:
+                early = True
+                break
+        if not early and target > self.now_us:
+            self.now_us = target
+        self._pace(self.now_us - start)
+        if stop is not None and not self.stopped and self.now_us >= stop:
+            self.stopped = True
+            raise KeyboardInterrupt("simulation time limit reached")
+        return early
+
+    def next_event_us(self):
+        return self.events[0][0] if self.events else None
+
+    def _pace(self, elapsed_us):
+        if self.speed and elapsed_us > 0:
+            _host_time_sleep(elapsed_us / 1_000_000 / self.speed)
+        if self.cpu_scale:
+            self._perf = _host_time.perf_counter()
+
+    def sleep_us(self, us):
+        self.advance(us)
+
+    def sleep_ms(self, ms):
+        self.advance(ms * 1000)
+
+    def sleep(self, seconds):
+        self.advance(seconds * 1_000_000)
+
+    # -- installing onto the time module ------------------------------------------
+
+    def install(self, module):
+        """Give `module` (the host time module) MicroPython's ticks/sleep API."""
+        names = {
+            "ticks_ms": self.ticks_ms,
+            "ticks_us": self.ticks_us,
+            "ticks_cpu": self.ticks_us,
+            "ticks_add": self.ticks_add,
+            "ticks_diff": self.ticks_diff,
+            "sleep_ms": self.sleep_ms,
+            "sleep_us": self.sleep_us,
+            "sleep": self.sleep,
+            "time": self.time,
+            "time_ns": lambda: int(self.time() * 1_000_000_000),
+            "localtime": lambda secs=None: _localtime(
+                self.time() if secs is None else secs
+            ),
+            "gmtime": lambda secs=None: _gmtime(self.time() if secs is None else secs),
+        }
+        for name, fn in names.items():
+            if name not in self._patched:
+                self._patched[name] = getattr(module, name, None)
+            setattr(module, name, fn)
+
+    def uninstall(self, module):
+        for name, original in self._patched.items():
+            if original is None:
+                delattr(module, name)
+            else:
+                setattr(module, name, original)
+        self._patched = {}
+
+
+# Host functions captured before install() replaces them
+_host_time_sleep = _host_time.sleep
+_localtime = _host_time.localtime
+_gmtime = _host_time.gmtime
@@ -0,0 +1,350 @@
+# sim/devices.py
+
+import struct
+
+from sim.board import value_at
+
+
+class I2CDevice:
+    """
+    A device on a simulated I2C bus. Each transaction arrives whole:
+    write(data) with the bytes after the address, read(n) for a read.
+    `present` unplugs the device (NACK); `fail_next` makes that many
+    transactions fail with EIO, as a glitching bus would.
+    """
+
+    def __init__(self, address):
+        self.address = address
+        self.present = True
+        self.fail_next = 0
+        self.board = None
+        self.clock = None
+
+    def attach(self, board):
+        self.board = board
+        self.clock = board.clock
+
+    def write(self, data):
+        raise OSError(5)
+
+    def read(self, n):
+        raise OSError(5)
+
+
+class RegisterDevice(I2CDevice):
+    """Device with an auto-incrementing 8-bit register pointer."""
+
+    def __init__(self, address):
+        super().__init__(address)
+        self.regs = bytearray(256)
+        self.pointer = 0
+
+    def write(self, data):
+        if not data:
+            return
+        self.pointer = data[0]
+        for b in data[1:]:
+            self.write_register(self.pointer, b)
+            self.pointer = (self.pointer + 1) & 0xFF
+
+    def write_register(self, reg, value):
+        self.regs[reg] = value
+
+    def read(self, n):
+        out = bytearray(n)
+        for i in range(n):
+            out[i] = self.regs[(self.pointer + i) & 0xFF]
+        self.pointer = (self.pointer + n) & 0xFF
+        return bytes(out)
+
+
+def crc8_sensirion(data):
+    crc = 0xFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x31) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+class BME280(RegisterDevice):
+    """
+    Bosch BME280 with a fixed calibration set. The raw ADC words returned
+    from 0xF7 are solved for with the datasheet's integer compensation, so
+    the driver reads back `temperature_c`, `humidity` (%RH) and
+    `pressure_pa` to within a count. Each may be a callable of virtual
+    seconds.
+    """
+
+    CHIP_ID = 0x60
+    # Datasheet example trimming values (T1..T3, P1..P9) and typical H1..H6
+    CALIBRATION = {
+        "T": (27504, 26435, -1000),
+        "P": (36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000),
+        "H": (75, 362, 0, 313, 50, 30),
+    }
+
+    def __init__(
+        self, address=0x76, temperature_c=21.5, humidity=45.0, pressure_pa=101325.0
+    ):
+        super().__init__(address)
+        self.temperature_c = temperature_c
+        self.humidity = humidity
+        self.pressure_pa = pressure_pa
+        self.measurements = 0
+        self.regs[0xD0] = self.CHIP_ID
+        self.regs[0xF3] = 0
+        t, p, h = self.CALIBRATION["T"], self.CALIBRATION["P"], self.CALIBRATION["H"]
+        self.regs[0x88:0xA0] = struct.pack("<HhhHhhhhhhhh", *t, *p)
+        self.regs[0xA1] = h[0]
+        h4, h5 = h[3], h[4]
+        self.regs[0xE1:0xE8] = struct.pack(
+            "<hBbBbb", h[1], h[2], h4 >> 4, (h4 & 0xF) | (h5 & 0xF) << 4, h5 >> 4, h[5]
+        )
+        # Power-on value of the data registers: 0x80000 / 0x8000 (skipped)
+        self.regs[0xF7:0xFF] = b"\x80\x00\x00\x80\x00\x00\x80\x00"
+
+    def read(self, n):
+        if self.pointer <= 0xFE and self.pointer + n > 0xF7:
+            self._measure()
+        return super().read(n)
+
+    def _measure(self):
+        self.measurements += 1
+        t = value_at(self.temperature_c, self.clock)
+        h = value_at(self.humidity, self.clock)
+        p = value_at(self.pressure_pa, self.clock)
+        max20 = (1 << 20) - 1
+        raw_t = _solve(lambda r: self._compensate_t(r)[0], round(t * 100), 0, max20)
+        t_fine = self._compensate_t(raw_t)[1]
+        # Pressure falls as the raw value rises: solve on its negation
+        raw_p = _solve(
+            lambda r: -self._compensate_p(r, t_fine), -round(p * 256), 0, max20
+        )
+        raw_h = _solve(
+            lambda r: self._compensate_h(r, t_fine), round(h * 1024), 0, 0xFFFF
+        )
+        self.regs[0xF7:0xFF] = bytes(
+            (
+                raw_p >> 12,
+                (raw_p >> 4) & 0xFF,
+                (raw_p & 0xF) << 4,
+                raw_t >> 12,
+                (raw_t >> 4) & 0xFF,
+                (raw_t & 0xF) << 4,
+                raw_h >> 8,
+                raw_h & 0xFF,
+            )
+        )
+
+    def _compensate_t(self, raw):
+        t1, t2, t3 = self.CALIBRATION["T"]
+        var1 = ((raw >> 3) - (t1 << 1)) * t2 >> 11
+        var2 = ((((raw >> 4) - t1) * ((raw >> 4) - t1)) >> 12) * t3 >> 14
+        t_fine = var1 + var2
+        return (t_fine * 5 + 128) >> 8, t_fine
+
+    def _compensate_p(self, raw, t_fine):
+        p1, p2, p3, p4, p5, p6, p7, p8, p9 = self.CALIBRATION["P"]
+        var1 = t_fine - 128000
+        var2 = var1 * var1 * p6
+        var2 = var2 + ((var1 * p5) << 17)
+        var2 = var2 + (p4 << 35)
+        var1 = ((var1 * var1 * p3) >> 8) + ((var1 * p2) << 12)
+        var1 = (((1 << 47) + var1) * p1) >> 33
+        if var1 == 0:
+            return 0
+        p = 1048576 - raw
+        p = (((p << 31) - var2) * 3125) // var1
+        var1 = (p9 * (p >> 13) * (p >> 13)) >> 25
+        var2 = (p8 * p) >> 19
+        return ((p + var1 + var2) >> 8) + (p7 << 4)
+
+    def _compensate_h(self, raw, t_fine):
+        h1, h2, h3, h4, h5, h6 = self.CALIBRATION["H"]
+        v = t_fine - 76800
+        v = ((((raw << 14) - (h4 << 20) - (h5 * v)) + 16384) >> 15) * (
+            ((((((v * h6) >> 10) * (((v * h3) >> 11) + 32768)) >> 10) + 2097152) * h2
+             + 8192) >> 14
+        )
+        v = v - (((((v >> 15) * (v >> 15)) >> 7) * h1) >> 4)
+        v = 0 if v < 0 else v
+        v = 419430400 if v > 419430400 else v
+        return v >> 12
+
+
+def _solve(fn, target, lo, hi):
+    """Smallest x in [lo, hi] with fn(x) >= target, for non-decreasing fn."""
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if fn(mid) < target:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class SHT31D(I2CDevice):
+    """
+    Sensirion SHT31-D. A single-shot command starts a measurement; reading
+    before it completes is NACKed, as on the real part.
+    """
+
+    MEASURE_MS = {0x00: 15, 0x0B: 6, 0x16: 4}  # 0x24xx repeatability: high/mid/low
+
+    def __init__(self, address=0x44, temperature_c=21.5, humidity=45.0):
+        super().__init__(address)
+        self.temperature_c = temperature_c
+        self.humidity = humidity
+        self.result = None
+        self.ready_at = None
+        self.measurements = 0
+
+    def write(self, data):
+        if len(data) < 2:
+            raise OSError(5)
+        command = data[0] << 8 | data[1]
+        if command >> 8 == 0x24 and data[1] in self.MEASURE_MS:
+            self.measurements += 1
+            self.ready_at = self.clock.us() + self.MEASURE_MS[data[1]] * 1000
+            t = value_at(self.temperature_c, self.clock)
+            h = value_at(self.humidity, self.clock)
+            raw_t = max(0, min(0xFFFF, round((t + 45) * 65535 / 175)))
+            raw_h = max(0, min(0xFFFF, round(h * 65535 / 100)))
+            words = (raw_t.to_bytes(2, "big"), raw_h.to_bytes(2, "big"))
+            self.result = b"".join(w + bytes((crc8_sensirion(w),)) for w in words)
+        elif command == 0x30A2:  # Soft reset
+            self.result = None
+            self.ready_at = None
+
+    def read(self, n):
+        if self.result is None or self.clock.us() < self.ready_at:
+            raise OSError(5)  # Measurement still running: address NACK
+        out, self.result = self.result[:n], None
+        return out
+
+
+class TMP117(I2CDevice):
+    """TI TMP117: 16-bit big-endian registers, temperature in 1/128 C."""
+
+    DEVICE_ID = 0x0117
+
+    def __init__(self, address=0x48, temperature_c=21.5):
+        super().__init__(address)
+        self.temperature_c = temperature_c
+        self.pointer = 0
+        self.words = {0x00: 0x8000, 0x01: 0x0220, 0x0F: self.DEVICE_ID}
+
+    def write(self, data):
+        if not data:
+            return
+        self.pointer = data[0]
+        if len(data) >= 3:
+            self.words[self.pointer] = data[1] << 8 | data[2]
+
+    def read(self, n):
+        if self.pointer == 0x00:
+            t = value_at(self.temperature_c, self.clock)
+            self.words[0x00] = round(t * 128) & 0xFFFF
+        word = self.words.get(self.pointer, 0)
+        return (word.to_bytes(2, "big") * ((n + 1) // 2))[:n]
+
+
+class SSD1306(I2CDevice):
+    """
+    SSD1306 OLED controller: parses the command stream and keeps GDDRAM in
+    horizontal addressing mode, so render() shows what the panel displays.
+    """
+
+    # Commands followed by argument bytes
+    ARGS = {
+        0x20: 1, 0x21: 2, 0x22: 2, 0x81: 1, 0x8D: 1, 0xA8: 1, 0xAD: 1,
+        0xD3: 1, 0xD5: 1, 0xD9: 1, 0xDA: 1, 0xDB: 1,
+    }
+
+    def __init__(self, address=0x3C, width=128, height=64):
+        super().__init__(address)
+        self.width = width
+        self.height = height
+        self.ram = bytearray(width * height // 8)
+        self.on = False
+        self.inverted = False
+        self.contrast = 0x7F
+        self.columns = (0, width - 1)
+        self.pages = (0, height // 8 - 1)
+        self.col = 0
+        self.page = 0
+        self.frames = 0
+        self.commands = 0
+        self._cmd = []
+
+    def write(self, data):
+        i = 0
+        while i < len(data):
+            control = data[i]
+            i += 1
+            if control & 0x40:  # D/C#: the rest is display data
+                self._data(data[i:])
+                self.frames += 1
+                return
+            if control & 0x80:  # Co: one command byte, then another control
+                if i < len(data):
+                    self._command(data[i])
+                i += 1
+            else:  # Command stream
+                for b in data[i:]:
+                    self._command(b)
+                return
+
+    def read(self, n):
+        return bytes(n)
+
+    def _command(self, b):
+        self._cmd.append(b)
+        if len(self._cmd) - 1 < self.ARGS.get(self._cmd[0], 0):
+            return
+        cmd, args = self._cmd[0], self._cmd[1:]
+        self._cmd = []
+        self.commands += 1
+        if cmd in (0xAE, 0xAF):
+            self.on = cmd == 0xAF
+        elif cmd in (0xA6, 0xA7):
+            self.inverted = cmd == 0xA7
+        elif cmd == 0x81:
+            self.contrast = args[0]
+        elif cmd == 0x21:
+            self.columns = (args[0], args[1])
+            self.col = args[0]
+        elif cmd == 0x22:
+            self.pages = (args[0] & 7, args[1] & 7)
+            self.page = args[0] & 7
+
+    def _data(self, data):
+        c0, c1 = self.columns
+        p0, p1 = self.pages
+        for b in data:
+            if self.col < self.width:
+                self.ram[self.page * self.width + self.col] = b
+            if self.col >= c1:
+                self.col = c0
+                self.page = p0 if self.page >= p1 else self.page + 1
+            else:
+                self.col += 1
+
+    def pixel(self, x, y):
+        return (self.ram[(y >> 3) * self.width + x] >> (y & 7)) & 1
+
+    def render(self):
+        """The panel as text, two pixel rows per line using half blocks."""
+        chars = {(0, 0): " ", (1, 0): "▀", (0, 1): "▄", (1, 1): "█"}
+        inv = int(self.inverted)
+        lines = []
+        for y in range(0, self.height, 2):
+            row = (
+                chars[(self.pixel(x, y) ^ inv, self.pixel(x, y + 1) ^ inv)]
+                for x in range(self.width)
+            )
+            lines.append("".join(row).rstrip())
+        if not self.on:
+            lines.insert(0, "(display off; GDDRAM contents:)")
+        return "\n".join(lines)
@@ -0,0 +1,102 @@
+# sim/flash.py
+
+import builtins
+import os
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SIM = os.path.join(_ROOT, "sim") + os.sep
+
+_OS_NAMES = ("remove", "rename", "mkdir", "rmdir", "stat", "listdir", "statvfs")
+_originals = {}
+
+
+def _from_firmware(depth=2):
+    """True when the caller `depth` frames up is firmware code in the repo."""
+    filename = sys._getframe(depth).f_code.co_filename
+    return filename.startswith(_ROOT) and not filename.startswith(_SIM)
+
+
+class Flash:
+    """
+    The Pico's littlefs volume as a host directory. Once installed, absolute
+    paths opened by firmware modules ("/config_cache.json", "/queue/...")
+    resolve under `root`; the simulator's own code and the standard library
+    keep seeing the host filesystem.
+    """
+
+    def __init__(self, root, size=1_441_792, block_size=4096):
+        self.root = root
+        self.size = size
+        self.block_size = block_size
+        os.makedirs(root, exist_ok=True)
+
+    def map(self, path):
+        if isinstance(path, str) and path.startswith("/"):
+            return os.path.join(self.root, path.lstrip("/"))
+        return path
+
+    def used(self):
+        total = 0
+        for parent, _, files in os.walk(self.root):
+            for name in files:
+                total += os.path.getsize(os.path.join(parent, name))
+        return total
+
+    def statvfs(self):
+        # littlefs reports whole blocks; f_bfree == f_bavail
+        total = self.size // self.block_size
+        free = max(0, total - -(-self.used() // self.block_size))
+        return (self.block_size, self.block_size, total, free, free, 0, 0, 0, 0, 255)
+
+
+def _wrap_path(original, flash, paths=1):
+    def wrapper(*args, **kwargs):
+        if _from_firmware():
+            mapped = [flash.map(a) for a in args[:paths]]
+            args = tuple(mapped) + args[paths:]
+        return original(*args, **kwargs)
+
+    return wrapper
+
+
+def install(flash):
+    """Redirect firmware file access to `flash` (idempotent)."""
+    uninstall()
+    _originals["open"] = builtins.open
+    builtins.open = _wrap_path(builtins.open, flash)
+    for name in _OS_NAMES:
+        _originals[name] = getattr(os, name)
+    os.remove = _wrap_path(_originals["remove"], flash)
+    os.rename = _wrap_path(_originals["rename"], flash, paths=2)
+    os.mkdir = _wrap_path(_originals["mkdir"], flash)
+    os.rmdir = _wrap_path(_originals["rmdir"], flash)
+    os.stat = _wrap_path(_originals["stat"], flash)
+    os.listdir = _wrap_path(_originals["listdir"], flash)
+
+    host_statvfs = _originals["statvfs"]
+
+    def statvfs(path):
+        if _from_firmware():
+            return flash.statvfs()
+        return host_statvfs(path)
+
+    def ilistdir(path="/"):
+        # MicroPython extension: (name, type, inode) tuples
+        path = flash.map(path)
+        for name in _originals["listdir"](path):
+            is_dir = os.path.isdir(os.path.join(path, name))
+            yield (name, 0x4000 if is_dir else 0x8000, 0)
+
+    os.statvfs = statvfs
+    os.ilistdir = ilistdir
+
+
+def uninstall():
+    if not _originals:
+        return
+    builtins.open = _originals.pop("open")
+    for name in _OS_NAMES:
+        setattr(os, name, _originals.pop(name))
+    if hasattr(os, "ilistdir"):
+        del os.ilistdir
@@ -0,0 +1,438 @@
+# sim/fleet.py
+"""
+Load generator: N virtual devices publishing to one MQTT broker and ingest
+API through the firmware's own publish path:
+
+    python -m sim.fleet --devices 200 --seconds 1800 --heartbeat-ms 60000
+
+Each device has its own MQTTManager, APIManager and HTTP connection pool,
+and runs runtime._read_sensors/_maintain_connections/_publish on every
+pass, so PayloadEncoder, QoS 1 windows and keep-alive reuse behave as on
+the hardware. Sensor readings come from scripted traces instead of pins:
+motion trips at random (Poisson) intervals, the switch toggles now and
+then, and temperature/humidity/pressure follow slow per-device curves.
+
+All devices share one virtual clock. Passes run one at a time, so while a
+device blocks on the network the others wait; the report shows how late
+passes started ("lag") so it is clear when that skews the results.
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import random
+import sys
+import time
+
+import sim
+from sim.board import Board
+from sim.scenario import API_HOST, API_PATH, BROKER_HOST, default_config
+from sim.servers import HTTPServer, MQTTBroker
+
+
+class TraceSensor:
+    """Environmental sensor whose readings follow a scripted trace."""
+
+    NAME = "BME280"
+    BUS = "trace"
+
+    def __init__(self, clock, rng):
+        self.clock = clock
+        self.mean_c = rng.uniform(19.0, 26.0)
+        self.swing_c = rng.uniform(0.5, 4.0)
+        self.period_s = rng.uniform(1800, 7200)
+        self.phase = rng.uniform(0, 2 * math.pi)
+        self.rng = rng
+
+    def read_into(self, result):
+        t = self.clock.seconds()
+        wave = math.sin(2 * math.pi * t / self.period_s + self.phase)
+        temp_c = self.mean_c + self.swing_c * wave + self.rng.gauss(0, 0.05)
+        result["temperature_f"] = temp_c * 9 / 5 + 32
+        result["humidity"] = 45 - 8 * wave + self.rng.gauss(0, 0.3)
+        result["pressure_inhg"] = 29.92 + 0.05 * wave
+
+
+class TraceSensors:
+    """
+    Stands in for SensorManager with the interface runtime uses. Motion
+    starts at exponentially distributed intervals and stays HIGH for
+    `motion_hold_ms`; the switch toggles at exponential intervals too.
+    """
+
+    edge_capture_enabled = False
+
+    def __init__(self, clock, rng, motion_mean_s, motion_hold_ms, switch_mean_s):
+        self.clock = clock
+        self.rng = rng
+        self.temp_sensor = TraceSensor(clock, rng)
+        self.schedule = [
+            {
+                "sensor": self.temp_sensor,
+                "key": "bme280",
+                "period": None,
+                "last_check": None,
+                "ready_at": None,
+            }
+        ]
+        self.motion_mean_us = motion_mean_s * 1_000_000
+        self.motion_hold_us = motion_hold_ms * 1000
+        self.switch_mean_us = switch_mean_s * 1_000_000
+        now = clock.us()
+        self.next_motion = now + self._interval(self.motion_mean_us)
+        self.motion_until = 0
+        self.next_toggle = now + self._interval(self.switch_mean_us)
+        self.switch = "LOW"
+        self.previous_motion = "LOW"
+
+    def _interval(self, mean_us):
+        if not mean_us:
+            return math.inf
+        return int(self.rng.expovariate(1 / mean_us))
+
+    def start_temperature(self, sensor=None):
+        return 0
+
+    def read_temperature(self, sensor=None):
+        sensor = sensor or self.temp_sensor
+        result = {"temp_sensor_type": sensor.NAME}
+        sensor.read_into(result)
+        result["temperature_c"] = (result["temperature_f"] - 32) * 5 / 9
+        return result
+
+    def read_motion(self):
+        now = self.clock.us()
+        while now >= self.next_motion:
+            self.motion_until = self.next_motion + self.motion_hold_us
+            self.next_motion += max(1, self._interval(self.motion_mean_us))
+        motion = "HIGH" if now < self.motion_until else "LOW"
+        detected = motion == "HIGH" and self.previous_motion == "LOW"
+        self.previous_motion = motion
+        return {"motion": motion, "motion_detected": detected}
+
+    def read_switch(self):
+        now = self.clock.us()
+        changed = False
+        while now >= self.next_toggle:
+            self.switch = "HIGH" if self.switch == "LOW" else "LOW"
+            self.next_toggle += max(1, self._interval(self.switch_mean_us))
+            changed = True
+        return {"switch": self.switch, "switch_changed": changed}
+
+
+class _NoDisplay:
+    def is_initialized(self):
+        return False
+
+
+class _TimedAPI:
+    """Wraps a device's APIManager to time each publish() call."""
+
+    def __init__(self, api, clock, latencies):
+        self.api = api
+        self.clock = clock
+        self.latencies = latencies
+        self.failures = 0
+
+    def publish(self, json_payload):
+        start = self.clock.us()
+        ok = self.api.publish(json_payload)
+        if ok:
+            self.latencies.append(self.clock.us() - start)
+        else:
+            self.failures += 1
+        return ok
+
+    def deinit(self):
+        self.api.deinit()
+
+
+class Fleet:
+    """N devices sharing one board, network, broker and ingest receiver."""
+
+    def __init__(
+        self,
+        devices,
+        config=None,
+        motion_mean_s=300,
+        motion_hold_ms=4000,
+        switch_mean_s=1800,
+        broker_service_us=50,
+        api_service_us=2000,
+        latency_ms=2,
+        seed=1,
+    ):
+        self.board = Board()
+        self.clock = self.board.clock
+        net = self.board.network
+        net.latency_ms = latency_ms
+        self.broker = MQTTBroker(net, BROKER_HOST, service_us=broker_service_us)
+        self.api = HTTPServer(net, API_HOST, service_us=api_service_us)
+        self.api.accept(API_PATH)
+        self.config = config or default_config()
+        self.count = devices
+        self.traces = (motion_mean_s, motion_hold_ms, switch_mean_s)
+        self.seed = seed
+        self.states = []
+        self.api_latencies = []
+        self.lags = []
+        self.passes = 0
+
+    def _device_config(self, loader):
+        doc = dict(self.config)
+        doc["device_list"] = [
+            {"device_id": loader.device_id, "name": loader.device_id, "enabled": True}
+        ]
+        return loader._process_config(doc)
+
+    def boot(self):
+        """Bring up every device; must run after sim.install(self.board)."""
+        # Imported here: the firmware modules need the stand-ins installed
+        import runtime
+        from config.config_loader import ConfigLoader
+        from connections.http_pool import HTTPPool
+        from connections.wifi_manager import WiFiManager
+        from utils.aggregator import Aggregator
+        from utils.logger import Logger
+        from utils.payload_encoder import PayloadEncoder
+        from utils.uptime_tracker import UptimeTracker
+
+        self.runtime = runtime
+        logger = Logger.get_instance()
+        for i in range(self.count):
+            rng = random.Random(self.seed * 1_000_003 + i)
+            device_id = f"Fleet{i:04d}"
+            wifi = WiFiManager()
+            wifi.connect()
+            config = self._device_config(ConfigLoader(device_id))
+            agg_cfg = config.get("aggregation", {})
+            state = {
+                "oled": _NoDisplay(),
+                "logger": logger,
+                "device_id": device_id,
+                "uptime": UptimeTracker(),
+                "wifi": wifi,
+                "config": config,
+                "sensors": TraceSensors(self.clock, rng, *self.traces),
+                "mqtt": None,
+                "api": None,
+                "queues": {},
+                "aggregator": (
+                    Aggregator()
+                    if agg_cfg.get("enabled", False)
+                    else None
+                ),
+                "encoder": PayloadEncoder(),
+                "fan_pwm": None,
+                "fan_step": None,
+                "last_publish": 0,
+                "last_motion_pub": 0,
+                "last_motion_check": 0,
+                "last_switch_check": 0,
+                "last_temp_check": 0,
+                "config_applied": False,
+                "device_enabled": config.get("enabled", False),
+                "mqtt_cfg": {},
+                "mqtt_enabled": False,
+                "api_cfg": {},
+                "api_enabled": False,
+                "heartbeat_period": 60000,
+                "mqtt_reconnect_delay": 10000,
+                "motion_cooldown": 30000,
+                "motion_period": 500,
+                "switch_period": 500,
+                "temp_period": 30000,
+                "cfg_period": 60000,
+                "readings": {
+                    "temperature_f": None,
+                    "humidity": None,
+                    "pressure_inhg": None,
+                    "temp_sensor_type": "UNKNOWN",
+                    "motion": "UNKNOWN",
+                    "switch": "UNKNOWN",
+                    "fan_pwm_duty": 0,
+                    "fan_step_fans": 0,
+                    "version": "fleet",
+                    "sensors": {},
+                },
+            }
+            runtime._apply_config(state, config, time.ticks_ms())
+            if state["api"]:
+                # Separate hardware, separate keep-alive connections
+                state["api"].http = HTTPPool(
+                    HTTPPool.get_instance().idle_timeout_ms
+                )
+                state["api"] = _TimedAPI(state["api"], self.clock, self.api_latencies)
+            self.states.append(state)
+
+    def run(self, seconds):
+        """Run every device's loop until `seconds` of virtual time have passed."""
+        runtime = self.runtime
+        clock = self.clock
+        end = clock.us() + int(seconds * 1_000_000)
+        # Devices power up spread over the first loop period
+        rng = random.Random(self.seed)
+        queue = [(clock.us() + rng.randrange(500_000), i) for i in range(self.count)]
+        heapq.heapify(queue)
+        while queue:
+            due, i = heapq.heappop(queue)
+            if due >= end:
+                break
+            if due > clock.us():
+                clock.advance(due - clock.us())
+            self.lags.append(clock.us() - due)
+            state = self.states[i]
+            now = time.ticks_ms()
+            state["uptime"].update()
+            runtime._read_sensors(state, now)
+            runtime._maintain_connections(state, now)
+            runtime._publish(state, now)
+            self.passes += 1
+            next_due = clock.us() + runtime._loop_sleep_ms(state) * 1000
+            heapq.heappush(queue, (next_due, i))
+        for state in self.states:
+            if state.get("mqtt"):
+                state["mqtt"].disconnect()
+
+    def report(self, seconds, wall_s):
+        broker, api = self.broker, self.api
+        posts = [r for r in api.requests if r[0] == "POST"]
+        mqtt_bytes = sum(len(m[1]) for m in broker.messages)
+        api_bytes = sum(len(r[4]) for r in posts)
+        events = {}
+        for message in broker.messages:
+            event = json.loads(message[1]).get("event_type", "?")
+            events[event] = events.get(event, 0) + 1
+        failures = sum(
+            s["api"].failures for s in self.states if isinstance(s["api"], _TimedAPI)
+        )
+        return {
+            "devices": self.count,
+            "virtual_s": round(seconds, 1),
+            "wall_s": round(wall_s, 2),
+            "passes": self.passes,
+            "mqtt": {
+                "messages": len(broker.messages),
+                "msg_per_s": round(len(broker.messages) / seconds, 2),
+                "payload_bytes_per_s": round(mqtt_bytes / seconds, 1),
+                "wire_bytes_per_s": round(broker.bytes_in / seconds, 1),
+                "events": events,
+                "connects": broker.connects,
+                "duplicates": broker.duplicates,
+                "latency_ms": percentiles([m[5] for m in broker.messages]),
+            },
+            "api": {
+                "posts": len(posts),
+                "posts_per_s": round(len(posts) / seconds, 2),
+                "body_bytes_per_s": round(api_bytes / seconds, 1),
+                "failed_publishes": failures,
+                "server_latency_ms": percentiles([r[5] for r in posts]),
+                "publish_latency_ms": percentiles(self.api_latencies),
+            },
+            "network": {
+                "connections": self.board.network.connections,
+                "bytes_up_per_s": round(self.board.network.bytes_up / seconds, 1),
+            },
+            "lag_ms": percentiles(self.lags),
+        }
+
+
+def percentiles(samples_us):
+    """p50/p90/p99/max of microsecond samples, in milliseconds."""
+    if not samples_us:
+        return None
+    ordered = sorted(samples_us)
+    last = len(ordered) - 1
+
+    def at(q):
+        return round(ordered[min(last, int(q * len(ordered)))] / 1000, 3)
+
+    return {"p50": at(0.5), "p90": at(0.9), "p99": at(0.99), "max": at(1.0)}
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m sim.fleet", description=__doc__)
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=600, help="virtual run time")
+    parser.add_argument("--heartbeat-ms", type=int, default=60000)
+    parser.add_argument("--motion-cooldown-ms", type=int, default=30000)
+    parser.add_argument("--qos", type=int, choices=(0, 1), default=1)
+    parser.add_argument("--no-api", action="store_true", help="publish to MQTT only")
+    parser.add_argument(
+        "--motion-mean-s", type=float, default=300, help="mean time between motion"
+    )
+    parser.add_argument("--motion-hold-ms", type=int, default=4000)
+    parser.add_argument(
+        "--switch-mean-s", type=float, default=1800, help="mean time between toggles"
+    )
+    parser.add_argument(
+        "--broker-service-us", type=int, default=50, help="broker time per message"
+    )
+    parser.add_argument(
+        "--api-service-us", type=int, default=2000, help="receiver time per request"
+    )
+    parser.add_argument("--latency-ms", type=float, default=2, help="one-way latency")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def _format(report):
+    lines = [
+        f"{report['devices']} devices, {report['virtual_s']} s virtual in "
+        f"{report['wall_s']} s wall, {report['passes']} loop passes"
+    ]
+    for section in ("mqtt", "api", "network"):
+        lines.append(f"{section}:")
+        for key, value in report[section].items():
+            lines.append(f"  {key}: {value}")
+    lines.append(f"lag_ms: {report['lag_ms']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    config = default_config(
+        heartbeat_publish_period=args.heartbeat_ms,
+        motion_cooldown_wait_period=args.motion_cooldown_ms,
+    )
+    dgc = config["device_global_config"]
+    dgc["mqtt_config"]["qos"] = args.qos
+    dgc["api_config"]["enabled"] = not args.no_api
+    fleet = Fleet(
+        args.devices,
+        config,
+        motion_mean_s=args.motion_mean_s,
+        motion_hold_ms=args.motion_hold_ms,
+        switch_mean_s=args.switch_mean_s,
+        broker_service_us=args.broker_service_us,
+        api_service_us=args.api_service_us,
+        latency_ms=args.latency_ms,
+        seed=args.seed,
+    )
+    sim.install(fleet.board)
+    stdout = sys.stdout
+    start = time.perf_counter()
+    try:
+        # The firmware logs every step; thousands of devices' worth is noise
+        with open(os.devnull, "w") as devnull:
+            sys.stdout = devnull
+            try:
+                fleet.boot()
+                began = fleet.clock.seconds()
+                fleet.run(args.seconds)
+            finally:
+                sys.stdout = stdout
+        seconds = fleet.clock.seconds() - began
+        wall_s = time.perf_counter() - start
+    finally:
+        sim.uninstall()
+
+    report = fleet.report(seconds, wall_s)
+    print(json.dumps(report, indent=2) if args.json else _format(report))
+
+
+if __name__ == "__main__":
+    main()
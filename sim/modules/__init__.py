@@ -0,0 +1 @@
+# sim/modules/__init__.py - MicroPython module stand-ins, see sim.install()
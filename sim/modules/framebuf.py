@@ -0,0 +1,226 @@
+# sim/modules/framebuf.py - pure-Python framebuf with MicroPython's buffer layouts
+#
+# Pixel formats use the same memory layout as the C module, so drivers that
+# hand the buffer to a display (SSD1306 show()) send identical bytes. text()
+# has no copy of the built-in 8x8 ROM font and draws each glyph as a box.
+
+MONO_VLSB = 0
+MVLSB = MONO_VLSB
+RGB565 = 1
+GS4_HMSB = 2
+MONO_HLSB = 3
+MONO_HMSB = 4
+GS2_HMSB = 5
+GS8 = 6
+
+_BITS = {
+    MONO_VLSB: 1,
+    MONO_HLSB: 1,
+    MONO_HMSB: 1,
+    GS2_HMSB: 2,
+    GS4_HMSB: 4,
+    GS8: 8,
+    RGB565: 16,
+}
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format, stride=None):
+        if format not in _BITS:
+            raise ValueError("invalid format")
+        self.buffer = buffer
+        if isinstance(buffer, bytearray):
+            self.buf = buffer
+        else:
+            self.buf = memoryview(buffer).cast("B")
+        self.width = width
+        self.height = height
+        self.format = format
+        self.stride = width if stride is None else stride
+        if format in (MONO_HLSB, MONO_HMSB):
+            # Rows of the horizontal mono formats start on a byte boundary
+            self.stride = (self.stride + 7) & ~7
+        bits = _BITS[format]
+        if format == MONO_VLSB:
+            needed = ((height + 7) // 8) * self.stride
+        else:
+            needed = (self.stride * bits + 7) // 8 * height
+        if len(self.buf) < needed:
+            raise ValueError("buffer too small")
+        self._get, self._set = {
+            MONO_VLSB: (self._get_vlsb, self._set_vlsb),
+            MONO_HLSB: (self._get_hlsb, self._set_hlsb),
+            MONO_HMSB: (self._get_hmsb, self._set_hmsb),
+            GS2_HMSB: (self._get_gs2, self._set_gs2),
+            GS4_HMSB: (self._get_gs4, self._set_gs4),
+            GS8: (self._get_gs8, self._set_gs8),
+            RGB565: (self._get_rgb565, self._set_rgb565),
+        }[format]
+
+    # -- per-format pixel access ---------------------------------------------------
+
+    def _get_vlsb(self, x, y):
+        return self.buf[(y >> 3) * self.stride + x] >> (y & 7) & 1
+
+    def _set_vlsb(self, x, y, c):
+        i = (y >> 3) * self.stride + x
+        mask = 1 << (y & 7)
+        self.buf[i] = self.buf[i] | mask if c & 1 else self.buf[i] & ~mask
+
+    def _get_hlsb(self, x, y):
+        i = (x + y * self.stride) >> 3
+        return self.buf[i] >> (7 - (x & 7)) & 1
+
+    def _set_hlsb(self, x, y, c):
+        i = (x + y * self.stride) >> 3
+        mask = 0x80 >> (x & 7)
+        self.buf[i] = self.buf[i] | mask if c & 1 else self.buf[i] & ~mask
+
+    def _get_hmsb(self, x, y):
+        i = (x + y * self.stride) >> 3
+        return self.buf[i] >> (x & 7) & 1
+
+    def _set_hmsb(self, x, y, c):
+        i = (x + y * self.stride) >> 3
+        mask = 1 << (x & 7)
+        self.buf[i] = self.buf[i] | mask if c & 1 else self.buf[i] & ~mask
+
+    def _get_gs2(self, x, y):
+        i = (x + y * self.stride) >> 2
+        return self.buf[i] >> ((x & 3) << 1) & 3
+
+    def _set_gs2(self, x, y, c):
+        i = (x + y * self.stride) >> 2
+        shift = (x & 3) << 1
+        self.buf[i] = self.buf[i] & ~(3 << shift) | (c & 3) << shift
+
+    def _get_gs4(self, x, y):
+        i = (x + y * self.stride) >> 1
+        return self.buf[i] & 0x0F if x & 1 else self.buf[i] >> 4
+
+    def _set_gs4(self, x, y, c):
+        i = (x + y * self.stride) >> 1
+        if x & 1:
+            self.buf[i] = self.buf[i] & 0xF0 | c & 0x0F
+        else:
+            self.buf[i] = self.buf[i] & 0x0F | (c & 0x0F) << 4
+
+    def _get_gs8(self, x, y):
+        return self.buf[x + y * self.stride]
+
+    def _set_gs8(self, x, y, c):
+        self.buf[x + y * self.stride] = c & 0xFF
+
+    def _get_rgb565(self, x, y):
+        i = (x + y * self.stride) * 2
+        return self.buf[i] | self.buf[i + 1] << 8
+
+    def _set_rgb565(self, x, y, c):
+        i = (x + y * self.stride) * 2
+        self.buf[i] = c & 0xFF
+        self.buf[i + 1] = c >> 8 & 0xFF
+
+    # -- drawing -----------------------------------------------------------------------
+
+    def fill(self, c):
+        if self.format in (MONO_VLSB, MONO_HLSB, MONO_HMSB):
+            value = 0xFF if c & 1 else 0
+            self.buf[:] = bytes((value,)) * len(self.buf)
+        else:
+            self.fill_rect(0, 0, self.width, self.height, c)
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    def fill_rect(self, x, y, w, h, c):
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(self.width, x + w), min(self.height, y + h)
+        if x0 >= x1 or y0 >= y1:
+            return
+        if self.format == MONO_VLSB:
+            # One masked byte per column and page rather than a call per pixel
+            buf, stride = self.buf, self.stride
+            for page in range(y0 >> 3, ((y1 - 1) >> 3) + 1):
+                lo = max(y0, page * 8) - page * 8
+                hi = min(y1, page * 8 + 8) - page * 8
+                mask = ((1 << (hi - lo)) - 1) << lo
+                base = page * stride
+                for i in range(base + x0, base + x1):
+                    buf[i] = buf[i] | mask if c & 1 else buf[i] & ~mask
+            return
+        setp = self._set
+        for yy in range(y0, y1):
+            for xx in range(x0, x1):
+                setp(xx, yy, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        dx, dy = abs(x2 - x1), -abs(y2 - y1)
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x1, y1, c)
+            if x1 == x2 and y1 == y2:
+                return
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x1 += sx
+            if e2 <= dx:
+                err += dx
+                y1 += sy
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if isinstance(fbuf, tuple):
+            fbuf = FrameBuffer(*fbuf)
+        x0, y0 = max(0, x), max(0, y)
+        x1 = min(self.width, x + fbuf.width)
+        y1 = min(self.height, y + fbuf.height)
+        get, setp = fbuf._get, self._set
+        pal = palette._get if palette is not None else None
+        for yy in range(y0, y1):
+            sy = yy - y
+            for xx in range(x0, x1):
+                c = get(xx - x, sy)
+                if pal is not None:
+                    c = pal(c, 0)
+                if c != key:
+                    setp(xx, yy, c)
+
+    def scroll(self, xstep, ystep):
+        w, h = self.width, self.height
+        xs = range(w - 1, -1, -1) if xstep > 0 else range(w)
+        ys = range(h - 1, -1, -1) if ystep > 0 else range(h)
+        get, setp = self._get, self._set
+        for y in ys:
+            sy = y - ystep
+            if not 0 <= sy < h:
+                continue
+            for x in xs:
+                sx = x - xstep
+                if 0 <= sx < w:
+                    setp(x, y, get(sx, sy))
+
+    def text(self, s, x, y, c=1):
+        for i, ch in enumerate(s):
+            if ch != " ":
+                self.rect(x + i * 8 + 1, y + 1, 6, 7, c)
@@ -0,0 +1,233 @@
+# sim/modules/machine.py - machine module stand-in for the simulated board
+
+from sim import board as _board
+from sim.board import MachineReset
+
+
+def _pin_id(pin):
+    return pin.id if isinstance(pin, Pin) else pin
+
+
+class Pin:
+    IN = _board.MODE_IN
+    OUT = _board.MODE_OUT
+    OPEN_DRAIN = _board.MODE_OPEN_DRAIN
+    ALT = 3
+    PULL_UP = _board.PULL_UP
+    PULL_DOWN = _board.PULL_DOWN
+    IRQ_FALLING = _board.IRQ_FALLING
+    IRQ_RISING = _board.IRQ_RISING
+
+    def __init__(self, id, mode=-1, pull=-1, *, value=None):
+        board = _board.current()
+        self.id = id
+        self._state = board.pin(id)
+        board.handles[id] = self
+        if mode != -1 or pull != -1 or value is not None:
+            self.init(mode, pull, value=value)
+
+    def init(self, mode=-1, pull=-1, *, value=None):
+        self._state.configure(None if mode == -1 else mode, pull, value)
+
+    def value(self, x=None):
+        if x is None:
+            return self._state.level()
+        self._state.write(x)
+
+    __call__ = value
+
+    def on(self):
+        self._state.write(1)
+
+    def off(self):
+        self._state.write(0)
+
+    high = on
+    low = off
+
+    def toggle(self):
+        self._state.write(not self._state.out)
+
+    def mode(self, mode=None):
+        if mode is None:
+            return self._state.mode
+        self._state.configure(mode)
+
+    def pull(self, pull=None):
+        if pull is None:
+            return self._state.pull
+        self._state.configure(None, pull)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        self._state.handler = handler
+        self._state.trigger = trigger if handler is not None else 0
+        return self
+
+    def __repr__(self):
+        return f"Pin({self.id!r}, mode={self._state.mode}, pull={self._state.pull})"
+
+
+class ADC:
+    CORE_TEMP = 4
+
+    def __init__(self, pin):
+        pin = _pin_id(pin)
+        # GPIO26-29 are ADC0-3; small numbers are channels
+        self.channel = pin - 26 if isinstance(pin, int) and pin >= 26 else pin
+
+    def read_u16(self):
+        volts = _board.current().adc_volts(self.channel)
+        raw12 = max(0, min(4095, int(volts / 3.3 * 4095 + 0.5)))
+        # 12-bit result scaled to 16 bits as the rp2 port does
+        return raw12 << 4 | raw12 >> 8
+
+
+class PWM:
+    def __init__(self, dest, *, freq=None, duty_u16=None, duty_ns=None):
+        self.pin = _pin_id(dest)
+        self._out = _board.current().pwm.setdefault(
+            self.pin, {"freq": 0, "duty_u16": 0, "changes": 0}
+        )
+        if freq is not None:
+            self.freq(freq)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+        if duty_ns is not None:
+            self.duty_ns(duty_ns)
+
+    def freq(self, value=None):
+        if value is None:
+            return self._out["freq"]
+        if not 8 <= value <= 62_500_000:
+            raise ValueError("freq too small" if value < 8 else "freq too large")
+        self._out["freq"] = value
+
+    def duty_u16(self, value=None):
+        if value is None:
+            return self._out["duty_u16"]
+        self._out["duty_u16"] = max(0, min(65535, int(value)))
+        self._out["changes"] += 1
+
+    def duty_ns(self, value=None):
+        period_ns = 1_000_000_000 // max(1, self._out["freq"])
+        if value is None:
+            return self._out["duty_u16"] * period_ns // 65535
+        self.duty_u16(value * 65535 // period_ns)
+
+    def deinit(self):
+        self._out["duty_u16"] = 0
+        self._out["freq"] = 0
+
+
+def _hardware_block(scl, sda):
+    # Same pin muxing as the RP2040: I2C0 on SDA 0/4/8/... and SCL 1/5/9/...,
+    # I2C1 on SDA 2/6/10/... and SCL 3/7/11/...
+    if not (0 <= scl < 30 and 0 <= sda < 30):
+        return None
+    if sda % 4 == 0 and scl % 4 == 1:
+        return 0
+    if sda % 4 == 2 and scl % 4 == 3:
+        return 1
+    return None
+
+
+class SoftI2C:
+    def __init__(self, scl, sda, *, freq=400_000, timeout=50_000):
+        self.init(scl, sda, freq=freq, timeout=timeout)
+
+    def init(self, scl, sda, *, freq=400_000, timeout=50_000):
+        self.scl = _pin_id(scl)
+        self.sda = _pin_id(sda)
+        self.freq = freq
+        self._bus = _board.current().i2c_bus(self.scl, self.sda)
+
+    def scan(self):
+        # One address probe for each of 0x08-0x77
+        self._bus.clock_bytes(111, self.freq)
+        return sorted(
+            address for address, device in self._bus.devices.items() if device.present
+        )
+
+    def writeto(self, addr, buf, stop=True):
+        device = self._bus.device(addr)
+        self._bus.clock_bytes(len(buf), self.freq)
+        device.write(bytes(buf))
+        return len(buf)
+
+    def writevto(self, addr, vector, stop=True):
+        data = b"".join(bytes(b) for b in vector)
+        return self.writeto(addr, data, stop)
+
+    def readfrom(self, addr, nbytes, stop=True):
+        device = self._bus.device(addr)
+        self._bus.clock_bytes(nbytes, self.freq)
+        return bytes(device.read(nbytes))
+
+    def readfrom_into(self, addr, buf, stop=True):
+        buf[:] = self.readfrom(addr, len(buf), stop)
+
+    def writeto_mem(self, addr, memaddr, buf, *, addrsize=8):
+        device = self._bus.device(addr)
+        self._bus.clock_bytes(addrsize // 8 + len(buf), self.freq)
+        device.write(memaddr.to_bytes(addrsize // 8, "big") + bytes(buf))
+
+    def readfrom_mem(self, addr, memaddr, nbytes, *, addrsize=8):
+        device = self._bus.device(addr)
+        self._bus.clock_bytes(addrsize // 8 + 1 + nbytes, self.freq)
+        device.write(memaddr.to_bytes(addrsize // 8, "big"))
+        return bytes(device.read(nbytes))
+
+    def readfrom_mem_into(self, addr, memaddr, buf, *, addrsize=8):
+        buf[:] = self.readfrom_mem(addr, memaddr, len(buf), addrsize=addrsize)
+
+
+class I2C(SoftI2C):
+    def __init__(self, id, *, scl=None, sda=None, freq=400_000, timeout=50_000):
+        if scl is None or sda is None:
+            raise ValueError("scl and sda pins are required")
+        if _hardware_block(_pin_id(scl), _pin_id(sda)) != id:
+            raise ValueError(f"bad SCL/SDA pins for I2C({id})")
+        super().__init__(scl, sda, freq=freq, timeout=timeout)
+        self.id = id
+
+
+def disable_irq():
+    return _board.current().clock.disable_irq()
+
+
+def enable_irq(state=True):
+    _board.current().clock.enable_irq(state)
+
+
+def reset():
+    raise MachineReset("machine.reset()")
+
+
+def soft_reset():
+    raise MachineReset("machine.soft_reset()")
+
+
+def reset_cause():
+    return PWRON_RESET
+
+
+def unique_id():
+    return _board.current().unique_id
+
+
+def freq(hz=None):
+    return 125_000_000
+
+
+def idle():
+    _board.current().clock.advance(1000, interruptible=True)
+
+
+def lightsleep(ms=None):
+    _board.current().clock.advance((ms or 0) * 1000, interruptible=True)
+
+
+deepsleep = lightsleep
+
+PWRON_RESET = 1
+WDT_RESET = 3
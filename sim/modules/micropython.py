@@ -0,0 +1,48 @@
+# sim/modules/micropython.py - micropython module stand-in
+#
+# The native code emitters (native, viper, asm_thumb) are deliberately
+# absent: importing a module that uses them fails with AttributeError (a
+# port without them raises SyntaxError instead), so firmware that guards
+# such imports takes its pure-Python fallback.
+
+
+def const(expr):
+    return expr
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def opt_level(level=None):
+    return 0 if level is None else None
+
+
+def mem_info(verbose=False):
+    import gc
+
+    print(f"heap: {gc.mem_alloc()} used, {gc.mem_free()} free")
+
+
+def qstr_info(verbose=False):
+    pass
+
+
+def stack_use():
+    return 0
+
+
+def heap_lock():
+    return 0
+
+
+def heap_unlock():
+    return 0
+
+
+def kbd_intr(chr):
+    pass
+
+
+def schedule(func, arg):
+    func(arg)
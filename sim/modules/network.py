@@ -0,0 +1,67 @@
+# sim/modules/network.py - network module stand-in (CYW43 station interface)
+
+from sim import board as _board
+
+STA_IF = 0
+AP_IF = 1
+
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_WRONG_PASSWORD = -3
+STAT_NO_AP_FOUND = -2
+STAT_CONNECT_FAIL = -1
+STAT_GOT_IP = 3
+
+
+class WLAN:
+    def __init__(self, interface_id=STA_IF):
+        self._w = _board.current().wlan
+
+    def active(self, is_active=None):
+        if is_active is None:
+            return self._w.active
+        self._w.active = bool(is_active)
+        if not is_active:
+            self._w.requested = None
+
+    def connect(self, ssid=None, key=None, *, bssid=None):
+        w = self._w
+        if not w.active:
+            w.active = True
+        w.requested = (ssid, key)
+        w.connected_at = w.clock.us() + w.connect_ms * 1000
+        w.connects += 1
+
+    def disconnect(self):
+        self._w.requested = None
+
+    def isconnected(self):
+        return self._w.connected()
+
+    def status(self, param=None):
+        if param is None:
+            return self._w.status()
+        if param == "rssi":
+            if not self._w.connected():
+                raise OSError("not connected")
+            return _board.value_at(self._w.rssi, self._w.clock)
+        raise ValueError(f"unknown status param: {param}")
+
+    def ifconfig(self, config=None):
+        if config is not None:
+            self._w.ip = config[0]
+            return None
+        ip = self._w.ip if self._w.connected() else "0.0.0.0"
+        return (ip, "255.255.255.0", "192.168.6.1", "192.168.6.1")
+
+    def config(self, *args, **kwargs):
+        if args == ("mac",):
+            return _board.current().unique_id[:6]
+        if args == ("ssid",):
+            return self._w.ssid
+        return None
+
+    def scan(self):
+        if not self._w.up():
+            return []
+        return [(self._w.ssid.encode(), b"\x00" * 6, 6, self._w.rssi, 3, False)]
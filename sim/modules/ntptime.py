@@ -0,0 +1,23 @@
+# sim/modules/ntptime.py - ntptime stand-in; the virtual clock already has wall time
+
+import errno
+import time as _time
+
+from sim import board as _board
+
+host = "pool.ntp.org"
+timeout = 1
+
+
+def time():
+    board = _board.current()
+    if not board.wlan.connected():
+        board.clock.advance(timeout * 1_000_000)
+        raise OSError(errno.ETIMEDOUT)
+    board.clock.advance(board.network.latency_ms * 2000)
+    return int(_time.time())
+
+
+def settime():
+    time()
+    _board.current().ntp_synced = True
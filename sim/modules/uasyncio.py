@@ -0,0 +1,123 @@
+# sim/modules/uasyncio.py - uasyncio on CPython's asyncio, driven by the virtual clock
+#
+# The event loop reads time from the board's clock and, instead of blocking
+# in select(), advances the clock to the next timer. Interrupts raised on
+# the way (pin edges) cut the wait short, so a ThreadSafeFlag set from an
+# IRQ wakes its waiter at the edge's virtual time.
+
+import asyncio as _asyncio
+import math
+import selectors as _selectors
+
+from asyncio import (
+    CancelledError,
+    Event,
+    Lock,
+    Task,
+    TimeoutError,
+    create_task,
+    current_task,
+    gather,
+    sleep,
+    wait_for,
+)
+
+from sim import board as _board
+
+__all__ = [
+    "CancelledError",
+    "Event",
+    "Lock",
+    "Task",
+    "ThreadSafeFlag",
+    "TimeoutError",
+    "create_task",
+    "current_task",
+    "gather",
+    "get_event_loop",
+    "new_event_loop",
+    "run",
+    "sleep",
+    "sleep_ms",
+    "wait_for",
+    "wait_for_ms",
+]
+
+
+class _VirtualSelector(_selectors.SelectSelector):
+    def select(self, timeout=None):
+        clock = _board.current().clock
+        if timeout is None:
+            # Only an interrupt can wake the loop now
+            due = clock.next_event_us()
+            if due is None:
+                raise RuntimeError("uasyncio: all tasks wait and nothing is scheduled")
+            clock.advance(due - clock.us(), interruptible=True)
+        elif timeout > 0:
+            # Round up: a timer less than 1us away must still come due
+            clock.advance(math.ceil(timeout * 1_000_000), interruptible=True)
+        return []
+
+
+class _VirtualLoop(_asyncio.SelectorEventLoop):
+    def __init__(self):
+        super().__init__(_VirtualSelector())
+        self._clock_resolution = 1e-6
+
+    def time(self):
+        return _board.current().clock.seconds()
+
+
+class ThreadSafeFlag:
+    def __init__(self):
+        self._event = Event()
+
+    def set(self):
+        self._event.set()
+
+    def clear(self):
+        self._event.clear()
+
+    async def wait(self):
+        await self._event.wait()
+        self._event.clear()
+
+
+def sleep_ms(ms):
+    return sleep(ms / 1000)
+
+
+def wait_for_ms(aw, timeout):
+    return wait_for(aw, timeout / 1000)
+
+
+def new_event_loop():
+    loop = _VirtualLoop()
+    _asyncio.set_event_loop(loop)
+    return loop
+
+
+def get_event_loop():
+    try:
+        return _asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    loop = _asyncio.get_event_loop_policy().get_event_loop()
+    if not isinstance(loop, _VirtualLoop):
+        loop = new_event_loop()
+    return loop
+
+
+def run(coro):
+    loop = new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        # Stopped by an exception (e.g. the simulation time limit): let the
+        # remaining tasks unwind so the loop closes cleanly
+        pending = [t for t in _asyncio.all_tasks(loop) if not t.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(gather(*pending, return_exceptions=True))
+        loop.close()
@@ -0,0 +1,19 @@
+# sim/modules/uctypes.py - the parts of uctypes the display writer uses
+#
+# There are no raw addresses on the host: addressof() hands out a token for
+# the object and bytearray_at() maps it back to a view of the same memory.
+
+_objects = {}
+
+
+def addressof(obj):
+    _objects[id(obj)] = obj
+    return id(obj)
+
+
+def bytearray_at(addr, size):
+    return memoryview(_objects[addr]).cast("B")[:size]
+
+
+def bytes_at(addr, size):
+    return bytes(bytearray_at(addr, size))
@@ -0,0 +1,22 @@
+# sim/modules/usocket.py - usocket stand-in backed by the board's virtual network
+
+from sim import board as _board
+from sim.net import VirtualSocket
+
+AF_INET = 2
+SOCK_STREAM = 1
+SOCK_DGRAM = 2
+IPPROTO_TCP = 6
+SOL_SOCKET = 1
+SO_REUSEADDR = 4
+
+
+def getaddrinfo(host, port, af=0, type=0, proto=0, flags=0):
+    addr = _board.current().network.resolve(host, port)
+    return [(AF_INET, SOCK_STREAM, IPPROTO_TCP, "", addr)]
+
+
+def socket(af=AF_INET, type=SOCK_STREAM, proto=IPPROTO_TCP):
+    if type != SOCK_STREAM:
+        raise OSError(95)  # EOPNOTSUPP: only TCP is simulated
+    return VirtualSocket(_board.current().network)
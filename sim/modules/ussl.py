@@ -0,0 +1,7 @@
+# sim/modules/ussl.py - ussl stand-in: TLS is not simulated, traffic stays plain
+
+
+def wrap_socket(
+    sock, server_side=False, key=None, cert=None, server_hostname=None, **kwargs
+):
+    return sock
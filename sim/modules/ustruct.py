@@ -0,0 +1,13 @@
+# sim/modules/ustruct.py - ustruct stand-in with MicroPython's buffer rules
+#
+# MicroPython's unpack() only requires the buffer to be long enough, so
+# drivers pass whole register reads and unpack a prefix; CPython insists on
+# an exact size.
+
+from struct import calcsize, pack, pack_into, unpack_from
+
+__all__ = ["calcsize", "pack", "pack_into", "unpack", "unpack_from"]
+
+
+def unpack(fmt, data):
+    return unpack_from(fmt, data)
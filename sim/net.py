@@ -0,0 +1,237 @@
+# sim/net.py
+
+import errno
+from collections import deque
+
+
+class Connection:
+    """
+    Server side of one accepted TCP connection. Servers push response bytes
+    with send(); they become readable by the client after the network's
+    latency plus any per-call `delay_ms`.
+    """
+
+    def __init__(self, network, sock):
+        self.network = network
+        self.sock = sock
+        self.open = True
+
+    def send(self, data, delay_ms=0):
+        if not self.open or self.sock.closed:
+            return
+        clock = self.network.clock
+        ready = clock.us() + int((self.network.latency_ms + delay_ms) * 1000)
+        self.sock.rx.append([ready, bytes(data)])
+        self.network.bytes_down += len(data)
+
+    def close(self, delay_ms=0):
+        """Close from the server side; the client reads b"" after pending data."""
+        if self.open:
+            self.open = False
+            clock = self.network.clock
+            self.sock.peer_closed_at = clock.us() + int(
+                (self.network.latency_ms + delay_ms) * 1000
+            )
+
+
+class VirtualNetwork:
+    """
+    In-process TCP network reached through the usocket stand-in. Servers
+    listen on (host, port) with a handler factory; a connection only
+    succeeds while the WLAN is up.
+    """
+
+    def __init__(self, clock, wlan):
+        self.clock = clock
+        self.wlan = wlan
+        self.listeners = {}
+        self.latency_ms = 2
+        self.connections = 0
+        self.bytes_up = 0
+        self.bytes_down = 0
+
+    def listen(self, host, port, factory):
+        """factory(connection) returns an object with received(data) and closed()."""
+        self.listeners[(host, port)] = factory
+
+    def resolve(self, host, port):
+        if not self.wlan.connected():
+            raise OSError(-2)  # lwIP reports no DNS server as EAI_NONAME
+        for lhost, lport in self.listeners:
+            if lhost == host:
+                return (host, port)
+        raise OSError(-2)
+
+    def connect(self, sock, addr):
+        if not self.wlan.connected():
+            raise OSError(errno.EHOSTUNREACH)
+        factory = self.listeners.get(tuple(addr))
+        if factory is None:
+            self.clock.advance(self.latency_ms * 1000)
+            raise OSError(errno.ECONNREFUSED)
+        self.clock.advance(self.latency_ms * 2000)  # SYN / SYN-ACK
+        self.connections += 1
+        conn = Connection(self, sock)
+        return conn, factory(conn)
+
+
+class VirtualSocket:
+    """TCP client socket with MicroPython stream semantics."""
+
+    def __init__(self, network):
+        self.network = network
+        self.timeout = None
+        self.blocking = True
+        self.rx = deque()  # [ready_us, bytes]
+        self.conn = None
+        self.handler = None
+        self.closed = False
+        self.peer_closed_at = None
+
+    def settimeout(self, value):
+        self.timeout = value
+        self.blocking = value != 0
+
+    def setblocking(self, flag):
+        self.blocking = bool(flag)
+        self.timeout = None if flag else 0
+
+    def setsockopt(self, *args):
+        pass
+
+    def connect(self, addr):
+        if self.conn is not None:
+            raise OSError(errno.EISCONN)
+        self.conn, self.handler = self.network.connect(self, addr)
+
+    def _check_link(self):
+        if self.closed:
+            raise OSError(errno.EBADF)
+        if self.conn is None:
+            raise OSError(errno.ENOTCONN)
+        if not self.network.wlan.connected():
+            raise OSError(errno.ECONNRESET)
+
+    def write(self, buf, n=None):
+        self._check_link()
+        if isinstance(buf, str):
+            buf = buf.encode()
+        data = bytes(buf if n is None else memoryview(buf)[:n])
+        if not self.conn.open:
+            raise OSError(errno.ECONNRESET)
+        self.network.bytes_up += len(data)
+        self.handler.received(data)
+        return len(data)
+
+    send = write
+
+    def sendall(self, buf):
+        self.write(buf)
+
+    def _wait_readable(self):
+        """
+        True once data (or EOF) is readable, advancing the clock for a
+        blocking socket; False for a non-blocking one with nothing ready.
+        Raises ETIMEDOUT when the timeout passes first.
+        """
+        clock = self.network.clock
+        while True:
+            self._check_link()
+            now = clock.us()
+            if self.rx and self.rx[0][0] <= now:
+                return True
+            if self._eof():
+                return True
+            if not self.blocking:
+                return False
+            due = None
+            if self.rx:
+                due = self.rx[0][0]
+            elif self.peer_closed_at is not None:
+                due = self.peer_closed_at
+            if due is None:
+                # Nothing will ever arrive: a real socket would block until
+                # its timeout (or forever); wait out the timeout and fail
+                if self.timeout:
+                    clock.advance(int(self.timeout * 1_000_000))
+                raise OSError(errno.ETIMEDOUT)
+            if self.timeout is not None and due - now > self.timeout * 1_000_000:
+                clock.advance(int(self.timeout * 1_000_000))
+                raise OSError(errno.ETIMEDOUT)
+            clock.advance(due - now)
+
+    def _eof(self):
+        return (
+            not self.rx
+            and self.peer_closed_at is not None
+            and self.network.clock.us() >= self.peer_closed_at
+        )
+
+    def _take(self, out, n, until=None):
+        """Move ready bytes into `out`, up to n (all if n < 0) or `until`."""
+        now = self.network.clock.us()
+        while self.rx and self.rx[0][0] <= now and (n < 0 or len(out) < n):
+            chunk = self.rx[0]
+            data = chunk[1]
+            take = len(data) if n < 0 else min(n - len(out), len(data))
+            if until is not None:
+                i = data.find(until, 0, take)
+                if i >= 0:
+                    take = i + 1
+            out += data[:take]
+            if take == len(data):
+                self.rx.popleft()
+            else:
+                chunk[1] = data[take:]
+            if until is not None and out.endswith(until):
+                return True
+        return False
+
+    def read(self, n=-1):
+        # Like MicroPython's stream read: a blocking read(n) returns n bytes
+        # unless EOF or a timeout comes first; read() reads to EOF
+        if not self._wait_readable():
+            return None
+        out = bytearray()
+        while True:
+            self._take(out, n)
+            if (n >= 0 and len(out) >= n) or not self.blocking or self._eof():
+                return bytes(out)
+            try:
+                self._wait_readable()
+            except OSError:
+                if out:
+                    return bytes(out)
+                raise
+
+    recv = read
+
+    def readline(self):
+        if not self._wait_readable():
+            return None
+        out = bytearray()
+        while True:
+            if self._take(out, -1, b"\n") or not self.blocking or self._eof():
+                return bytes(out)
+            try:
+                self._wait_readable()
+            except OSError:
+                if out:
+                    return bytes(out)
+                raise
+
+    def readinto(self, buf, nbytes=None):
+        n = len(buf) if nbytes is None else nbytes
+        data = self.read(n)
+        if data is None:
+            return None
+        buf[: len(data)] = data
+        return len(data)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.conn is not None and self.conn.open:
+            self.conn.open = False
+            self.handler.closed()
@@ -0,0 +1,244 @@
+# sim/onewire_bus.py
+
+from sim.board import value_at
+
+# Master low time that the devices interpret as each kind of slot (us)
+RESET_MIN_US = 480
+WRITE0_MIN_US = 15
+SLOT_MAX_US = 120
+# Device responses, measured from the master's release of the line
+PRESENCE_DELAY_US = 15
+PRESENCE_US = 120
+# A device transmitting 0 holds the line this long after the slot started
+HOLD_US = 30
+
+# Protocol generators yield RX to receive a bit, or the bit to transmit
+RX = None
+
+_SEARCH_ROM = 0xF0
+_READ_ROM = 0x33
+_MATCH_ROM = 0x55
+_SKIP_ROM = 0xCC
+_CONVERT = 0x44
+_RD_SCRATCHPAD = 0xBE
+_WR_SCRATCHPAD = 0x4E
+_COPY_SCRATCHPAD = 0x48
+_RECALL = 0xB8
+_RD_POWER_SUPPLY = 0xB4
+
+
+def crc8(data):
+    crc = 0
+    for byte in data:
+        for _ in range(8):
+            mix = (crc ^ byte) & 1
+            crc >>= 1
+            if mix:
+                crc ^= 0x8C
+            byte >>= 1
+    return crc
+
+
+class OneWireBus:
+    """
+    A 1-Wire line on one GPIO, modelled at the bit-slot level. Slots are
+    classified by how long the master held the line low, exactly as the
+    slave silicon does it: 480us and up is a reset, under 15us is a write-1
+    or read slot, 15-120us is a write-0. Devices answer by holding the line
+    low, and the pin reads the wired-AND of master and devices.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.devices = []
+        self.low_since = None
+        self.hold_from = 0
+        self.hold_until = 0
+        self.resets = 0
+        self.slots = 0
+
+    def add(self, device):
+        device.clock = self.clock
+        self.devices.append(device)
+        return device
+
+    def master_changed(self, driving_low):
+        now = self.clock.us()
+        if driving_low:
+            if self.low_since is None:
+                self.low_since = now
+            return
+        if self.low_since is None:
+            return
+        low_us = now - self.low_since
+        started = self.low_since
+        self.low_since = None
+        self._slot(now, started, low_us)
+
+    def _slot(self, now, started, low_us):
+        devices = [d for d in self.devices if d.present]
+        if low_us >= RESET_MIN_US:
+            self.resets += 1
+            presence = False
+            for device in devices:
+                device.reset()
+                presence = True
+            if presence:
+                start = now + PRESENCE_DELAY_US
+                self._hold(start, start + PRESENCE_US)
+            return
+        if low_us >= SLOT_MAX_US:
+            return  # Too long for a slot, too short for a reset: ignored
+        self.slots += 1
+        bit = 1 if low_us < WRITE0_MIN_US else 0
+        line = 1
+        for device in devices:
+            line &= device.slot(bit)
+        if not line:
+            self._hold(now, started + HOLD_US)
+
+    def _hold(self, start, end):
+        self.hold_from = start
+        self.hold_until = end
+
+    def line_level(self):
+        if self.low_since is not None:
+            return 0
+        now = self.clock.us()
+        return 0 if self.hold_from <= now < self.hold_until else 1
+
+
+class DS18B20:
+    """
+    Maxim DS18B20 probe: ROM commands including the search algorithm,
+    CONVERT T with the datasheet conversion time for the configured
+    resolution (read slots return 0 until it completes), and the
+    scratchpad with its CRC. Like the real part it reads 85 C until the
+    first conversion. `temperature_c` may be a callable of virtual seconds;
+    `corrupt_reads` flips a bit in that many scratchpad reads.
+    """
+
+    FAMILY = 0x28
+    CONVERSION_MS = {9: 94, 10: 188, 11: 375, 12: 750}
+
+    def __init__(self, serial, temperature_c=21.5):
+        rom = bytes((self.FAMILY,)) + serial.to_bytes(6, "little")
+        self.rom = rom + bytes((crc8(rom),))
+        self.temperature_c = temperature_c
+        self.present = True
+        self.corrupt_reads = 0
+        self.clock = None
+        self.scratchpad = bytearray(b"\x50\x05\x4b\x46\x7f\xff\x0c\x10\x00")
+        self._seal()
+        self.converting_until = None
+        self.conversions = 0
+        self.protocol = None
+        self.request = RX
+
+    def _seal(self):
+        self.scratchpad[8] = crc8(self.scratchpad[:8])
+
+    @property
+    def resolution(self):
+        return 9 + (self.scratchpad[4] >> 5 & 3)
+
+    def reset(self):
+        self._latch()
+        self.protocol = self._rom_phase()
+        self.request = next(self.protocol)
+
+    def slot(self, master_bit):
+        """One bit slot; returns the level this device drives (1 = released)."""
+        if self.protocol is None:
+            return 1
+        request = self.request
+        if request is RX:
+            driven = 1
+            sent = master_bit
+        else:
+            driven = request() if callable(request) else request
+            sent = None
+        try:
+            self.request = self.protocol.send(sent)
+        except StopIteration:
+            self.protocol = None
+        return driven
+
+    # -- protocol ------------------------------------------------------------------
+
+    def _rx_byte(self):
+        value = 0
+        for i in range(8):
+            bit = yield RX
+            value |= bit << i
+        return value
+
+    def _tx_bytes(self, data):
+        for byte in data:
+            for i in range(8):
+                yield byte >> i & 1
+
+    def _rom_phase(self):
+        command = yield from self._rx_byte()
+        if command == _SKIP_ROM:
+            yield from self._function_phase()
+        elif command == _MATCH_ROM:
+            rom = bytearray(8)
+            for i in range(8):
+                rom[i] = yield from self._rx_byte()
+            if bytes(rom) == self.rom:
+                yield from self._function_phase()
+        elif command == _READ_ROM:
+            yield from self._tx_bytes(self.rom)
+        elif command == _SEARCH_ROM:
+            for i in range(64):
+                bit = self.rom[i // 8] >> (i % 8) & 1
+                yield bit
+                yield 1 - bit
+                chosen = yield RX
+                if chosen != bit:
+                    return  # Deselected until the next reset
+            yield from self._function_phase()
+
+    def _function_phase(self):
+        command = yield from self._rx_byte()
+        if command == _CONVERT:
+            self.conversions += 1
+            conversion_us = self.CONVERSION_MS[self.resolution] * 1000
+            self.converting_until = self.clock.us() + conversion_us
+            while True:
+                yield self._conversion_done
+        elif command == _RD_SCRATCHPAD:
+            self._latch()
+            data = bytearray(self.scratchpad)
+            if self.corrupt_reads:
+                self.corrupt_reads -= 1
+                data[0] ^= 0x01
+            yield from self._tx_bytes(data)
+        elif command == _WR_SCRATCHPAD:
+            for i in range(2, 5):
+                self.scratchpad[i] = yield from self._rx_byte()
+            self.scratchpad[4] = self.scratchpad[4] & 0x60 | 0x1F
+            self._seal()
+        elif command == _RD_POWER_SUPPLY:
+            while True:
+                yield 1  # Externally powered
+        # COPY SCRATCHPAD / RECALL E2 need nothing modelled beyond the RAM copy
+
+    def _conversion_done(self):
+        self._latch()
+        return 1 if self.converting_until is None else 0
+
+    def _latch(self):
+        """Store the conversion result once its time has passed."""
+        due = self.converting_until
+        if due is None or self.clock.us() < due:
+            return
+        self.converting_until = None
+        t = value_at(self.temperature_c, self.clock)
+        raw = int(round(t * 16))
+        raw &= ~((1 << (12 - self.resolution)) - 1)
+        raw &= 0xFFFF
+        self.scratchpad[0] = raw & 0xFF
+        self.scratchpad[1] = raw >> 8
+        self._seal()
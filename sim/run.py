@@ -0,0 +1,161 @@
+# sim/run.py
+"""
+Run the firmware's main.py on a simulated board:
+
+    python -m sim.run --seconds 3600 --sensors bme280,ds18b20 --quiet
+
+Virtual time runs as fast as the host allows unless --speed paces it.
+"""
+
+import argparse
+import contextlib
+import cProfile
+import gc
+import io
+import os
+import pstats
+import runpy
+import sys
+import time
+
+import sim
+from sim.board import Board, MachineReset
+from sim.clock import VirtualClock
+from sim.scenario import SENSORS, Scenario, default_config
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m sim.run", description=__doc__)
+    parser.add_argument("--seconds", type=float, default=600, help="virtual run time")
+    parser.add_argument(
+        "--speed", type=float, default=0, help="pace to N x real time (0: flat out)"
+    )
+    parser.add_argument(
+        "--cpu-scale",
+        type=float,
+        default=0,
+        help="charge host CPU time x N as virtual time (RP2040 is ~50-100x slower)",
+    )
+    parser.add_argument("--device", type=int, default=0, help="ID pin value 0-15")
+    parser.add_argument(
+        "--sensors",
+        default="bme280,ds18b20",
+        help=f"comma-separated, from {','.join(SENSORS)} (empty: internal only)",
+    )
+    parser.add_argument("--probes", type=int, default=2, help="DS18B20 probes")
+    parser.add_argument("--runtime", choices=("polling", "async"), default=None)
+    parser.add_argument("--flash", help="flash directory, kept between runs")
+    parser.add_argument("--quiet", action="store_true", help="hide firmware output")
+    parser.add_argument("--profile", action="store_true", help="cProfile the run")
+    parser.add_argument("--show-oled", action="store_true", help="print the display")
+    return parser.parse_args(argv)
+
+
+def build(args):
+    overrides = {}
+    if args.runtime:
+        overrides["runtime_mode"] = args.runtime
+    sensors = [s for s in args.sensors.split(",") if s]
+    clock = VirtualClock(speed=args.speed, cpu_scale=args.cpu_scale)
+    board = Board(clock=clock, flash_dir=args.flash)
+    return Scenario(
+        device=args.device,
+        sensors=sensors,
+        config=default_config(**overrides),
+        probes=args.probes,
+        board=board,
+    )
+
+
+def run_firmware(scenario, seconds):
+    """Boot main.py and run it until `seconds` of virtual time have passed."""
+    clock = scenario.board.clock
+    clock.stop_after(seconds)
+    if _ROOT not in sys.path:
+        sys.path.insert(0, _ROOT)
+    try:
+        runpy.run_module("main", run_name="main")
+        return "main.py returned"
+    except KeyboardInterrupt:
+        return "time limit reached"
+    except MachineReset as e:
+        return f"device reset ({e})"
+
+
+def report(scenario, outcome, wall_s, collects):
+    board = scenario.board
+    virtual_s = board.clock.seconds()
+    broker, api, cfg = scenario.broker, scenario.api, scenario.config_server
+    payload_bytes = sum(len(m[1]) for m in broker.messages)
+    lines = [
+        f"outcome:    {outcome}",
+        f"time:       {virtual_s:.1f} s virtual in {wall_s:.2f} s wall "
+        f"({virtual_s / max(wall_s, 1e-9):.0f}x)",
+        f"mqtt:       {len(broker.messages)} messages, {payload_bytes} payload bytes, "
+        f"{broker.connects} connects, {broker.pings} pings, "
+        f"{broker.duplicates} duplicates",
+        f"api:        {api.count('POST')} posts",
+        f"config:     {cfg.count('GET', status=200)} x 200, "
+        f"{cfg.count('GET', status=304)} x 304",
+        f"network:    {board.network.connections} connections, "
+        f"{board.network.bytes_up} bytes up, {board.network.bytes_down} bytes down",
+    ]
+    for pins, bus in board.i2c_buses.items():
+        lines.append(
+            f"i2c {pins}: {bus.transfers} transfers, {bus.bytes} bytes"
+        )
+    for pin, bus in board.onewire_buses.items():
+        lines.append(f"1-wire {pin}: {bus.resets} resets, {bus.slots} slots")
+    lines.append(f"oled:       {scenario.oled.frames} frames")
+    lines.append(f"gc:         {collects} collect() calls")
+    for pin, out in board.pwm.items():
+        duty = out["duty_u16"] * 100 / 65535
+        lines.append(f"pwm {pin}:     {out['freq']} Hz, {duty:.0f}% duty")
+    for topic, count in sorted(broker.topics().items()):
+        lines.append(f"  {topic}: {count}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    scenario = build(args)
+    sim.install(scenario.board)
+
+    # The firmware blanks the display on shutdown: keep what it showed last
+    screen = []
+    if args.show_oled:
+        clock = scenario.board.clock
+        clock.call_later(
+            int(args.seconds * 1_000_000) - 1,
+            lambda: screen.append(scenario.oled.render()),
+        )
+
+    collects = gc.collect.calls
+    profiler = cProfile.Profile() if args.profile else None
+    output = io.StringIO() if args.quiet else sys.stdout
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            if profiler:
+                profiler.enable()
+            try:
+                outcome = run_firmware(scenario, args.seconds)
+            finally:
+                if profiler:
+                    profiler.disable()
+        wall_s = time.perf_counter() - start
+        collects = gc.collect.calls - collects
+    finally:
+        sim.uninstall()
+
+    print(report(scenario, outcome, wall_s, collects))
+    if screen:
+        print(screen[0])
+    if profiler:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# sim/scenario.py
+
+import copy
+import math
+
+from sim.board import Board
+from sim.devices import BME280, SHT31D, SSD1306, TMP117
+from sim.onewire_bus import DS18B20
+from sim.servers import HTTPServer, MQTTBroker
+
+# Wiring of the reference build
+SENSOR_SDA = 4
+SENSOR_SCL = 5
+OLED_SDA = 20
+OLED_SCL = 21
+ONEWIRE_PIN = 22
+MOTION_PIN = 16
+SWITCH_PIN = 17
+FAN_PWM_PIN = 15
+FAN_STEP_PINS = [10, 11, 12]
+ID_PINS = (0, 1, 2, 3)
+
+CONFIG_HOST = "192.168.6.132"
+CONFIG_PORT = 5000
+CONFIG_PATH = "/pico_iot_config.json"
+BROKER_HOST = "broker.sim"
+API_HOST = "api.sim"
+API_PATH = "/ingest"
+
+SENSORS = ("bme280", "sht31d", "tmp117", "ds18b20")
+
+# Names the firmware derives from the ID pins (utils/device_id.py)
+LOCATIONS = (
+    "Office", "Exterior", "Garage", "MasterBed", "LivingRoom", "Basement",
+    "Attic", "FrontDoor", "BackDoor", "GuestRoom", "Bathroom", "Patio",
+    "Hallway", "DiningRoom", "Laundry", "Spare",
+)
+
+DEFAULT_CONFIG = {
+    "device_global_config": {
+        "i2c_temp_sensor_pins": {"i2c_scl": SENSOR_SCL, "i2c_sda": SENSOR_SDA},
+        "motion_sensor_pin": {"pin": MOTION_PIN},
+        "switch_sensor_pin": {"pin": SWITCH_PIN},
+        "onewire_ds18b20_pin": {"pin": ONEWIRE_PIN},
+        "heartbeat_publish_period": 60000,
+        "motion_cooldown_wait_period": 30000,
+        "motion_check_period": 500,
+        "switch_check_period": 500,
+        "temperature_check_period": 30000,
+        "check_config_file_period": 60000,
+        "runtime_mode": "polling",
+        "sensor_options": {"ds18b20": {"resolution": 12}},
+        "aggregation": {"enabled": True},
+        "loop_stats": {"enabled": True, "publish_period": 300000},
+        "offline_queue": {"enabled": True, "max_records": 64, "segments": 4},
+        "mqtt_config": {
+            "enabled": True,
+            "broker": BROKER_HOST,
+            "port": 1883,
+            "base_topic": "pico_iot",
+            "reconnect_delay": 10000,
+            "keepalive": 60,
+            "qos": 1,
+        },
+        "api_config": {
+            "enabled": True,
+            "url": f"http://{API_HOST}{API_PATH}",
+            "api_key": "sim-key",
+            "timeout_ms": 5000,
+        },
+        "fan_pwm_controller_config": {
+            "enabled": True,
+            "manual_override": {"enabled": False},
+            "pwm_pin": FAN_PWM_PIN,
+            "pwm_freq": 25000,
+            "temp_min": 22,
+            "temp_max": 32,
+            "fan_min_duty": 20,
+            "fan_max_duty": 100,
+            "hysteresis": 0.5,
+        },
+        "fan_step_controller_config": {
+            "enabled": False,
+            "manual_override": {"enabled": False},
+            "pins": FAN_STEP_PINS,
+            "temp_min": 22,
+            "temp_max": 32,
+            "hysteresis": 0.5,
+        },
+    },
+    "system_global_config": {},
+    "device_list": [
+        {"device_id": f"{name}{i:02d}", "name": name, "enabled": True}
+        for i, name in enumerate(LOCATIONS)
+    ],
+}
+
+
+def default_config(**overrides):
+    """A copy of DEFAULT_CONFIG with device_global_config keys overridden."""
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    config["device_global_config"].update(overrides)
+    return config
+
+
+def temperature_trace(mean_c=24.0, swing_c=4.0, period_s=3600.0, phase=0.0):
+    """A slow sinusoidal room temperature, as a callable of virtual seconds."""
+
+    def trace(t):
+        return mean_c + swing_c * math.sin(2 * math.pi * t / period_s + phase)
+
+    return trace
+
+
+class Scenario:
+    """
+    One simulated device and the services around it: the board with its
+    sensors, display and inputs wired as in the reference build, the config
+    server, an MQTT broker and the ingest API on the board's network.
+    """
+
+    def __init__(
+        self,
+        device=0,
+        sensors=("bme280", "ds18b20"),
+        config=None,
+        probes=2,
+        board=None,
+        flash_dir=None,
+    ):
+        unknown = set(sensors) - set(SENSORS)
+        if unknown:
+            raise ValueError(f"unknown sensors: {', '.join(sorted(unknown))}")
+        self.board = board or Board(flash_dir=flash_dir)
+        self.config = config or default_config()
+        self.device_id = f"{LOCATIONS[device]}{device:02d}"
+        self.temperature = temperature_trace(phase=device)
+        self.devices = {}
+
+        b = self.board
+        for bit, pin in enumerate(ID_PINS):
+            b.set_level(pin, device >> bit & 1)
+
+        self.oled = b.add_i2c(OLED_SCL, OLED_SDA, SSD1306())
+
+        def humidity(t):
+            return 45 + 10 * math.sin(2 * math.pi * t / 5400)
+
+        if "bme280" in sensors:
+            self.devices["bme280"] = b.add_i2c(
+                SENSOR_SCL,
+                SENSOR_SDA,
+                BME280(temperature_c=self.temperature, humidity=humidity),
+            )
+        if "sht31d" in sensors:
+            self.devices["sht31d"] = b.add_i2c(
+                SENSOR_SCL,
+                SENSOR_SDA,
+                SHT31D(temperature_c=self.temperature, humidity=humidity),
+            )
+        if "tmp117" in sensors:
+            self.devices["tmp117"] = b.add_i2c(
+                SENSOR_SCL, SENSOR_SDA, TMP117(temperature_c=self.temperature)
+            )
+        if "ds18b20" in sensors:
+            self.devices["ds18b20"] = [
+                b.add_onewire(
+                    ONEWIRE_PIN,
+                    DS18B20(0x1000 + i, temperature_trace(18 + i, 2, 2700, i)),
+                )
+                for i in range(probes)
+            ]
+        b.die_temperature_c = lambda t: self.temperature(t) + 6
+
+        # A PIR that trips for 4 s every 90 s, and a door opened for 20 s
+        # every 10 minutes
+        self.motion = b.script(MOTION_PIN, [(45_000, 1), (49_000, 0)], 90_000)
+        self.switch = b.script(SWITCH_PIN, [(300_000, 1), (320_000, 0)], 600_000)
+
+        net = b.network
+        self.config_server = HTTPServer(net, CONFIG_HOST, CONFIG_PORT)
+        self.config_server.serve_json(CONFIG_PATH, lambda: self.config)
+        self.broker = MQTTBroker(net, BROKER_HOST)
+        self.api = HTTPServer(net, API_HOST)
+        self.api.accept(API_PATH)
@@ -0,0 +1,275 @@
+# sim/servers.py
+
+import hashlib
+import json
+
+
+class _Stream:
+    """Byte buffer a server handler consumes whole packets/requests from."""
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def feed(self, data):
+        self.buf += data
+
+
+class _Server:
+    """
+    A server with finite capacity: requests arrive one network latency
+    after the client writes them and are processed one at a time, taking
+    `service_us` each, so latency grows once the offered load nears
+    1 / service_us requests per second.
+    """
+
+    def __init__(self, network, host, port, service_us):
+        self.network = network
+        self.clock = network.clock
+        self.host = host
+        self.port = port
+        self.service_us = service_us
+        self.busy_until = 0
+
+    def _serve(self):
+        """Virtual us from now until the request just written is processed."""
+        now = self.clock.us()
+        arrival = now + int(self.network.latency_ms * 1000)
+        done = max(arrival, self.busy_until) + self.service_us
+        self.busy_until = done
+        return done - now
+
+
+class MQTTBroker(_Server):
+    """
+    MQTT 3.1.1 broker for the virtual network: accepts CONNECT, PUBLISH
+    (QoS 0 and 1), SUBSCRIBE, PINGREQ and DISCONNECT, and records every
+    application message as (topic, payload, qos, client_id, t_us,
+    latency_us). The latency is until the PUBACK is back at the client for
+    QoS 1, and until the broker has processed the message for QoS 0.
+    `on_message(message)` is called for each one; `accepting` refuses new
+    clients, and clearing `acking` withholds PUBACKs, as a broker that has
+    stalled or a link that loses them would.
+    """
+
+    def __init__(self, network, host="broker.sim", port=1883, service_us=0):
+        super().__init__(network, host, port, service_us)
+        self.messages = []
+        self.on_message = None
+        self.accepting = True
+        self.acking = True
+        self.clients = 0
+        self.connects = 0
+        self.pings = 0
+        self.duplicates = 0
+        self.bytes_in = 0
+        network.listen(host, port, self._session)
+
+    def _session(self, conn):
+        return _MQTTSession(self, conn)
+
+    def topics(self):
+        counts = {}
+        for topic, *_ in self.messages:
+            counts[topic] = counts.get(topic, 0) + 1
+        return counts
+
+
+class _MQTTSession(_Stream):
+    def __init__(self, broker, conn):
+        super().__init__()
+        self.broker = broker
+        self.conn = conn
+        self.client_id = None
+        self.seen = set()  # QoS 1 packet ids, to spot DUP redeliveries
+        broker.clients += 1
+
+    def received(self, data):
+        self.broker.bytes_in += len(data)
+        self.feed(data)
+        while True:
+            packet = self._next_packet()
+            if packet is None:
+                return
+            self._handle(*packet)
+
+    def _next_packet(self):
+        buf = self.buf
+        if len(buf) < 2:
+            return None
+        length = 0
+        shift = 0
+        i = 1
+        while True:
+            if i >= len(buf):
+                return None
+            b = buf[i]
+            length |= (b & 0x7F) << shift
+            i += 1
+            if not b & 0x80:
+                break
+            shift += 7
+        if len(buf) < i + length:
+            return None
+        header, body = buf[0], bytes(buf[i : i + length])
+        del buf[: i + length]
+        return header, body
+
+    def _handle(self, header, body):
+        broker = self.broker
+        kind = header >> 4
+        if kind == 1:  # CONNECT
+            name_len = body[0] << 8 | body[1]
+            i = 2 + name_len + 4
+            id_len = body[i] << 8 | body[i + 1]
+            self.client_id = body[i + 2 : i + 2 + id_len].decode()
+            broker.connects += 1
+            code = 0 if broker.accepting else 3  # 3: server unavailable
+            self.conn.send(bytes((0x20, 2, 0, code)))
+        elif kind == 3:  # PUBLISH
+            qos = header >> 1 & 3
+            topic_len = body[0] << 8 | body[1]
+            topic = body[2 : 2 + topic_len].decode()
+            i = 2 + topic_len
+            pid = None
+            if qos:
+                pid = body[i] << 8 | body[i + 1]
+                i += 2
+            payload = body[i:]
+            wait_us = broker._serve()
+            latency_us = wait_us
+            if qos == 1:
+                latency_us += int(broker.network.latency_ms * 1000)
+            if pid is not None and header & 0x08 and pid in self.seen:
+                broker.duplicates += 1
+            else:
+                message = (
+                    topic,
+                    payload,
+                    qos,
+                    self.client_id,
+                    broker.clock.us(),
+                    latency_us,
+                )
+                broker.messages.append(message)
+                if broker.on_message:
+                    broker.on_message(message)
+            if qos == 1:
+                self.seen.add(pid)
+                if broker.acking:
+                    puback = bytes((0x40, 2, pid >> 8, pid & 0xFF))
+                    self.conn.send(puback, wait_us / 1000)
+        elif kind == 8:  # SUBSCRIBE
+            # One topic filter per SUBSCRIBE, as umqtt sends them; QoS 2 is
+            # granted as 1
+            granted = bytes((min(1, body[-1]),))
+            self.conn.send(bytes((0x90, 2 + len(granted))) + body[:2] + granted)
+        elif kind == 12:  # PINGREQ
+            broker.pings += 1
+            self.conn.send(b"\xd0\x00")
+        elif kind == 14:  # DISCONNECT
+            self.conn.close()
+
+    def closed(self):
+        self.broker.clients -= 1
+
+
+class HTTPServer(_Server):
+    """
+    HTTP/1.1 server with keep-alive for the virtual network. Routes map
+    (method, path) to handler(request) returning (status, headers, body);
+    `request` is a dict with method, path, headers (lower-cased) and body.
+    Every request is recorded as (method, path, status, t_us, body bytes,
+    latency_us), the latency being until the response is back at the client.
+    """
+
+    REASONS = {200: "OK", 202: "Accepted", 304: "Not Modified", 404: "Not Found"}
+
+    def __init__(self, network, host, port=80, service_us=0):
+        super().__init__(network, host, port, service_us)
+        self.routes = {}
+        self.requests = []
+        network.listen(host, port, lambda conn: _HTTPSession(self, conn))
+
+    def route(self, method, path, handler):
+        self.routes[(method, path)] = handler
+
+    def serve_json(self, path, document):
+        """Serve `document` (JSON-able, or a callable returning one) with an ETag."""
+
+        def handler(request):
+            doc = document() if callable(document) else document
+            body = json.dumps(doc).encode()
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            headers = {"Content-Type": "application/json", "ETag": etag}
+            if request["headers"].get("if-none-match") == etag:
+                return 304, headers, b""
+            return 200, headers, body
+
+        self.route("GET", path, handler)
+
+    def accept(self, path, status=202):
+        """Record POSTs to `path`, answering with `status`."""
+        self.route("POST", path, lambda request: (status, {}, b""))
+
+    def count(self, method=None, path=None, status=None):
+        return sum(
+            1
+            for m, p, s, *_ in self.requests
+            if (method is None or m == method)
+            and (path is None or p == path)
+            and (status is None or s == status)
+        )
+
+    def _respond(self, conn, request):
+        handler = self.routes.get((request["method"], request["path"]))
+        if handler is None:
+            status, headers, body = 404, {}, b""
+        else:
+            status, headers, body = handler(request)
+        wait_us = self._serve()
+        self.requests.append(
+            (
+                request["method"],
+                request["path"],
+                status,
+                self.clock.us(),
+                request["body"],
+                wait_us + int(self.network.latency_ms * 1000),
+            )
+        )
+        lines = [f"HTTP/1.1 {status} {self.REASONS.get(status, 'Status')}\r\n"]
+        for name, value in headers.items():
+            lines.append(f"{name}: {value}\r\n")
+        lines.append(f"Content-Length: {len(body)}\r\n\r\n")
+        conn.send("".join(lines).encode() + body, wait_us / 1000)
+
+
+class _HTTPSession(_Stream):
+    def __init__(self, server, conn):
+        super().__init__()
+        self.server = server
+        self.conn = conn
+
+    def received(self, data):
+        self.feed(data)
+        while True:
+            end = self.buf.find(b"\r\n\r\n")
+            if end < 0:
+                return
+            head = bytes(self.buf[:end]).decode()
+            lines = head.split("\r\n")
+            method, path, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+            if len(self.buf) < end + 4 + length:
+                return
+            body = bytes(self.buf[end + 4 : end + 4 + length])
+            del self.buf[: end + 4 + length]
+            request = {"method": method, "path": path, "headers": headers, "body": body}
+            self.server._respond(self.conn, request)
+
+    def closed(self):
+        pass
@@ -0,0 +1,68 @@
+# bench_bme280.py - Per-read time and heap allocation of the BME280 read path
+#
+# Run on the device with a BME280 attached (adjust the pins below):
+#   mpremote run tests/bench_bme280.py
+# Compares the old debug-heavy read path (values + string round trip)
+# against read_imperial() in forced and normal mode.
+import gc
+import time
+import machine
+from lib.sensors.bme280 import BME280
+
+SCL_PIN = 5
+SDA_PIN = 4
+ROUNDS = 50
+
+
+def legacy_read(sensor):
+    """The removed BME280Sensor.read_values body, minus the console output"""
+    raw_values = sensor.values
+    sink = [
+        f"BME280 DEBUG: Raw values returned: {raw_values}",
+        f"BME280 DEBUG: Raw values type: {type(raw_values)}",
+    ]
+    temp_str, hum_str, press_str = raw_values
+    sink.append(f"  Temperature: '{temp_str}' (type: {type(temp_str)})")
+    sink.append(f"  Humidity: '{hum_str}' (type: {type(hum_str)})")
+    sink.append(f"  Pressure: '{press_str}' (type: {type(press_str)})")
+    temp_clean = str(temp_str).replace("C", "").strip()
+    sink.append(f"BME280 DEBUG: Temperature after cleaning: '{temp_clean}'")
+    temp_f = float(temp_clean)
+    hum_clean = str(hum_str).replace("%", "").strip()
+    sink.append(f"BME280 DEBUG: Humidity after cleaning: '{hum_clean}'")
+    humidity = float(hum_clean)
+    press_clean = str(press_str).replace("hPa", "").strip()
+    sink.append(f"BME280 DEBUG: Pressure after cleaning: '{press_clean}'")
+    pressure_inhg = float(press_clean) * 0.02953
+    sink.append(
+        f"BME280 DEBUG: Final values: temp_f={temp_f}, humidity={humidity}, pressure_inhg={pressure_inhg}"
+    )
+    return temp_f, humidity, pressure_inhg
+
+
+def bench(name, fn):
+    fn()  # Warm up
+    gc.collect()
+    alloc_start = gc.mem_alloc()
+    gc.disable()
+    start = time.ticks_us()
+    for _ in range(ROUNDS):
+        fn()
+    elapsed = time.ticks_diff(time.ticks_us(), start)
+    allocated = gc.mem_alloc() - alloc_start
+    gc.enable()
+    print(
+        f"{name:<22} {elapsed / ROUNDS:9.0f} us/read {allocated / ROUNDS:8.0f} bytes/read"
+    )
+
+
+i2c = machine.I2C(0, scl=machine.Pin(SCL_PIN), sda=machine.Pin(SDA_PIN))
+address = 0x77 if 0x77 in i2c.scan() else 0x76
+sensor = BME280(i2c=i2c, address=address)
+
+print(f"BME280 at {hex(address)}, {ROUNDS} reads each")
+bench("legacy (forced)", lambda: legacy_read(sensor))
+bench("read_imperial (forced)", sensor.read_imperial)
+sensor.configure_normal()
+time.sleep_ms(200)  # Let the first normal-mode cycles complete
+bench("read_imperial (normal)", sensor.read_imperial)
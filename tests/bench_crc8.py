@@ -0,0 +1,80 @@
+# bench_crc8.py - Compare 1-Wire CRC-8 implementations
+#
+# Run from the project root on CPython or the MicroPython unix port:
+#   python tests/bench_crc8.py
+#   micropython tests/bench_crc8.py
+import sys
+import time
+
+sys.path.insert(0, ".")
+from lib.sensors import crc8 as crc  # noqa: E402
+
+PROBES = 16
+ROUNDS = 200
+
+
+def crc8_bitwise(data):
+    """The original bit-by-bit loop from OneWire.crc8"""
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            if crc & 0x01:
+                crc = (crc >> 1) ^ 0x8C
+            else:
+                crc >>= 1
+    return crc
+
+
+def now_us():
+    if hasattr(time, "ticks_us"):
+        return time.ticks_us()
+    return int(time.perf_counter() * 1_000_000)
+
+
+def elapsed_us(start):
+    if hasattr(time, "ticks_diff"):
+        return time.ticks_diff(time.ticks_us(), start)
+    return now_us() - start
+
+
+def make_scratchpads(count):
+    """Back-to-back 9-byte scratchpads with valid trailing CRCs"""
+    buf = bytearray(9 * count)
+    for i in range(count):
+        pad = bytearray([0x50 + i, 0x05, 0x4B, 0x46, 0x7F, 0xFF, 0x0C, 0x10])
+        buf[i * 9 : i * 9 + 8] = pad
+        buf[i * 9 + 8] = crc8_bitwise(pad)
+    return buf
+
+
+def bench(name, fn, buf):
+    start = now_us()
+    for _ in range(ROUNDS):
+        fn(buf)
+    total = elapsed_us(start)
+    print(f"{name:<24} {total / ROUNDS:10.1f} us per {PROBES} scratchpads")
+    return total
+
+
+def main():
+    buf = make_scratchpads(PROBES)
+    pads = [buf[i * 9 : i * 9 + 9] for i in range(PROBES)]
+
+    # Every implementation must agree before timing them
+    for pad in pads:
+        assert crc8_bitwise(pad) == crc.crc8_table(pad) == crc.crc8(pad) == 0
+    assert crc.check_blocks(buf, 9) == [True] * PROBES
+
+    print(f"{sys.implementation.name}, viper: {crc.HAVE_VIPER}")
+    base = bench("bitwise per pad", lambda b: [crc8_bitwise(p) for p in pads], buf)
+    table = bench("table per pad", lambda b: [crc.crc8_table(p) for p in pads], buf)
+    best = bench("crc8() per pad", lambda b: [crc.crc8(p) for p in pads], buf)
+    batch = bench("check_blocks batch", lambda b: crc.check_blocks(b, 9), buf)
+    print(
+        f"speedup vs bitwise: table {base / table:.1f}x, crc8() {base / best:.1f}x, "
+        f"batch {base / batch:.1f}x"
+    )
+
+
+main()
@@ -0,0 +1,578 @@
+# bench_suite.py - Time and allocation of the firmware hot paths, as JSON
+#
+# Run from the project root on CPython or the MicroPython unix port:
+#   python tests/bench_suite.py -o bench.json
+#   micropython tests/bench_suite.py -o bench.json
+#   python tests/bench_suite.py --compare bench.json   # exit 1 on regressions
+#   python tests/bench_suite.py payload_mqtt oled_log  # only some cases
+#   python tests/bench_suite.py --help
+#
+# On MicroPython the command line needs micropython-lib's argparse
+# (`micropython -m mip install argparse`).
+#
+# Devices are small in-file stand-ins (a register-file I2C bus) so both
+# interpreters run the same driver code. On CPython the simulator (sim/)
+# provides the MicroPython modules, and the run_loop case runs one real
+# pass of runtime.run_loop on a simulated board; that case needs the
+# simulator and is skipped on MicroPython.
+#
+# Each case is warmed up, then timed over --repeats runs of its rounds.
+# Calls faster than SAMPLE_US are timed in batches ("batch" calls per
+# sample). median_us is the median of the per-run means, mean_us their
+# average and min/max_us the extremes of single samples; all are per call.
+# Before each run the suite times a fixed reference workload (ref_us is
+# its fastest call); rel_median and rel_fast are the case's median and
+# tenth-percentile sample divided by the reference of the same run, so they
+# hold still when the host as a whole gets slower. --compare flags a time
+# regression only when rel_median and rel_fast both moved past the
+# threshold, and re-runs a flagged case CONFIRM more times: it is reported
+# only if it regresses every time. alloc_bytes is per call as well: heap
+# bytes allocated with gc disabled on MicroPython, the tracemalloc peak
+# above the starting point on CPython. Only compare results from the same
+# interpreter.
+import gc
+import json
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+MICROPYTHON = sys.implementation.name == "micropython"
+if MICROPYTHON:
+    sim = None
+else:
+    import sim  # noqa: E402
+    from sim.scenario import Scenario  # noqa: E402
+
+ROUNDS = 200
+REPEATS = 5
+SAMPLE_US = 20
+THRESHOLD_PCT = 20
+CONFIRM = 2
+
+# Datasheet trimming values, as the BME280 stores them at 0x88 and 0xE1,
+# and a raw burst for about 25 degC / 1006 hPa / 45 %RH at 0xF7
+BME280_88 = bytes(
+    (
+        0x70, 0x6B, 0x43, 0x67, 0x18, 0xFC, 0x7D, 0x8E, 0x43, 0xD6, 0xD0, 0x0B,
+        0x27, 0x0B, 0x8C, 0x00, 0xF9, 0xFF, 0x8C, 0x3C, 0xF8, 0xC6, 0x70, 0x17,
+        0x00, 0x4B,
+    )
+)
+BME280_E1 = bytes((0x6A, 0x01, 0x00, 0x13, 0x29, 0x03, 0x1E))
+BME280_F7 = bytes((0x65, 0x5A, 0xC0, 0x7E, 0xED, 0x00, 0x6C, 0x2A))
+
+READINGS = {
+    "temperature_f": 72.41,
+    "humidity": 44.72,
+    "pressure_inhg": 29.871,
+    "temp_sensor_type": "BME280",
+    "motion": "LOW",
+    "switch": "HIGH",
+    "wifi_rssi": -61,
+    "uptime_seconds": 86400,
+    "fan_pwm": 40,
+    "fans_active_level": 0,
+    "version": "bench",
+    "uptime": "1d 0h 0m",
+    "sensors": {
+        "bme280": {"temperature_f": 72.41, "humidity": 44.72, "pressure_inhg": 29.871},
+        "ds18b20": {"temperature_f": 64.6},
+    },
+    "probes": [
+        {"rom": "28ff641e8e160312", "temperature_f": 64.6},
+        {"rom": "28ff641e8e160313", "temperature_f": 66.1},
+    ],
+    "stats": {
+        "bme280": {
+            "temperature_f": {
+                "min": 72.1, "max": 72.6, "mean": 72.38, "stddev": 0.14, "count": 2
+            },
+            "humidity": {
+                "min": 44.5, "max": 44.9, "mean": 44.7, "stddev": 0.2, "count": 2
+            },
+        },
+        "fan": {
+            "pwm_duty": {"min": 38, "max": 40, "mean": 39.0, "stddev": 1.0, "count": 2}
+        },
+    },
+}
+
+CONFIG = {
+    "device_global_config": {
+        "i2c_temp_sensor_pins": {"i2c_scl": 5, "i2c_sda": 4},
+        "motion_sensor_pin": {"pin": 16},
+        "switch_sensor_pin": {"pin": 17},
+        "onewire_ds18b20_pin": {"pin": 22},
+        "heartbeat_publish_period": 60000,
+        "motion_cooldown_wait_period": 30000,
+        "motion_check_period": 500,
+        "switch_check_period": 500,
+        "temperature_check_period": 30000,
+        "check_config_file_period": 60000,
+        "aggregation": {"enabled": True},
+        "offline_queue": {"enabled": True, "max_records": 64, "segments": 4},
+        "mqtt_config": {
+            "enabled": True,
+            "broker": "192.168.6.132",
+            "port": 1883,
+            "base_topic": "pico_iot",
+            "qos": 1,
+        },
+        "api_config": {"enabled": True, "url": "http://192.168.6.132:8080/ingest"},
+        "fan_pwm_controller_config": {"enabled": False},
+        "fan_step_controller_config": {"enabled": False},
+    },
+    "system_global_config": {"remote_logger": {"enabled": False}},
+    "device_list": [
+        {"device_id": f"Device{i:02d}", "name": f"Room {i}", "enabled": True}
+        for i in range(16)
+    ],
+}
+
+
+class RegisterBus:
+    """I2C stand-in: a 256-byte register file per address; raw writes are dropped."""
+
+    def __init__(self):
+        self.regs = {}
+
+    def add(self, addr, contents):
+        regs = bytearray(256)
+        for reg, data in contents.items():
+            regs[reg : reg + len(data)] = data
+        self.regs[addr] = regs
+
+    def scan(self):
+        return list(self.regs)
+
+    def readfrom_mem(self, addr, reg, n):
+        return bytes(self.regs[addr][reg : reg + n])
+
+    def readfrom_mem_into(self, addr, reg, buf):
+        buf[:] = self.regs[addr][reg : reg + len(buf)]
+
+    def writeto_mem(self, addr, reg, buf):
+        self.regs[addr][reg : reg + len(buf)] = buf
+
+    def writeto(self, addr, buf):
+        return len(buf)
+
+    def writevto(self, addr, bufs):
+        return sum(len(b) for b in bufs)
+
+
+def _oled_device():
+    from lib.oled1306.ssd1306 import SSD1306_I2C
+
+    return SSD1306_I2C(128, 64, RegisterBus(), 0x3C)
+
+
+# Each case returns (fn, between): fn is timed, between (or None) runs untimed
+# before every call
+
+
+def case_payload_mqtt():
+    from utils.payload_formatter import PayloadFormatter
+
+    def fn():
+        return PayloadFormatter.mqtt_payload("Device00", READINGS, "heartbeat")
+
+    return fn, None
+
+
+def case_payload_api():
+    from utils.payload_formatter import PayloadFormatter
+
+    def fn():
+        return PayloadFormatter.api_payload("Device00", READINGS, "heartbeat")
+
+    return fn, None
+
+
+def case_payload_encode():
+    from utils.payload_encoder import PayloadEncoder
+
+    encoder = PayloadEncoder()
+    return lambda: encoder.encode("Device00", READINGS, "heartbeat"), None
+
+
+def case_bme280_compensate():
+    from array import array
+    from lib.sensors.bme280 import BME280
+
+    bus = RegisterBus()
+    bus.add(0x76, {0x88: BME280_88, 0xD0: b"\x60", 0xE1: BME280_E1, 0xF7: BME280_F7})
+    sensor = BME280(i2c=bus)
+    # Normal mode: the forced-mode conversion wait would dominate
+    sensor.configure_normal()
+    result = array("i", [0, 0, 0])
+    return lambda: sensor.read_compensated_data(result), None
+
+
+def case_onewire_crc8():
+    from lib.sensors.onewire import OneWire
+
+    class Bus(OneWire):
+        def __init__(self):
+            pass  # No pin: crc8 does not touch the bus
+
+    bus = Bus()
+    pad = bytearray((0x50, 0x05, 0x4B, 0x46, 0x7F, 0xFF, 0x0C, 0x10, 0x1C))
+    return lambda: bus.crc8(pad), None
+
+
+def case_writer_printstring():
+    from lib.oled1306 import dejavu_9
+    from lib.oled1306.writer import Writer
+
+    device = _oled_device()
+    writer = Writer(device, dejavu_9, verbose=False)
+
+    def fn():
+        Writer.set_textpos(device, 32, 0)
+        writer.printstring("MQTT published heartbeat")
+
+    return fn, None
+
+
+def case_oled_log():
+    from displays.OLED1306Manager import OLED1306Display
+
+    class Display(OLED1306Display):
+        def _init_display(self):
+            return _oled_device()
+
+    display = Display()
+    return lambda: display.log("MQTT published heartbeat"), None
+
+
+def case_config_process():
+    from config.config_loader import ConfigLoader
+
+    loader = ConfigLoader("Device07")
+    return lambda: loader._process_config(CONFIG), None
+
+
+def case_run_loop():
+    if sim is None:
+        raise ImportError("needs the simulator (CPython)")
+    import runtime
+    from app import bootstrap
+
+    state = bootstrap()
+    # Pace as run_loop does, outside the timed pass
+    return (
+        lambda: runtime._loop_pass(state),
+        lambda: time.sleep_ms(runtime._loop_sleep_ms(state)),
+    )
+
+
+CASES = (
+    ("payload_mqtt", case_payload_mqtt, ROUNDS),
+    ("payload_api", case_payload_api, ROUNDS),
+    ("payload_encode", case_payload_encode, ROUNDS),
+    ("bme280_compensate", case_bme280_compensate, ROUNDS),
+    ("onewire_crc8", case_onewire_crc8, ROUNDS),
+    ("writer_printstring", case_writer_printstring, ROUNDS),
+    ("oled_log", case_oled_log, ROUNDS // 4),
+    ("config_process", case_config_process, ROUNDS),
+    # 125 ms passes: five minutes of loop, so publishes and sensor reads count
+    ("run_loop", case_run_loop, 2400),
+)
+
+
+if MICROPYTHON:
+
+    def now_us():
+        return time.ticks_us()
+
+    def elapsed_us(start):
+        return time.ticks_diff(time.ticks_us(), start)
+
+else:
+    # perf_counter is the host clock even with the simulator's time installed
+    _host_ns = time.perf_counter_ns
+
+    def now_us():
+        return _host_ns() / 1000
+
+    def elapsed_us(start):
+        return _host_ns() / 1000 - start
+
+
+def _collect():
+    # With the simulator installed gc.collect() only counts calls (see
+    # sim._Collect); the suite needs a real collection between runs
+    getattr(gc.collect, "host_collect", gc.collect)()
+
+
+def _alloc_micropython(fn, between, rounds):
+    total = 0
+    gc.collect()
+    gc.disable()
+    for _ in range(rounds):
+        if between:
+            between()
+        start = gc.mem_alloc()
+        fn()
+        total += gc.mem_alloc() - start
+    gc.enable()
+    return total // rounds
+
+
+def _alloc_cpython(fn, between, rounds):
+    import tracemalloc
+
+    total = 0
+    tracemalloc.start()
+    for _ in range(rounds):
+        if between:
+            between()
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        fn()
+        total += tracemalloc.get_traced_memory()[1] - start
+    tracemalloc.stop()
+    return total // rounds
+
+
+def _reference():
+    # Fixed interpreter workload (dict stores, int/str conversion) timed with
+    # every case, so compare() can tell a slower host from slower code
+    d = {}
+    for i in range(200):
+        d[i & 15] = str(i) + "x"
+    return d
+
+
+def warm_up(fn, between, rounds):
+    """
+    Run fn() untimed (lazy imports, font loading, first connections, caches)
+    and return how many calls make up one timed sample: cases without a
+    `between` step are timed in batches of at least SAMPLE_US, so the
+    clock's overhead and resolution do not dominate sub-microsecond calls.
+    """
+    fastest = None
+    for _ in range(max(1, rounds // 10)):
+        if between:
+            between()
+        start = now_us()
+        fn()
+        t = elapsed_us(start)
+        if fastest is None or t < fastest:
+            fastest = t
+    if between is None and fastest < SAMPLE_US:
+        return int(SAMPLE_US / max(fastest, 0.01)) + 1
+    return 1
+
+
+def time_run(fn, between, rounds, batch):
+    """One timed run: per-call time of each of `rounds` samples."""
+    times = []
+    _collect()
+    gc.disable()
+    for _ in range(rounds):
+        if between:
+            between()
+        start = now_us()
+        for _ in range(batch):
+            fn()
+        times.append(elapsed_us(start) / batch)
+    gc.enable()
+    return times
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def _fast(times):
+    # Tenth percentile: near the fastest call, but not a single lucky sample
+    return sorted(times)[len(times) // 10]
+
+
+def summarise(runs, refs, batch):
+    """
+    Per-call statistics over the runs of one case. rel_median and rel_fast
+    divide each run's median and tenth-percentile sample by the reference
+    timed just before that run, then take the median over the runs.
+    """
+    means = sorted(sum(times) / len(times) for times in runs)
+    return {
+        "rounds": len(runs[0]),
+        "repeats": len(runs),
+        "batch": batch,
+        "mean_us": round(sum(means) / len(means), 3),
+        "median_us": round(means[len(means) // 2], 3),
+        "min_us": round(min(min(times) for times in runs), 3),
+        "max_us": round(max(max(times) for times in runs), 3),
+        "ref_us": round(min(refs), 3),
+        "rel_median": round(_median(_median(t) / r for t, r in zip(runs, refs)), 4),
+        "rel_fast": round(_median(_fast(t) / r for t, r in zip(runs, refs)), 4),
+    }
+
+
+def measure(fn, between, rounds, repeats=REPEATS):
+    """
+    Time and allocation of fn() over `repeats` runs, each preceded by a
+    short run of the reference workload. Cases run one after another
+    because their setup can change shared state (run_loop's bootstrap
+    installs the logger and display every later log call goes to).
+    """
+    batch = warm_up(fn, between, rounds)
+    runs = []
+    refs = []
+    for _ in range(repeats):
+        refs.append(min(time_run(_reference, None, 20, 1)))
+        runs.append(time_run(fn, between, rounds, batch))
+    alloc = _alloc_micropython if MICROPYTHON else _alloc_cpython
+    result = summarise(runs, refs, batch)
+    result["alloc_bytes"] = alloc(fn, between, rounds)
+    return result
+
+
+def run(names=None, rounds=None, repeats=REPEATS):
+    import builtins
+
+    results = {}
+    host_print = builtins.print
+    # The firmware logs to the console on every step; time the code, not the
+    # terminal
+    builtins.print = lambda *args, **kwargs: None
+    try:
+        for name, setup, default_rounds in CASES:
+            if names and name not in names:
+                continue
+            try:
+                fn, between = setup()
+            except ImportError as e:
+                results[name] = {"skipped": str(e)}
+                continue
+            results[name] = measure(fn, between, rounds or default_rounds, repeats)
+    finally:
+        builtins.print = host_print
+    return {
+        "implementation": sys.implementation.name,
+        "version": ".".join(str(v) for v in sys.implementation.version[:3]),
+        "platform": sys.platform,
+        "cases": results,
+    }
+
+
+def compare(old, new, threshold):
+    """
+    Print per-case changes; return the names that regressed by > threshold %.
+    Time is compared as rel_median and rel_fast, i.e. relative to the
+    reference workload timed next to each run, which takes out a host that
+    is slower as a whole or slows down partway through. It counts as
+    regressed only when both got slower: load on the host inflates the
+    median, but less so the fastest calls, while a real slowdown moves both.
+    """
+    regressions = []
+    if old.get("implementation") != new["implementation"]:
+        print(
+            f"warning: comparing {old.get('implementation')} results "
+            f"with {new['implementation']}"
+        )
+    for name, result in new["cases"].items():
+        before = old["cases"].get(name)
+        if "skipped" in result or not before or "skipped" in before:
+            continue
+        # Results from before repeated runs only have mean_us
+        if "rel_fast" in before:
+            timed = ("rel_median", "rel_fast")
+        else:
+            timed = ("mean_us",)
+        changes = {}
+        for key in timed + ("alloc_bytes",):
+            a, b = before[key], result[key]
+            changes[key] = (b - a) * 100 / a if a else (100 if b else 0)
+            print(f"{name:<20} {key:<12} {a:>10} -> {b:<10} {changes[key]:+6.1f}%")
+        slower = min(changes[key] for key in timed) > threshold
+        if slower or changes["alloc_bytes"] > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def _parse_args(argv):
+    import argparse
+
+    known = [name for name, _, _ in CASES]
+    parser = argparse.ArgumentParser(
+        prog="tests/bench_suite.py",
+        description="Time and allocation of the firmware hot paths, as JSON.",
+    )
+    parser.add_argument("names", nargs="*", help=f"cases to run: {' '.join(known)}")
+    parser.add_argument("-o", "--output", help="write the JSON report here")
+    parser.add_argument(
+        "--compare", help="earlier report to compare with; exit 1 on regressions"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD_PCT,
+        help="regression threshold in percent",
+    )
+    parser.add_argument("--rounds", type=int, help="calls per run (default per case)")
+    parser.add_argument(
+        "--repeats", type=int, default=REPEATS, help="timed runs per case"
+    )
+    args = parser.parse_args(argv)
+    for name in args.names:
+        if name not in known:
+            parser.error(f"unknown case {name}; cases: {' '.join(known)}")
+    return args
+
+
+def confirm(old, regressions, args):
+    """
+    Re-run the cases that regressed CONFIRM more times; keep only those that
+    regress every time. A busy host slows a single run far more often than
+    it slows three in a row.
+    """
+    for _ in range(CONFIRM):
+        if not regressions:
+            break
+        print(f"re-running {' '.join(regressions)}")
+        again = run(regressions, args.rounds, args.repeats)
+        regressions = compare(old, again, args.threshold)
+    return regressions
+
+
+def main(argv):
+    args = _parse_args(argv)
+    old = None
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+
+    board = None
+    if sim is not None:
+        import shutil
+        import tempfile
+
+        flash_dir = tempfile.mkdtemp(prefix="bench-flash-")
+        board = sim.install(Scenario(flash_dir=flash_dir).board)
+    regressions = []
+    try:
+        report = run(args.names, args.rounds, args.repeats)
+        if old is not None:
+            regressions = confirm(old, compare(old, report, args.threshold), args)
+    finally:
+        if board is not None:
+            sim.uninstall()
+            shutil.rmtree(flash_dir, ignore_errors=True)
+
+    text = json.dumps(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    if old is None:
+        print(text)
+    elif regressions:
+        print(f"regressed by more than {args.threshold}%: {' '.join(regressions)}")
+        sys.exit(1)
+
+main(sys.argv[1:])
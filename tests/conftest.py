@@ -0,0 +1,13 @@
+# Shared fixtures for the host-side tests
+import pytest
+
+import sim
+from sim.board import Board
+
+
+@pytest.fixture
+def board(tmp_path):
+    """A fresh simulated board, with its flash in a temporary directory."""
+    board = sim.install(Board(flash_dir=str(tmp_path)))
+    yield board
+    sim.uninstall()
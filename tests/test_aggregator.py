@@ -0,0 +1,53 @@
+# Host-side checks of the per-publish sample statistics
+import random
+import statistics
+
+import pytest
+
+from utils.aggregator import Aggregator
+
+
+def test_stats_cover_the_whole_interval():
+    agg = Aggregator()
+    agg.add("bme280", "temperature_f", 95.0)  # Short spike at the start
+    rng = random.Random(20)
+    values = [95.0] + [rng.uniform(70, 72) for _ in range(500)]
+    for v in values[1:]:
+        agg.add("bme280", "temperature_f", v)
+
+    s = agg.snapshot()["bme280"]["temperature_f"]
+    assert s["count"] == 501
+    assert s["max"] == 95.0
+    assert s["min"] == pytest.approx(min(values), abs=1e-4)
+    assert s["mean"] == pytest.approx(statistics.fmean(values), abs=1e-3)
+    assert s["stddev"] == pytest.approx(statistics.pstdev(values), abs=1e-3)
+
+
+def test_reset_starts_a_new_interval():
+    agg = Aggregator()
+    for v in (1, 2, 3):
+        agg.add("fan", "pwm_duty", v)
+    agg.reset()
+    assert agg.snapshot() == {}
+    agg.add("fan", "pwm_duty", 40)
+    assert agg.snapshot()["fan"]["pwm_duty"] == {
+        "min": 40, "max": 40, "mean": 40, "stddev": 0, "count": 1
+    }
+
+
+def test_values_and_probes_are_grouped():
+    agg = Aggregator()
+    agg.add_values(
+        "ds18b20",
+        {
+            "temperature_f": 64.5,
+            "probes": [
+                {"rom": "28aa", "temperature_f": 64.5},
+                {"rom": "28bb", "temperature_f": None},
+            ],
+        },
+    )
+    agg.add("bme280", "humidity", True)  # Not a number
+    out = agg.snapshot()
+    assert set(out) == {"ds18b20", "ds18b20/28aa"}
+    assert out["ds18b20/28aa"]["temperature_f"]["count"] == 1
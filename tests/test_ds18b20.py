@@ -0,0 +1,44 @@
+# Host-side checks of the two-phase DS18B20 read, on the simulated bus
+import time
+
+import pytest
+
+from sim.onewire_bus import DS18B20
+
+
+@pytest.fixture
+def sensor(board):
+    board.add_onewire(22, DS18B20(0x1000, temperature_c=20.0))
+    from sensors.ds18b20_sensor import DS18B20Sensor
+
+    return DS18B20Sensor({"pin": 22})
+
+
+def test_read_into_without_start_does_not_block(sensor):
+    readings = {"temperature_f": 70.0}
+    start = time.ticks_ms()
+    assert sensor.read_into(readings) is False
+    # Only the bus traffic of the broadcast, not the 750 ms conversion
+    assert time.ticks_diff(time.ticks_ms(), start) < sensor.conversion_ms // 4
+    assert readings == {"temperature_f": 70.0}
+
+    # The next pass collects the conversion it started
+    time.sleep_ms(sensor.conversion_ms)
+    assert sensor.read_into(readings) is not False
+    assert readings["temperature_f"] == pytest.approx(68.0)
+    assert readings["probes"][0]["temperature_f"] == pytest.approx(68.0)
+
+
+def test_failed_start_keeps_previous_readings(sensor):
+    from sensors.sensor_manager import SensorManager
+
+    # No conversion pending: nothing new, so the runtime keeps what it had
+    manager = SensorManager(None, None, None, 22)
+    assert manager.read_temperature(sensor) is None
+    assert sensor.ready_at is not None
+
+
+def test_read_values_still_blocks(sensor):
+    start = time.ticks_ms()
+    assert sensor.read_values() == pytest.approx(68.0)
+    assert time.ticks_diff(time.ticks_ms(), start) >= sensor.conversion_ms
@@ -0,0 +1,64 @@
+# Host-side checks of the IRQ edge capture, run on the simulated clock
+
+
+class _Pin:
+    """Just enough of machine.Pin for EdgeCapture: a level and an IRQ hook."""
+
+    def __init__(self, level=0):
+        self.level = level
+        self.handler = None
+
+    def value(self):
+        return self.level
+
+    def irq(self, handler=None, trigger=0, hard=False):
+        self.handler = handler
+
+    def drive(self, level):
+        self.level = level
+        self.handler(self)
+
+
+def _capture(board, **kwargs):
+    from sensors.edge_capture import EdgeCapture
+
+    pin = _Pin()
+    edges = EdgeCapture(pin, **kwargs)
+    board.clock.advance(1_000_000)
+    return pin, edges
+
+
+def test_debounced_edges_are_recorded(board):
+    pin, edges = _capture(board, debounce_ms=50)
+    pin.drive(1)
+    board.clock.advance(10_000)
+    pin.drive(0)  # Bounce inside the window
+    board.clock.advance(10_000)
+    pin.drive(1)
+    board.clock.advance(100_000)
+    pin.drive(0)
+    assert edges.drain() == [1, 0]
+    assert edges.drain() == []
+
+
+def test_short_pulse_does_not_hide_next_edge(board):
+    pin, edges = _capture(board, debounce_ms=50)
+    # A pulse shorter than the window: the falling edge is dropped
+    pin.drive(1)
+    board.clock.advance(20_000)
+    pin.drive(0)
+    assert edges.drain() == [1]
+
+    # The next real rising edge must still be seen as motion
+    board.clock.advance(500_000)
+    pin.drive(1)
+    assert edges.drain() == [1]
+
+
+def test_ring_overflow_keeps_newest(board):
+    pin, edges = _capture(board, size=4, debounce_ms=0)
+    for i in range(6):
+        board.clock.advance(1_000)
+        pin.drive((i + 1) & 1)
+    assert edges.drain() == [1, 0, 1, 0]
+    assert edges.overflows == 2
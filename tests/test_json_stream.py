@@ -0,0 +1,79 @@
+# Host-side checks of the chunked JSON scanner
+import io
+import json
+
+import pytest
+
+from utils.json_stream import JSONStream
+
+DOC = {
+    "mqtt_config": {"broker": "b", "nested": [1, [2, {"x": "}]"}], {}]},
+    "escapes": ["a\"b", "back\\\\", "\\\"", "tab\t\u00e9", "", "\\"],
+    "device_list": [
+        {"device_id": "Garage02", "tags": ["a", "b"]},
+        {"device_id": "Office00", "note": "say \"hi\" \\o/"},
+        {"device_id": "Attic06"},
+    ],
+    "n": -12.5e3,
+    "flags": [True, False, None],
+}
+
+
+def _scanner(doc, chunk_size):
+    return JSONStream(io.BytesIO(doc.encode()), chunk_size)
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 24))
+def test_captured_values_split_across_chunks(chunk_size):
+    scanner = _scanner(json.dumps(DOC), chunk_size)
+    got = {}
+    for key in scanner.iter_object():
+        raw = scanner.capture_value()
+        assert isinstance(raw, bytes)
+        got[key] = json.loads(raw)
+    assert got == DOC
+
+
+@pytest.mark.parametrize("chunk_size", (1, 2, 3, 5, 7))
+def test_escaped_strings(chunk_size):
+    # Runs of backslashes before a quote, in every alignment to the chunks
+    for value in ("\\", "\\\\", 'a\\"', '\\\\"', '"', "x" * 9 + '\\"\\\\'):
+        doc = json.dumps({"k": value, "after": 1})
+        scanner = _scanner(doc, chunk_size)
+        keys = []
+        for key in scanner.iter_object():
+            keys.append(key)
+            if key == "k":
+                assert json.loads(scanner.capture_value()) == value
+            else:
+                scanner.skip_value()
+        assert keys == ["k", "after"]
+
+
+@pytest.mark.parametrize("chunk_size", (1, 4, 16))
+def test_skip_and_iterate_arrays(chunk_size):
+    scanner = _scanner(json.dumps(DOC), chunk_size)
+    ids = []
+    for key in scanner.iter_object():
+        if key != "device_list":
+            scanner.skip_value()
+            continue
+        for _ in scanner.iter_array():
+            ids.append(json.loads(scanner.capture_value())["device_id"])
+    assert ids == ["Garage02", "Office00", "Attic06"]
+
+
+def test_empty_containers_and_scalar_at_end():
+    scanner = _scanner('{"a": {}, "b": [], "c": 7}', 2)
+    got = {}
+    for key in scanner.iter_object():
+        got[key] = json.loads(scanner.capture_value())
+    assert got == {"a": {}, "b": [], "c": 7}
+    assert json.loads(_scanner("123", 2).capture_value()) == 123
+
+
+def test_truncated_document_raises():
+    scanner = _scanner('{"a": "unterminated', 4)
+    with pytest.raises(ValueError):
+        for _ in scanner.iter_object():
+            scanner.skip_value()
@@ -0,0 +1,72 @@
+# Host-side checks of the main-loop timing statistics, on the simulated clock
+import json
+
+
+def test_bucket_boundaries():
+    from utils.loop_stats import BUCKETS, Histogram
+
+    h = Histogram()
+    for us in (0, 63, 64, 127, 128, 1000, 10**9):
+        h.add(us)
+    assert h.buckets[0] == 2  # Below 64 us
+    assert h.buckets[1] == 2  # 64 .. 127 us
+    assert h.buckets[2] == 1
+    assert h.buckets[4] == 1  # 1000 us is below 64 << 4
+    assert h.buckets[BUCKETS - 1] == 1  # Everything longer
+    assert (h.count, h.max) == (7, 10**9)
+
+
+def test_percentile():
+    from utils.loop_stats import Histogram
+
+    h = Histogram()
+    assert h.percentile(0.9) == 0
+    for _ in range(9):
+        h.add(10)
+    h.add(1000)
+    assert h.percentile(0.5) == 64
+    assert h.percentile(0.9) == 64
+    assert h.percentile(1.0) == 1024
+    # Samples in the open-ended last bucket report the maximum
+    h.add(5_000_000)
+    assert h.percentile(1.0) == 5_000_000
+    assert h.summary()["p90"] == 1024
+
+    h.reset()
+    assert (h.count, h.total, h.max, sum(h.buckets)) == (0, 0, 0, 0)
+
+
+def test_overruns_and_stages(board):
+    from utils.loop_stats import LoopStats
+
+    stats = LoopStats(publish_period=60000)
+    for took_ms in (10, 30, 20, 26):
+        stats.begin()
+        board.clock.advance(2_000)
+        stats.mark("gc")
+        board.clock.advance((took_ms - 2) * 1000)
+        stats.mark("sensors")
+        stats.end(25)
+    assert stats.loop.count == 4
+    assert stats.overruns == 2
+    assert stats.loop.max == 30_000
+    assert stats.stages["gc"].total == 8_000
+    assert stats.stages["sensors"].count == 4
+
+    now = stats.started + 60000
+    assert stats.due(now)
+    payload = json.loads(stats.payload("dev1", now))
+    assert (payload["passes"], payload["overruns"]) == (4, 2)
+    stats.reset(now)
+    assert (stats.overruns, stats.loop.count) == (0, 0)
+    assert not stats.due(now)
+
+
+def test_payload_carries_i2c_counters(board):
+    from utils.loop_stats import LoopStats
+
+    stats = LoopStats()
+    i2c = {"5/4": {"errors": 3, "recoveries": 1, "devices": 1}}
+    payload = json.loads(stats.payload("dev1", stats.started, i2c))
+    assert payload["i2c"] == i2c
+    assert "i2c" not in json.loads(stats.payload("dev1", stats.started))
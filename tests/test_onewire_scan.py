@@ -0,0 +1,22 @@
+# Host-side checks of the 1-Wire ROM search, on the simulated bus
+import pytest
+
+import sim
+from sim.board import Board
+from sim.onewire_bus import DS18B20
+
+
+@pytest.mark.parametrize("serials", [(), (0x1000,), (0x1000, 0x1001), range(1, 9)])
+def test_scan_finds_every_probe(serials):
+    board = sim.install(Board())
+    try:
+        from machine import Pin
+        from lib.sensors.onewire import OneWire
+
+        probes = [board.add_onewire(22, DS18B20(serial)) for serial in serials]
+        if not probes:
+            board.add_onewire(22, DS18B20(0)).present = False
+        found = OneWire(Pin(22)).scan()
+        assert sorted(found) == sorted(p.rom for p in probes)
+    finally:
+        sim.uninstall()
@@ -0,0 +1,14 @@
+# Host-side checks of the PIO 1-Wire program timing
+from lib.sensors.onewire_timing import timing_model, check_timing
+
+
+def test_pio_timing_within_spec():
+    model = timing_model()
+    assert check_timing(model) == []
+    # Byte transfers are 8 slots; keep them close to the 60-70us nominal
+    assert model["slot"] <= 70
+
+
+def test_pio_timing_depends_on_clock():
+    # At twice the clock every phase halves and the slot is far too short
+    assert "low_0" in check_timing(timing_model(freq=2_000_000))
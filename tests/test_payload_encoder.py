@@ -0,0 +1,99 @@
+# Host-side checks that PayloadEncoder writes what PayloadFormatter would
+import json
+import math
+import random
+
+import pytest
+
+from utils.payload_encoder import PayloadEncoder
+from utils.payload_formatter import PayloadFormatter
+
+
+def _readings(temp, hum, pres, stat=1.0):
+    return {
+        "temperature_f": temp,
+        "humidity": hum,
+        "pressure_inhg": pres,
+        "temp_sensor_type": "BME280",
+        "motion": "LOW",
+        "switch": None,
+        "wifi_rssi": -61,
+        "uptime_seconds": 86400,
+        "fan_pwm": 40,
+        "fans_active_level": 0,
+        "version": "test",
+        "uptime": "1d 0h 0m",
+        "sensors": {
+            "bme280": {"temperature_f": temp, "humidity": hum, "pressure_inhg": pres},
+            "ds18b20": {"temperature_f": hum},
+        },
+        "probes": [
+            {"rom": "28ff641e8e160312", "temperature_f": temp},
+            {"rom": "28ff641e8e160313", "temperature_f": None},
+        ],
+        "stats": {
+            "bme280": {
+                "temperature_f": {
+                    "min": stat, "max": temp, "mean": pres, "stddev": stat, "count": 2
+                },
+            },
+            "fan": {
+                "pwm_duty": {"min": 38, "max": 40, "mean": 39.0, "stddev": 1.0, "count": 2}
+            },
+        },
+    }
+
+
+def _encoded(encoder, readings):
+    mqtt, api = encoder.encode("Device00", readings, "heartbeat")
+    return json.loads(bytes(mqtt)), json.loads(bytes(api))
+
+
+def _formatted(readings):
+    return (
+        json.loads(PayloadFormatter.mqtt_payload("Device00", readings, "heartbeat")),
+        json.loads(PayloadFormatter.api_payload("Device00", readings, "heartbeat")),
+    )
+
+
+def _without_timestamp(doc):
+    # Taken from the clock on each call; a second may tick in between
+    doc.pop("timestamp")
+    return doc
+
+
+@pytest.mark.parametrize(
+    "value",
+    (0.95, 1.15, -0.05, -0.15, 2.675, 0.005, 0.0005, -0.0, 0, 38, 72.41, 1e6 + 0.45),
+)
+def test_matches_formatter_on_halfway_values(value):
+    encoder = PayloadEncoder()
+    readings = _readings(value, value, value, value)
+    got = [_without_timestamp(d) for d in _encoded(encoder, readings)]
+    assert got == [_without_timestamp(d) for d in _formatted(readings)]
+
+
+def test_matches_formatter_on_random_readings():
+    rng = random.Random(25)
+    encoder = PayloadEncoder(size=256)
+    for _ in range(2000):
+        readings = _readings(
+            round(rng.uniform(-40, 120), rng.choice((1, 2, 3))),
+            rng.uniform(0, 100),
+            round(rng.uniform(25, 32), rng.choice((2, 3, 4))),
+            rng.uniform(-1, 1),
+        )
+        got = [_without_timestamp(d) for d in _encoded(encoder, readings)]
+        assert got == [_without_timestamp(d) for d in _formatted(readings)], readings
+
+
+@pytest.mark.parametrize("value", (math.nan, math.inf, -math.inf))
+def test_non_finite_values_are_null(value):
+    mqtt, api = _encoded(PayloadEncoder(), _readings(value, 45.0, 29.9, value))
+    assert mqtt["temperature"] is None
+    assert mqtt["humidity"] == 45.0
+    assert mqtt["probes"][0]["temperature"] is None
+    assert mqtt["sensors"]["bme280"]["temperature"] is None
+    assert mqtt["stats"]["bme280"]["temperature_f"]["stddev"] is None
+    assert api["temperature"] is None
+    assert api["sensors"] == mqtt["sensors"]
@@ -0,0 +1,105 @@
+# Host-side checks of QoS 1 pipelining in umqtt, against the simulated broker
+import pytest
+
+import sim
+from sim.scenario import BROKER_HOST, Scenario
+
+
+@pytest.fixture
+def scenario():
+    scenario = Scenario(sensors=())
+    board = sim.install(scenario.board)
+    wlan = board.wlan
+    wlan.active = True
+    wlan.requested = (wlan.ssid, wlan.password)
+    wlan.connected_at = 0
+    yield scenario
+    sim.uninstall()
+
+
+def _client(**kwargs):
+    from lib.umqtt.simple import connect_mqtt
+
+    client = connect_mqtt("dev", BROKER_HOST, **kwargs)
+    assert client is not None
+    return client
+
+
+def _settle(board, client, ms=50):
+    board.clock.advance(ms * 1000)
+    while client.check_msg() is not None:
+        pass
+
+
+def test_puback_releases_inflight(scenario):
+    client = _client(max_inflight=4)
+    pids = [client.publish("t", f"m{i}", qos=1) for i in range(3)]
+    # Sent without waiting: all three await their PUBACK
+    assert sorted(client.inflight) == sorted(pids)
+    assert len(scenario.broker.messages) == 3
+
+    _settle(scenario.board, client)
+    assert client.inflight == {}
+
+
+def test_full_window_returns_at_once(scenario):
+    scenario.broker.acking = False
+    client = _client(max_inflight=2, retry_ms=1000)
+    clock = scenario.board.clock
+    assert client.publish("t", "m0", qos=1)
+    assert client.publish("t", "m1", qos=1)
+
+    start = clock.us()
+    assert client.publish("t", "m2", qos=1) is False
+    assert clock.us() - start < 10_000
+    assert len(client.inflight) == 2
+    assert [m[1] for m in scenario.broker.messages] == [b"m0", b"m1"]
+
+    # Once the broker acknowledges the resends, publish() itself retires
+    # the PUBACKs waiting on the socket and sends
+    scenario.broker.acking = True
+    clock.advance(1_000_000)
+    client.resend_pending()
+    clock.advance(50_000)
+    assert client.publish("t", "m2", qos=1)
+    assert scenario.broker.messages[-1][1] == b"m2"
+
+
+def test_overdue_messages_are_resent_with_dup(scenario):
+    broker = scenario.broker
+    broker.acking = False
+    client = _client(max_inflight=4, retry_ms=1000)
+    client.publish("t", "m0", qos=1)
+
+    _settle(scenario.board, client, 500)
+    client.resend_pending()
+    assert broker.duplicates == 0  # Not overdue yet
+
+    broker.acking = True
+    _settle(scenario.board, client, 600)
+    client.resend_pending()
+    _settle(scenario.board, client)
+    assert broker.duplicates == 1
+    assert [m[1] for m in broker.messages] == [b"m0"]
+    assert client.inflight == {}
+
+
+def test_manager_keeps_message_when_window_full(scenario):
+    from connections.mqtt_manager import MQTTManager
+
+    scenario.broker.acking = False
+    mqtt = MQTTManager(
+        "dev",
+        {
+            "broker": BROKER_HOST,
+            "port": 1883,
+            "base_topic": "t",
+            "reconnect_delay": 0,
+            "qos": 1,
+            "inflight_window": 1,
+        },
+    )
+    assert mqtt.publish("m0")
+    assert mqtt.publish("m1") is False
+    # A full window is not a broken link: the connection stays up
+    assert mqtt.client is not None
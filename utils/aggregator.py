@@ -0,0 +1,102 @@
+# utils/aggregator.py
+
+import math
+from array import array
+
+
+class RunningStats:
+    """
+    Statistics of every sample since the last reset(), kept as running min,
+    max, mean and sum of squared deviations (Welford's update, which stays
+    accurate in single-precision floats) in a preallocated array. A short
+    spike anywhere in the interval still shows in min/max, however many
+    samples follow it.
+    """
+
+    def __init__(self):
+        self.acc = array("f", (0, 0, 0, 0))  # min, max, mean, M2
+        self.count = 0
+
+    def add(self, value):
+        acc = self.acc
+        self.count += 1
+        if self.count == 1:
+            acc[0] = acc[1] = acc[2] = value
+            acc[3] = 0
+            return
+        if value < acc[0]:
+            acc[0] = value
+        elif value > acc[1]:
+            acc[1] = value
+        d = value - acc[2]
+        acc[2] += d / self.count
+        acc[3] += d * (value - acc[2])
+
+    def reset(self):
+        self.count = 0
+
+    def stats(self):
+        """min/max/mean/stddev/count of the interval, or None if empty."""
+        n = self.count
+        if not n:
+            return None
+        acc = self.acc
+        return {
+            "min": acc[0],
+            "max": acc[1],
+            "mean": acc[2],
+            "stddev": math.sqrt(max(0, acc[3]) / n),
+            "count": n,
+        }
+
+
+class Aggregator:
+    """
+    Collects every numeric sensor reading between publishes and summarises
+    each one as min/max/mean/stddev/count, so sensors can be sampled faster
+    than the publish interval while only one summary goes upstream. The
+    accumulators are created on first use and keyed by (sensor, field).
+    """
+
+    def __init__(self):
+        self.fields = {}
+
+    def add(self, group, field, value):
+        if value is None or isinstance(value, bool):
+            return
+        if not isinstance(value, (int, float)):
+            return
+        key = (group, field)
+        stats = self.fields.get(key)
+        if stats is None:
+            stats = self.fields[key] = RunningStats()
+        stats.add(value)
+
+    def add_values(self, group, values):
+        """
+        Add each numeric entry of a readings dict under `group`. A "probes"
+        list (DS18B20) is aggregated per probe, under "<group>/<rom>".
+        """
+        for field, value in values.items():
+            if field == "probes":
+                for probe in value:
+                    sub = f"{group}/{probe['rom']}"
+                    for name, v in probe.items():
+                        if name != "rom":
+                            self.add(sub, name, v)
+            else:
+                self.add(group, field, value)
+
+    def snapshot(self):
+        """Statistics per group and field, e.g. {"bme280": {"humidity": {...}}}."""
+        out = {}
+        for (group, field), acc in self.fields.items():
+            stats = acc.stats()
+            if stats is not None:
+                out.setdefault(group, {})[field] = stats
+        return out
+
+    def reset(self):
+        """Start a new interval; the accumulators are reused."""
+        for acc in self.fields.values():
+            acc.reset()
@@ -0,0 +1,175 @@
+# utils/i2c_bus.py
+
+import time
+from machine import Pin, I2C, SoftI2C
+
+
+def _hardware_id(scl, sda):
+    """
+    RP2040 I2C block both pins can be muxed to, or None if there is none.
+    SDA/SCL of I2C0 sit on GP 4n/4n+1 and those of I2C1 on GP 4n+2/4n+3,
+    so any SDA and SCL pin of the same block work together (e.g. 4 and 9).
+    """
+    if not (0 <= scl < 30 and 0 <= sda < 30):
+        return None
+    sda_ids = {0: 0, 2: 1}
+    scl_ids = {1: 0, 3: 1}
+    hw_id = sda_ids.get(sda % 4)
+    if hw_id is None or scl_ids.get(scl % 4) != hw_id:
+        return None
+    return hw_id
+
+
+class I2CBusManager:
+    """
+    Owns one I2C instance per (scl, sda) pin pair and hands out the shared
+    handle, so sensors and the display don't each re-create the peripheral
+    and rescan. A pair uses its hardware block when it has one that is still
+    free, SoftI2C otherwise. Scan results are cached; bus errors are counted
+    and trigger a clock-out recovery after `recover_after` failures.
+    """
+
+    _instance = None
+
+    def __init__(self, recover_after=3):
+        I2CBusManager._instance = self
+        self.recover_after = recover_after
+        self.buses = {}  # (scl, sda) -> bus entry dict
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = I2CBusManager()
+        return cls._instance
+
+    def _hardware_in_use(self, hw_id):
+        return any(entry["hw_id"] == hw_id for entry in self.buses.values())
+
+    def _open(self, entry):
+        scl, sda = entry["pins"]
+        i2c = entry["i2c"]
+        if entry["hw_id"] is None:
+            if i2c is None:
+                i2c = SoftI2C(scl=Pin(scl), sda=Pin(sda), freq=entry["freq"])
+            else:
+                # Re-initialise in place so handles already given out to
+                # drivers and the display stay the bus's handle
+                i2c.init(scl=Pin(scl), sda=Pin(sda), freq=entry["freq"])
+        else:
+            # On the rp2 port this re-initialises the same object
+            i2c = I2C(entry["hw_id"], scl=Pin(scl), sda=Pin(sda), freq=entry["freq"])
+        entry["i2c"] = i2c
+        if not any(handle is i2c for handle in entry["handles"]):
+            # Ports that return a new object still count errors reported
+            # against a handle from before the recovery
+            entry["handles"].append(i2c)
+
+    def get(self, scl, sda, freq=400_000, soft=False, recover=False):
+        """
+        Return the shared I2C handle for this pin pair, creating it on first
+        use. `recover` clocks out a stuck slave before the bus is opened.
+        """
+        key = (scl, sda)
+        entry = self.buses.get(key)
+        if entry is not None:
+            return entry["i2c"]
+
+        hw_id = None if soft else _hardware_id(scl, sda)
+        if hw_id is not None and self._hardware_in_use(hw_id):
+            hw_id = None  # Block already drives other pins
+        entry = {
+            "pins": key,
+            "hw_id": hw_id,
+            "freq": freq,
+            "i2c": None,
+            "handles": [],  # Every object opened for this bus
+            "devices": None,
+            "errors": 0,
+            "errors_since_recovery": 0,
+            "recoveries": 0,
+        }
+        if recover:
+            self._clock_out(scl, sda)
+        self._open(entry)
+        self.buses[key] = entry
+        kind = "SoftI2C" if hw_id is None else f"I2C{hw_id}"
+        print(f"I2C bus scl={scl} sda={sda}: {kind} @ {freq // 1000}kHz")
+        return entry["i2c"]
+
+    def scan(self, scl, sda, refresh=False):
+        """Devices on the bus; scanned once and cached unless `refresh`."""
+        entry = self.buses.get((scl, sda))
+        if entry is None:
+            self.get(scl, sda)
+            entry = self.buses[(scl, sda)]
+        if entry["devices"] is None or refresh:
+            entry["devices"] = entry["i2c"].scan()
+        return entry["devices"]
+
+    def _find(self, i2c):
+        for entry in self.buses.values():
+            for handle in entry["handles"]:
+                if handle is i2c:
+                    return entry
+        return None
+
+    def record_error(self, i2c):
+        """Count a failed transfer on `i2c`; recovers the bus when due."""
+        entry = self._find(i2c)
+        if entry is None:
+            return
+        entry["errors"] += 1
+        entry["errors_since_recovery"] += 1
+        if entry["errors_since_recovery"] >= self.recover_after:
+            self.recover(*entry["pins"])
+
+    def recover(self, scl, sda):
+        """Free a slave holding SDA low, then re-open the bus."""
+        entry = self.buses.get((scl, sda))
+        self._clock_out(scl, sda)
+        if entry is not None:
+            self._open(entry)
+            entry["errors_since_recovery"] = 0
+            entry["recoveries"] += 1
+            print(f"I2C bus scl={scl} sda={sda} recovered")
+
+    @staticmethod
+    def _clock_out(scl_pin, sda_pin):
+        # Nine clocks let a slave finish the byte it is stuck in, then a STOP
+        sda = Pin(sda_pin, Pin.OPEN_DRAIN, value=1)
+        scl = Pin(scl_pin, Pin.OPEN_DRAIN, value=1)
+        for _ in range(9):
+            scl.value(0)
+            time.sleep_us(10)
+            scl.value(1)
+            time.sleep_us(10)
+        # STOP condition
+        sda.value(0)
+        time.sleep_us(10)
+        scl.value(1)
+        time.sleep_us(10)
+        sda.value(1)
+        time.sleep_us(10)
+        time.sleep_ms(50)
+
+    def release(self, scl, sda):
+        """Close a bus at shutdown; later get() calls open it again."""
+        entry = self.buses.pop((scl, sda), None)
+        if entry is None:
+            return
+        try:
+            entry["i2c"].deinit()
+        except AttributeError:
+            # SoftI2C might not have deinit in some MicroPython versions
+            pass
+
+    def stats(self):
+        """Error and recovery counters per bus, keyed "scl/sda"."""
+        return {
+            f"{scl}/{sda}": {
+                "errors": entry["errors"],
+                "recoveries": entry["recoveries"],
+                "devices": len(entry["devices"] or ()),
+            }
+            for (scl, sda), entry in self.buses.items()
+        }
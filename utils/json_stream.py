@@ -0,0 +1,168 @@
+# utils/json_stream.py
+
+# Byte values (membership tests against ints; MicroPython's bytes `in`
+# only accepts substrings)
+_WS = (0x20, 0x09, 0x0D, 0x0A)
+_QUOTE = 0x22
+_BACKSLASH = 0x5C
+_OPEN = (0x7B, 0x5B)  # { [
+_CLOSE = (0x7D, 0x5D)  # } ]
+_DELIMS = (0x2C, 0x7D, 0x5D) + _WS  # , } ] whitespace
+
+
+class JSONStream:
+    """
+    Pull scanner over a JSON document that is read in chunks from a stream
+    (anything with read(n), e.g. an HTTP response). Values can be skipped
+    without building them, or captured as raw bytes for json.loads, so the
+    caller decides which parts of a large document are ever materialized.
+    """
+
+    def __init__(self, stream, chunk_size=256):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buf = b""
+        self.pos = 0
+
+    def _fill(self):
+        data = self.stream.read(self.chunk_size)
+        if not data:
+            raise ValueError("Unexpected end of JSON")
+        self.buf = data
+        self.pos = 0
+
+    def _take(self, out):
+        """Consume one byte, copying it to `out` if given."""
+        if self.pos >= len(self.buf):
+            self._fill()
+        c = self.buf[self.pos]
+        self.pos += 1
+        if out is not None:
+            out.append(c)
+        return c
+
+    def peek(self):
+        """Skip whitespace and return the next byte without consuming it."""
+        while True:
+            if self.pos >= len(self.buf):
+                self._fill()
+            c = self.buf[self.pos]
+            if c not in _WS:
+                return c
+            self.pos += 1
+
+    def expect(self, char):
+        if self.peek() != ord(char):
+            raise ValueError(f"Expected '{char}' in JSON")
+        self.pos += 1
+
+    def _string_tail(self, out):
+        # The opening quote is already consumed; consume up to and including
+        # the closing one. A run of backslashes can straddle two chunks, so
+        # whether the run so far is odd is carried across reads.
+        escaped = False
+        while True:
+            if self.pos >= len(self.buf):
+                self._fill()
+            buf = self.buf
+            start = self.pos
+            end = buf.find(b'"', start)
+            stop = len(buf) if end < 0 else end
+
+            i = stop - 1
+            while i >= start and buf[i] == _BACKSLASH:
+                i -= 1
+            odd = (stop - 1 - i) % 2 == 1
+            if i < start:
+                odd = odd != escaped  # Run continues from the previous chunk
+
+            if end < 0:
+                if out is not None:
+                    out.extend(buf[start:])
+                self.pos = stop
+                escaped = odd
+                continue
+
+            if out is not None:
+                out.extend(buf[start : end + 1])
+            self.pos = end + 1
+            if not odd:
+                return
+            escaped = False  # Escaped quote; keep scanning
+
+    def read_key(self):
+        """Read an object key (plain string, as used by config files)."""
+        self.expect('"')
+        raw = bytearray()
+        self._string_tail(raw)
+        return str(raw[:-1], "utf-8")
+
+    def skip_value(self, out=None):
+        """Consume one value; its raw bytes are appended to `out` if given."""
+        c = self.peek()
+        if c in _OPEN:
+            depth = 0
+            while True:
+                c = self._take(out)
+                if c == _QUOTE:
+                    self._string_tail(out)
+                elif c in _OPEN:
+                    depth += 1
+                elif c in _CLOSE:
+                    depth -= 1
+                    if depth == 0:
+                        return
+        elif c == _QUOTE:
+            self._take(out)
+            self._string_tail(out)
+        else:
+            # Number, true, false or null: runs up to the next delimiter
+            while True:
+                if self.pos >= len(self.buf):
+                    try:
+                        self._fill()
+                    except ValueError:
+                        return  # Scalar at the very end of the document
+                if self.buf[self.pos] in _DELIMS:
+                    return
+                self._take(out)
+
+    def capture_value(self):
+        """Consume one value and return its raw JSON bytes."""
+        out = bytearray()
+        self.skip_value(out)
+        # bytes, not bytearray: MicroPython's bytearray has no find(), and
+        # callers search the captured value before parsing it
+        return bytes(out)
+
+    def iter_object(self):
+        """Yield each key of an object; consume its value before resuming."""
+        self.expect("{")
+        if self.peek() == ord("}"):
+            self.pos += 1
+            return
+        while True:
+            key = self.read_key()
+            self.expect(":")
+            yield key
+            c = self.peek()
+            self.pos += 1
+            if c == ord("}"):
+                return
+            if c != ord(","):
+                raise ValueError("Expected ',' or '}' in JSON object")
+
+    def iter_array(self):
+        """Yield before each element of an array; consume it before resuming."""
+        self.expect("[")
+        if self.peek() == ord("]"):
+            self.pos += 1
+            return
+        while True:
+            yield
+            c = self.peek()
+            self.pos += 1
+            if c == ord("]"):
+                return
+            if c != ord(","):
+                raise ValueError("Expected ',' or ']' in JSON array")
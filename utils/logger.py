@@ -1,7 +1,7 @@
 # utils/logger.py
 import time
 import json
-import urequests
+from connections.http_pool import HTTPPool
 
 
 class Logger:
@@ -97,10 +97,11 @@ class Logger:
             payload = json.dumps({"message": message})
 
             # Send POST request
-            response = urequests.post(
+            response = HTTPPool.get_instance().request(
+                "POST",
                 self.http_url,
-                headers={"Content-Type": "application/json"},
                 data=payload,
+                headers={"Content-Type": "application/json"},
             )
 
             success = response.status_code == 200
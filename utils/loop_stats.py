@@ -0,0 +1,135 @@
+# utils/loop_stats.py
+
+import json
+import time
+from array import array
+
+# Bucket i counts durations below 64 << i us (64 us .. ~1 s); the last bucket
+# takes everything longer
+BUCKETS = 15
+_FIRST_SHIFT = 6
+
+# Stages of a main-loop pass, in order
+STAGES = ("gc", "status", "config", "sensors", "mqtt", "publish")
+
+
+class Histogram:
+    """
+    Durations in power-of-two microsecond buckets, with count, total and
+    maximum. The buckets are a preallocated array, so recording a sample
+    never allocates.
+    """
+
+    def __init__(self):
+        self.buckets = array("I", [0] * BUCKETS)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, us):
+        i = 0
+        d = us >> _FIRST_SHIFT
+        while d and i < BUCKETS - 1:
+            d >>= 1
+            i += 1
+        self.buckets[i] += 1
+        self.count += 1
+        self.total += us
+        if us > self.max:
+            self.max = us
+
+    def percentile(self, q):
+        """Upper bound in us of the bucket holding the q-th fraction of samples."""
+        if not self.count:
+            return 0
+        target = q * self.count
+        seen = 0
+        for i in range(BUCKETS - 1):
+            seen += self.buckets[i]
+            if seen >= target:
+                return 64 << i
+        return self.max
+
+    def summary(self):
+        """Compact dict: count, mean, p90 and max in us, and the bucket counts."""
+        buckets = list(self.buckets)
+        while buckets and not buckets[-1]:
+            buckets.pop()
+        return {
+            "n": self.count,
+            "avg": self.total // self.count if self.count else 0,
+            "p90": self.percentile(0.9),
+            "max": self.max,
+            "h": buckets,
+        }
+
+    def reset(self):
+        for i in range(BUCKETS):
+            self.buckets[i] = 0
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+
+class LoopStats:
+    """
+    Times each stage of the main loop with ticks_us into a Histogram, plus
+    the whole pass, and counts overruns: passes that took longer than the
+    shortest configured sensor period, so a sample was due before the pass
+    was done. Call begin() at the top of a pass, mark(stage) after each
+    stage, end(budget_ms) at the bottom. Totals cover one publish period.
+    """
+
+    def __init__(self, publish_period=300000):
+        self.publish_period = publish_period
+        self.stages = {name: Histogram() for name in STAGES}
+        self.loop = Histogram()
+        self.overruns = 0
+        self.started = time.ticks_ms()
+        self._pass_start = 0
+        self._mark = 0
+
+    def begin(self):
+        self._pass_start = self._mark = time.ticks_us()
+
+    def mark(self, stage):
+        """Charge the time since the previous mark to `stage`."""
+        t = time.ticks_us()
+        self.stages[stage].add(time.ticks_diff(t, self._mark))
+        self._mark = t
+
+    def end(self, budget_ms):
+        took = time.ticks_diff(time.ticks_us(), self._pass_start)
+        self.loop.add(took)
+        if took > budget_ms * 1000:
+            self.overruns += 1
+
+    def due(self, now):
+        return time.ticks_diff(now, self.started) >= self.publish_period
+
+    def payload(self, device_id, now, i2c=None):
+        """
+        The interval's statistics as a JSON message. `i2c` is
+        I2CBusManager.stats(), whose counters run since boot.
+        """
+        doc = {
+            "event_type": "loop_stats",
+            "device_id": device_id,
+            "interval_s": time.ticks_diff(now, self.started) // 1000,
+            "passes": self.loop.count,
+            "overruns": self.overruns,
+            "worst_us": self.loop.max,
+            "loop": self.loop.summary(),
+            "stages": {name: h.summary() for name, h in self.stages.items()},
+        }
+        if i2c:
+            doc["i2c"] = i2c
+        return json.dumps(doc)
+
+    def reset(self, now):
+        """Start a new interval; the histograms are reused."""
+        for h in self.stages.values():
+            h.reset()
+        self.loop.reset()
+        self.overruns = 0
+        self.started = now
@@ -0,0 +1,208 @@
+# utils/offline_queue.py
+
+import os
+import struct
+from utils.logger import Logger
+
+# Record kinds, so one queue can hold payloads for several transports
+KIND_MQTT = 1
+KIND_API = 2
+
+_HEADER = "<IBH"  # sequence number, kind, payload length
+_HEADER_SIZE = 7
+_FOOTER = "<I"  # sequence number again; only present once the write completed
+_FOOTER_SIZE = 4
+_META = "<II"  # head, tail at the time the marker was last written
+
+
+class OfflineQueue:
+    """
+    Flash-backed FIFO of payloads that could not be published.
+
+    Records have a fixed size and are spread over a ring of segment files.
+    Every record carries its sequence number in a header and a footer, so a
+    write torn by a reset is detected and the tail is recovered on boot by
+    scanning forward instead of rewriting a marker on every append. The
+    head/tail marker is persisted (write-then-rename) once per drain and when
+    appends rotate into the next segment. Because sequence numbers never
+    restart, successive laps walk through every segment in turn and flash
+    wear is spread evenly. When the queue is full the oldest record is
+    overwritten.
+    """
+
+    def __init__(self, path="/queue", max_records=256, record_size=512, segments=8):
+        self.logger = Logger.get_instance()
+        self.path = path
+        self.record_size = record_size
+        self.segments = segments
+        self.per_segment = (max_records + segments - 1) // segments
+        self.capacity = self.per_segment * segments
+        self.max_payload = record_size - _HEADER_SIZE - _FOOTER_SIZE
+
+        self.head = 0  # Sequence number of the oldest queued record
+        self.tail = 0  # Sequence number the next record will get
+        self.evicted = 0
+        self.dropped = 0
+        self._buf = bytearray(record_size)
+
+        self._load()
+        self.logger.log(
+            f"Offline queue: {len(self)}/{self.capacity} records in {path}"
+        )
+
+    def __len__(self):
+        return self.tail - self.head
+
+    # ----------------------------------------------------------------- storage
+
+    def _segment_file(self, index):
+        return f"{self.path}/seg{index}.bin"
+
+    def _meta_file(self):
+        return f"{self.path}/head.bin"
+
+    def _locate(self, seq):
+        slot = seq % self.capacity
+        return self._segment_file(slot // self.per_segment), (
+            slot % self.per_segment
+        ) * self.record_size
+
+    def _open_segment(self, name):
+        try:
+            return open(name, "r+b")
+        except OSError:
+            # First lap: create the segment at full size so slots can be
+            # overwritten in place afterwards
+            with open(name, "wb") as f:
+                f.write(bytearray(self.per_segment * self.record_size))
+            return open(name, "r+b")
+
+    def _read_record(self, seq):
+        """Return (kind, payload) for `seq`, or None if the slot holds another record."""
+        name, offset = self._locate(seq)
+        buf = self._buf
+        try:
+            with open(name, "rb") as f:
+                f.seek(offset)
+                if f.readinto(buf) != self.record_size:
+                    return None
+        except OSError:
+            return None
+
+        rec_seq, kind, length = struct.unpack_from(_HEADER, buf, 0)
+        if rec_seq != seq or length > self.max_payload:
+            return None
+        if struct.unpack_from(_FOOTER, buf, self.record_size - _FOOTER_SIZE)[0] != seq:
+            return None
+        return kind, bytes(buf[_HEADER_SIZE : _HEADER_SIZE + length])
+
+    def _save_meta(self):
+        tmp = self._meta_file() + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(struct.pack(_META, self.head, self.tail))
+        os.rename(tmp, self._meta_file())
+
+    def _load(self):
+        # Create the directory and any missing parents ("/queue/mqtt")
+        path = "" if self.path.startswith("/") else "."
+        for part in self.path.split("/"):
+            if part:
+                path = f"{path}/{part}"
+                try:
+                    os.mkdir(path)
+                except OSError:
+                    pass  # Already exists
+
+        try:
+            with open(self._meta_file(), "rb") as f:
+                self.head, self.tail = struct.unpack(_META, f.read())
+        except (OSError, ValueError):
+            # No usable marker: any segment contents are unreachable
+            self.head = self.tail = 0
+            for i in range(self.segments):
+                try:
+                    os.remove(self._segment_file(i))
+                except OSError:
+                    pass
+            self._save_meta()
+            return
+
+        # Records appended after the marker was written are still valid
+        while self._read_record(self.tail) is not None:
+            self.tail += 1
+        if self.tail - self.head > self.capacity:
+            self.head = self.tail - self.capacity
+
+    # -------------------------------------------------------------- public API
+
+    def put(self, kind, payload):
+        """Append a payload (str or bytes). Returns False if it does not fit."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        length = len(payload)
+        if length > self.max_payload:
+            self.dropped += 1
+            self.logger.log(f"Offline queue: payload too large ({length} bytes)")
+            return False
+
+        buf = self._buf
+        seq = self.tail
+        struct.pack_into(_HEADER, buf, 0, seq, kind, length)
+        buf[_HEADER_SIZE : _HEADER_SIZE + length] = payload
+        struct.pack_into(_FOOTER, buf, self.record_size - _FOOTER_SIZE, seq)
+
+        name, offset = self._locate(seq)
+        f = self._open_segment(name)
+        try:
+            f.seek(offset)
+            f.write(buf)
+        finally:
+            f.close()
+
+        self.tail = seq + 1
+        if self.tail - self.head > self.capacity:
+            # Slot of the oldest record was just reused
+            self.head = self.tail - self.capacity
+            self.evicted += 1
+        if self.tail % self.per_segment == 0:
+            # Rotating into the next segment: refresh the marker so boot-time
+            # recovery never has to scan further than one segment
+            self._save_meta()
+        return True
+
+    def requeue(self, count):
+        """
+        Move the head back over the last `count` drained records, so records
+        that drain() handed out but that were never delivered go out first
+        again. Drained records stay on flash until appends reuse their slots.
+        """
+        floor = max(0, self.tail - self.capacity)
+        head = self.head
+        while count and head > floor:
+            head -= 1
+            if self._read_record(head) is not None:
+                count -= 1
+        if head != self.head:
+            self.head = head
+            self._save_meta()
+
+    def drain(self, send, limit=20):
+        """
+        Hand up to `limit` queued records, oldest first, to send(kind, payload).
+        Stops at the first send that returns False. Returns the number sent.
+        """
+        sent = 0
+        start = self.head
+        while sent < limit and self.head < self.tail:
+            record = self._read_record(self.head)
+            if record is None:
+                self.dropped += 1  # Corrupted slot, nothing to resend
+            elif not send(record[0], record[1]):
+                break
+            else:
+                sent += 1
+            self.head += 1
+
+        if self.head != start:
+            self._save_meta()
+        return sent
@@ -0,0 +1,294 @@
+# utils/payload_encoder.py
+
+import json
+import time
+
+_NULL = b"null"
+# Decimal places of each value, as PayloadFormatter rounds them
+_TEMP = 1
+_HUM = 1
+_PRESS = 2
+_STAT = 2
+_STDDEV = 3
+_POW10 = (1, 10, 100, 1000)
+_INF = float("inf")
+
+
+class PayloadEncoder:
+    """
+    Writes the MQTT and API bodies of a publish straight into two reusable
+    bytearrays: keys are constant byte strings in PayloadFormatter's order
+    and numbers are formatted digit by digit in place, so there is no dict,
+    no OrderedDict and no json.dumps per publish. The probes/sensors/stats
+    section is encoded once and copied into the API body.
+
+    encode() returns memoryviews into the buffers that stay valid until the
+    next call; anything kept longer (a batch) must copy them. The buffers
+    double when a payload does not fit.
+    """
+
+    def __init__(self, size=1024, max_size=16384):
+        self.max_size = max_size
+        self._alloc(size)
+        # JSON literals of repeated strings: device id, event types, sensor
+        # and field names, ROMs
+        self._strings = {}
+
+    def _alloc(self, size):
+        self.size = size
+        self.mqtt = bytearray(size)
+        self.api = bytearray(size)
+        self._mqtt_view = memoryview(self.mqtt)
+        self._api_view = memoryview(self.api)
+
+    def encode(self, client_id, readings, event_type):
+        """Return (mqtt_body, api_body) for the readings, as memoryviews."""
+        if not event_type:
+            raise ValueError("Event type must be specified")
+        while True:
+            try:
+                m, a = self._encode(client_id, readings, event_type)
+                return self._mqtt_view[:m], self._api_view[:a]
+            except IndexError:
+                if self.size * 2 > self.max_size:
+                    raise ValueError("Payload larger than encoder buffer")
+                self._alloc(self.size * 2)
+
+    # -- writers: each puts a value at buf[i] and returns the next index --
+
+    @staticmethod
+    def _put(buf, i, data):
+        end = i + len(data)
+        if end > len(buf):
+            raise IndexError
+        buf[i:end] = data
+        return end
+
+    def _put_str(self, buf, i, s):
+        literal = self._strings.get(s)
+        if literal is None:
+            literal = json.dumps(s).encode()
+            if len(self._strings) < 64:
+                self._strings[s] = literal
+        return self._put(buf, i, literal)
+
+    @staticmethod
+    def _put_int(buf, i, n):
+        # Writing past the end raises IndexError, like _put()
+        if n < 0:
+            buf[i] = 45  # '-'
+            i += 1
+            n = -n
+        d = 1
+        while d * 10 <= n:
+            d *= 10
+        while d:
+            buf[i] = 48 + n // d % 10
+            i += 1
+            d //= 10
+        return i
+
+    def _put_fixed(self, buf, i, value, places):
+        """
+        `value` rounded to `places` decimals, written without a str. The
+        digits come from round(value, places), as in PayloadFormatter: that
+        is the double nearest the short decimal, so scaling it back up
+        lands on its integer. NaN and infinities are written as null.
+        """
+        value = round(float(value), places)
+        if value != value or value in (_INF, -_INF):
+            return self._put(buf, i, _NULL)
+        scaled = round(value * _POW10[places])
+        if scaled < 0:
+            buf[i] = 45
+            i += 1
+            scaled = -scaled
+        scale = _POW10[places]
+        i = self._put_int(buf, i, scaled // scale)
+        buf[i] = 46  # '.'
+        i += 1
+        frac = scaled % scale
+        scale //= 10
+        while scale:
+            buf[i] = 48 + frac // scale % 10
+            i += 1
+            scale //= 10
+        return i
+
+    def _put_number(self, buf, i, value, places):
+        if value is None:
+            return self._put(buf, i, _NULL)
+        return self._put_fixed(buf, i, value, places)
+
+    def _put_value(self, buf, i, value):
+        """A pass-through field: int, str, None, or anything else via json."""
+        if value is None:
+            return self._put(buf, i, _NULL)
+        if isinstance(value, bool):
+            return self._put(buf, i, b"true" if value else b"false")
+        if isinstance(value, int):
+            return self._put_int(buf, i, value)
+        if isinstance(value, str):
+            return self._put_str(buf, i, value)
+        return self._put(buf, i, json.dumps(value).encode())
+
+    def _put_timestamp(self, buf, i, t):
+        buf[i] = 34  # '"'
+        i = self._put_digits(buf, i + 1, t[0], 4)
+        for sep, field in ((45, 1), (45, 2), (84, 3), (58, 4), (58, 5)):
+            buf[i] = sep
+            i = self._put_digits(buf, i + 1, t[field], 2)
+        buf[i] = 90  # 'Z'
+        buf[i + 1] = 34
+        return i + 2
+
+    @staticmethod
+    def _put_digits(buf, i, n, width):
+        d = _POW10[width - 1]
+        while d:
+            buf[i] = 48 + n // d % 10
+            i += 1
+            d //= 10
+        return i
+
+    # -- sections shared by both bodies --
+
+    def _put_extras(self, buf, i, readings):
+        """The optional probes, sensors and stats members, comma first."""
+        put = self._put
+        probes = readings.get("probes")
+        if probes:
+            i = put(buf, i, b', "probes": [')
+            for n, p in enumerate(probes):
+                if n:
+                    i = put(buf, i, b", ")
+                i = put(buf, i, b'{"rom": ')
+                i = self._put_str(buf, i, p["rom"])
+                i = put(buf, i, b', "temperature": ')
+                i = self._put_number(buf, i, p["temperature_f"], _TEMP)
+                i = put(buf, i, b"}")
+            i = put(buf, i, b"]")
+
+        sensors = readings.get("sensors")
+        if sensors:
+            i = put(buf, i, b', "sensors": {')
+            first = True
+            for name, values in sensors.items():
+                if not first:
+                    i = put(buf, i, b", ")
+                first = False
+                i = self._put_str(buf, i, name)
+                i = put(buf, i, b": {")
+                sep = False
+                if "temperature_f" in values:
+                    i = put(buf, i, b'"temperature": ')
+                    i = self._put_fixed(buf, i, values["temperature_f"], _TEMP)
+                    sep = True
+                if "humidity" in values:
+                    i = put(buf, i, b', "humidity": ' if sep else b'"humidity": ')
+                    i = self._put_fixed(buf, i, values["humidity"], _HUM)
+                    sep = True
+                if "pressure_inhg" in values:
+                    i = put(buf, i, b', "pressure": ' if sep else b'"pressure": ')
+                    i = self._put_fixed(buf, i, values["pressure_inhg"], _PRESS)
+                i = put(buf, i, b"}")
+            i = put(buf, i, b"}")
+
+        stats = readings.get("stats")
+        if stats:
+            i = put(buf, i, b', "stats": {')
+            first = True
+            for group, fields in stats.items():
+                if not first:
+                    i = put(buf, i, b", ")
+                first = False
+                i = self._put_str(buf, i, group)
+                i = put(buf, i, b": {")
+                inner = True
+                for field, s in fields.items():
+                    if not inner:
+                        i = put(buf, i, b", ")
+                    inner = False
+                    i = self._put_str(buf, i, field)
+                    i = put(buf, i, b': {"min": ')
+                    i = self._put_fixed(buf, i, s["min"], _STAT)
+                    i = put(buf, i, b', "max": ')
+                    i = self._put_fixed(buf, i, s["max"], _STAT)
+                    i = put(buf, i, b', "mean": ')
+                    i = self._put_fixed(buf, i, s["mean"], _STAT)
+                    i = put(buf, i, b', "stddev": ')
+                    i = self._put_fixed(buf, i, s["stddev"], _STDDEV)
+                    i = put(buf, i, b', "count": ')
+                    i = self._put_int(buf, i, s["count"])
+                    i = put(buf, i, b"}")
+                i = put(buf, i, b"}")
+            i = put(buf, i, b"}")
+        return i
+
+    def _encode(self, client_id, readings, event_type):
+        put = self._put
+        get = readings.get
+        temp = get("temperature_f")
+
+        # MQTT body
+        buf = self.mqtt
+        i = put(buf, 0, b'{"event_type": ')
+        i = self._put_str(buf, i, event_type)
+        i = put(buf, i, b', "device_id": ')
+        i = self._put_str(buf, i, client_id)
+        i = put(buf, i, b', "temperature": ')
+        i = self._put_number(buf, i, temp, _TEMP)
+        i = put(buf, i, b', "humidity": ')
+        i = self._put_number(buf, i, get("humidity"), _HUM)
+        i = put(buf, i, b', "pressure": ')
+        i = self._put_number(buf, i, get("pressure_inhg"), _PRESS)
+        i = put(buf, i, b', "motion": ')
+        i = self._put_str(buf, i, str(get("motion")))
+        i = put(buf, i, b', "switch": ')
+        i = self._put_str(buf, i, str(get("switch")))
+        i = put(buf, i, b', "sensor_type": ')
+        i = self._put_value(buf, i, get("temp_sensor_type", "UNKNOWN"))
+        extras_start = i
+        i = self._put_extras(buf, i, readings)
+        extras_end = i
+        i = put(buf, i, b', "wifi_rssi": ')
+        i = self._put_value(buf, i, get("wifi_rssi"))
+        i = put(buf, i, b', "uptime_seconds": ')
+        i = self._put_value(buf, i, get("uptime_seconds"))
+        i = put(buf, i, b', "fan_pwm": ')
+        i = self._put_value(buf, i, get("fan_pwm"))
+        i = put(buf, i, b', "fans_active_level": ')
+        i = self._put_value(buf, i, get("fans_active_level"))
+        i = put(buf, i, b', "timestamp": ')
+        i = self._put_timestamp(buf, i, time.localtime())
+        i = put(buf, i, b', "version": ')
+        i = self._put_value(buf, i, get("version"))
+        i = put(buf, i, b', "uptime": ')
+        i = self._put_value(buf, i, get("uptime"))
+        m = put(buf, i, b"}")
+
+        # API body: the shared section is copied from the MQTT body
+        buf = self.api
+        i = put(buf, 0, b'{"event_type": ')
+        i = self._put_str(buf, i, event_type)
+        i = put(buf, i, b', "device_id": ')
+        i = self._put_str(buf, i, client_id)
+        i = put(buf, i, b', "temperature": ')
+        i = self._put_number(buf, i, temp, _TEMP)
+        i = put(buf, i, b', "sensor_type": ')
+        i = self._put_value(buf, i, get("temp_sensor_type", "UNKNOWN"))
+        i = put(buf, i, b', "wifi_rssi": ')
+        i = self._put_value(buf, i, get("wifi_rssi"))
+        i = put(buf, i, b', "uptime_seconds": ')
+        i = self._put_value(buf, i, get("uptime_seconds"))
+        i = put(buf, i, b', "fan_pwm": ')
+        i = self._put_value(buf, i, get("fan_pwm"))
+        i = put(buf, i, b', "fans_active_level": ')
+        i = self._put_value(buf, i, get("fans_active_level"))
+        i = put(buf, i, self._mqtt_view[extras_start:extras_end])
+        i = put(buf, i, b', "timestamp": ')
+        i = self._put_timestamp(buf, i, time.gmtime())
+        i = put(buf, i, b', "version": ')
+        i = self._put_value(buf, i, get("version"))
+        a = put(buf, i, b"}")
+        return m, a
@@ -4,6 +4,62 @@ from collections import OrderedDict
 
 
 class PayloadFormatter:
+    @staticmethod
+    def _stats(readings):
+        """Per-interval min/max/mean/stddev/count, grouped by sensor."""
+        stats = readings.get("stats")
+        if not stats:
+            return None
+        out = {}
+        for group, fields in stats.items():
+            out[group] = {
+                field: {
+                    "min": round(s["min"], 2),
+                    "max": round(s["max"], 2),
+                    "mean": round(s["mean"], 2),
+                    "stddev": round(s["stddev"], 3),
+                    "count": s["count"],
+                }
+                for field, s in fields.items()
+            }
+        return out
+
+    @staticmethod
+    def _sensors(readings):
+        """Values of every environmental sensor, namespaced by sensor name."""
+        sensors = readings.get("sensors")
+        if not sensors:
+            return None
+        out = {}
+        for name, values in sensors.items():
+            entry = {}
+            if "temperature_f" in values:
+                entry["temperature"] = round(float(values["temperature_f"]), 1)
+            if "humidity" in values:
+                entry["humidity"] = round(float(values["humidity"]), 1)
+            if "pressure_inhg" in values:
+                entry["pressure"] = round(float(values["pressure_inhg"]), 2)
+            out[name] = entry
+        return out
+
+    @staticmethod
+    def _probes(readings):
+        """Per-ROM DS18B20 readings, or None on devices without probes."""
+        probes = readings.get("probes")
+        if not probes:
+            return None
+        return [
+            {
+                "rom": p["rom"],
+                "temperature": (
+                    round(float(p["temperature_f"]), 1)
+                    if p["temperature_f"] is not None
+                    else None
+                ),
+            }
+            for p in probes
+        ]
+
     @staticmethod
     def mqtt_payload(client_id, readings, event_type):
         if not event_type:
@@ -29,6 +85,18 @@ class PayloadFormatter:
         # Add sensor_type field
         msg["sensor_type"] = readings.get("temp_sensor_type", "UNKNOWN")
 
+        probes = PayloadFormatter._probes(readings)
+        if probes:
+            msg["probes"] = probes
+
+        sensors = PayloadFormatter._sensors(readings)
+        if sensors:
+            msg["sensors"] = sensors
+
+        stats = PayloadFormatter._stats(readings)
+        if stats:
+            msg["stats"] = stats
+
         # New fields
         msg["wifi_rssi"] = readings.get("wifi_rssi")
         msg["uptime_seconds"] = readings.get("uptime_seconds")
@@ -68,6 +136,15 @@ class PayloadFormatter:
             "fan_pwm": readings.get("fan_pwm"),
             "fans_active_level": readings.get("fans_active_level"),
         }
+        probes = PayloadFormatter._probes(readings)
+        if probes:
+            payload["probes"] = probes
+        sensors = PayloadFormatter._sensors(readings)
+        if sensors:
+            payload["sensors"] = sensors
+        stats = PayloadFormatter._stats(readings)
+        if stats:
+            payload["stats"] = stats
         t = time.gmtime()
         payload["timestamp"] = (
             f"{t[0]:04d}-{t[1]:02d}-{t[2]:02d}T{t[3]:02d}:{t[4]:02d}:{t[5]:02d}Z"